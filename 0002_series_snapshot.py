@@ -0,0 +1,88 @@
+# Generated by Django 5.0.1 on 2026-10-18 22:19
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def backfill_snapshots(apps, schema_editor):
+    """Cria snapshots (semântica acumulada) para os dados já existentes"""
+    VaccineData = apps.get_model('vaccine', 'VaccineData')
+    SeriesSnapshot = apps.get_model('vaccine', 'SeriesSnapshot')
+
+    groups = VaccineData.objects.values('country', 'state_or_region').annotate(
+        last_date=Max('date')
+    ).order_by()
+
+    snapshots = []
+    for group in groups:
+        latest = VaccineData.objects.filter(
+            country=group['country'],
+            state_or_region=group['state_or_region'],
+            date=group['last_date'],
+        ).values('vaccinated', 'deaths', 'population').first()
+        if latest is None:
+            continue
+        snapshots.append(SeriesSnapshot(
+            country=group['country'],
+            state_or_region=group['state_or_region'],
+            source='legacy',
+            semantics='cumulative',
+            last_date=group['last_date'],
+            **latest
+        ))
+
+    SeriesSnapshot.objects.bulk_create(snapshots, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vaccine', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeriesSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('country', models.CharField(max_length=100)),
+                ('state_or_region', models.CharField(blank=True, max_length=100, null=True)),
+                ('source', models.CharField(default='owid', max_length=50)),
+                ('semantics', models.CharField(choices=[('cumulative', 'Acumulado'), ('incremental', 'Incremental')], default='cumulative', max_length=20)),
+                ('last_date', models.DateField()),
+                ('vaccinated', models.BigIntegerField(default=0)),
+                ('deaths', models.BigIntegerField(default=0)),
+                ('population', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['country', 'state_or_region'],
+            },
+        ),
+        migrations.RemoveConstraint(
+            model_name='vaccinedata',
+            name='unique_country_state_date',
+        ),
+        migrations.AlterField(
+            model_name='vaccinedata',
+            name='country',
+            field=models.CharField(max_length=100),
+        ),
+        migrations.AlterUniqueTogether(
+            name='vaccinedata',
+            unique_together={('country', 'state_or_region', 'date')},
+        ),
+        migrations.AddIndex(
+            model_name='vaccinedata',
+            index=models.Index(fields=['country'], name='vaccine_vac_country_6430ca_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vaccinedata',
+            index=models.Index(fields=['date'], name='vaccine_vac_date_4262ac_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='seriessnapshot',
+            unique_together={('country', 'state_or_region')},
+        ),
+        migrations.RunPython(backfill_snapshots, migrations.RunPython.noop),
+    ]
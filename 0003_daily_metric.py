@@ -0,0 +1,66 @@
+# Generated by Django 5.0.1 on 2026-10-18 22:21
+
+from django.db import migrations, models
+
+
+def backfill_daily_metrics(apps, schema_editor):
+    """Calcula as métricas diárias para o histórico já existente"""
+    import pandas as pd
+    from vaccine.metrics import compute_daily_metrics
+
+    VaccineData = apps.get_model('vaccine', 'VaccineData')
+    SeriesSnapshot = apps.get_model('vaccine', 'SeriesSnapshot')
+    DailyMetric = apps.get_model('vaccine', 'DailyMetric')
+
+    incremental = set(
+        SeriesSnapshot.objects.filter(semantics='incremental').values_list('country', 'state_or_region')
+    )
+    columns = ['new_vaccinated', 'new_deaths', 'vaccinated_avg_7', 'deaths_avg_7',
+               'vaccinated_avg_14', 'deaths_avg_14']
+
+    for country in VaccineData.objects.values_list('country', flat=True).distinct().order_by():
+        records = list(VaccineData.objects.filter(country=country).order_by().values_list(
+            'state_or_region', 'date', 'vaccinated', 'deaths'
+        ))
+        df = pd.DataFrame.from_records(records, columns=['state_or_region', 'date', 'vaccinated', 'deaths'])
+        df['_incremental'] = [(country, state) in incremental for state in df['state_or_region']]
+
+        objects = []
+        for is_incremental, series in df.groupby('_incremental'):
+            metrics = compute_daily_metrics(series.drop(columns='_incremental'), cumulative=not is_incremental)
+            objects.extend(
+                DailyMetric(country=country, state_or_region=record['state_or_region'], date=record['date'],
+                            **{column: record[column] for column in columns})
+                for record in metrics.to_dict('records')
+            )
+        DailyMetric.objects.bulk_create(objects, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vaccine', '0002_series_snapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyMetric',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('country', models.CharField(max_length=100)),
+                ('state_or_region', models.CharField(blank=True, max_length=100, null=True)),
+                ('date', models.DateField()),
+                ('new_vaccinated', models.BigIntegerField(default=0)),
+                ('new_deaths', models.BigIntegerField(default=0)),
+                ('vaccinated_avg_7', models.FloatField(default=0)),
+                ('vaccinated_avg_14', models.FloatField(default=0)),
+                ('deaths_avg_7', models.FloatField(default=0)),
+                ('deaths_avg_14', models.FloatField(default=0)),
+            ],
+            options={
+                'ordering': ['date'],
+                'unique_together': {('country', 'state_or_region', 'date')},
+            },
+        ),
+        migrations.RunPython(backfill_daily_metrics, migrations.RunPython.noop),
+    ]
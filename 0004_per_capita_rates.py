@@ -0,0 +1,61 @@
+# Generated by Django 5.0.1 on 2026-10-18 22:22
+
+from django.db import migrations, models
+from django.db.models import F, FloatField
+from django.db.models.functions import Cast
+
+
+def backfill_rates(apps, schema_editor):
+    """Calcula as taxas per capita das linhas e snapshots existentes"""
+    VaccineData = apps.get_model('vaccine', 'VaccineData')
+    SeriesSnapshot = apps.get_model('vaccine', 'SeriesSnapshot')
+
+    rates = {
+        'vaccination_rate': Cast('vaccinated', FloatField()) * 100 / F('population'),
+        'death_rate': Cast('deaths', FloatField()) * 100000 / F('population'),
+    }
+    SeriesSnapshot.objects.filter(population__gt=0).update(**rates)
+
+    rows = VaccineData.objects.filter(population__gt=0)
+    for snapshot in SeriesSnapshot.objects.filter(semantics='incremental'):
+        rows = rows.exclude(country=snapshot.country, state_or_region=snapshot.state_or_region)
+    rows.update(**rates)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vaccine', '0003_daily_metric'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='seriessnapshot',
+            name='death_rate',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='seriessnapshot',
+            name='vaccination_rate',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='vaccinedata',
+            name='death_rate',
+            field=models.FloatField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='vaccinedata',
+            name='vaccination_rate',
+            field=models.FloatField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='seriessnapshot',
+            index=models.Index(fields=['country', 'vaccination_rate'], name='vaccine_ser_country_ae1e0e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='seriessnapshot',
+            index=models.Index(fields=['country', 'death_rate'], name='vaccine_ser_country_b4d895_idx'),
+        ),
+        migrations.RunPython(backfill_rates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.0.1 on 2026-10-18 22:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vaccine', '0005_data_change'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArtifactJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=50)),
+                ('key', models.CharField(max_length=64, unique=True)),
+                ('options', models.JSONField(default=dict)),
+                ('dataset_version', models.IntegerField(default=0)),
+                ('status', models.CharField(choices=[('pending', 'Na fila'), ('running', 'Gerando'), ('done', 'Pronto'), ('failed', 'Falhou')], db_index=True, default='pending', max_length=20)),
+                ('path', models.CharField(blank=True, max_length=500)),
+                ('size', models.BigIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
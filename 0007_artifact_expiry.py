@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-18 22:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vaccine', '0006_artifact_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='artifactjob',
+            name='expires_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
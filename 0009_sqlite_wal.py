@@ -0,0 +1,33 @@
+from django.db import migrations
+
+
+def enable_wal(apps, schema_editor):
+    """
+    Journal WAL no SQLite: leituras não esperam as escritas (ex.: o dashboard
+    e o acompanhamento de um upload enquanto a importação grava). A opção fica
+    gravada no arquivo do banco.
+    """
+    connection = schema_editor.connection
+    if connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode=WAL")
+
+
+def disable_wal(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode=DELETE")
+
+
+class Migration(migrations.Migration):
+    # journal_mode não pode mudar dentro de uma transação
+    atomic = False
+
+    dependencies = [
+        ('vaccine', '0008_upload_session'),
+    ]
+
+    operations = [
+        migrations.RunPython(enable_wal, disable_wal),
+    ]
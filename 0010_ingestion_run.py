@@ -0,0 +1,36 @@
+# Generated by Django 5.0.1 on 2026-10-19 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vaccine', '0009_sqlite_wal'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngestionRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=50)),
+                ('options', models.JSONField(default=dict)),
+                ('dry_run', models.BooleanField(default=False)),
+                ('status', models.CharField(choices=[('running', 'Em execução'), ('done', 'Concluída'), ('failed', 'Falhou')], db_index=True, default='running', max_length=20)),
+                ('rows_read', models.IntegerField(default=0)),
+                ('rows_inserted', models.IntegerField(default=0)),
+                ('rows_updated', models.IntegerField(default=0)),
+                ('rows_unchanged', models.IntegerField(default=0)),
+                ('stages', models.JSONField(default=dict)),
+                ('countries', models.JSONField(default=dict)),
+                ('dataset_version', models.IntegerField(blank=True, null=True)),
+                ('error', models.TextField(blank=True)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-started_at'],
+            },
+        ),
+    ]
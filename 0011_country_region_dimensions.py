@@ -0,0 +1,102 @@
+# Generated by Django 5.0.1 on 2026-10-19 00:36
+
+import vaccine.dimensions
+from django.db import migrations, models
+
+TABLES = ['VaccineData', 'DailyMetric']
+
+
+def _series(model):
+    return list(model.objects.values_list('country', 'state_or_region').distinct().order_by())
+
+
+def encode_dimensions(apps, schema_editor):
+    """
+    Cadastra os países e estados/regiões existentes (em ordem alfabética) e
+    troca os nomes pelos ids nas colunas ainda textuais; a conversão para
+    smallint vem em seguida, com AlterField. Uma atualização por série usa o
+    índice único (país, estado, data).
+    """
+    Country = apps.get_model('vaccine', 'Country')
+    Region = apps.get_model('vaccine', 'Region')
+    models_ = [apps.get_model('vaccine', name) for name in TABLES]
+
+    series = {model: _series(model) for model in models_}
+    names = {pair for pairs in series.values() for pair in pairs}
+    countries = {name: Country.objects.create(name=name).pk for name in sorted({country for country, _ in names})}
+    regions = {name: Region.objects.create(name=name).pk
+               for name in sorted({state for _, state in names if state is not None})}
+
+    for model, pairs in series.items():
+        for country, state in pairs:
+            model.objects.filter(country=country, state_or_region=state).update(
+                country=str(countries[country]),
+                state_or_region=None if state is None else str(regions[state]),
+            )
+
+
+def decode_dimensions(apps, schema_editor):
+    """Volta dos ids (já convertidos para texto) para os nomes"""
+    Country = apps.get_model('vaccine', 'Country')
+    Region = apps.get_model('vaccine', 'Region')
+    countries = {str(pk): name for pk, name in Country.objects.values_list('pk', 'name')}
+    regions = {str(pk): name for pk, name in Region.objects.values_list('pk', 'name')}
+
+    for name in TABLES:
+        model = apps.get_model('vaccine', name)
+        for country, state in _series(model):
+            model.objects.filter(country=country, state_or_region=state).update(
+                country=countries[country],
+                state_or_region=None if state is None else regions[state],
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vaccine', '0010_ingestion_run'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Country',
+            fields=[
+                ('id', models.SmallAutoField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=100, unique=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Region',
+            fields=[
+                ('id', models.SmallAutoField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=100, unique=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.RunPython(encode_dimensions, decode_dimensions),
+        migrations.AlterField(
+            model_name='dailymetric',
+            name='country',
+            field=vaccine.dimensions.DimensionField(to='vaccine.Country'),
+        ),
+        migrations.AlterField(
+            model_name='dailymetric',
+            name='state_or_region',
+            field=vaccine.dimensions.DimensionField(blank=True, null=True, to='vaccine.Region'),
+        ),
+        migrations.AlterField(
+            model_name='vaccinedata',
+            name='country',
+            field=vaccine.dimensions.DimensionField(to='vaccine.Country'),
+        ),
+        migrations.AlterField(
+            model_name='vaccinedata',
+            name='state_or_region',
+            field=vaccine.dimensions.DimensionField(blank=True, null=True, to='vaccine.Region'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+from django.db import migrations
+
+
+def recompute_daily_metrics(apps, schema_editor):
+    """
+    Regrava DailyMetric com o cálculo corrigido: o primeiro dia de cada série
+    não recebe mais o valor acumulado como variação, e valores ausentes (0)
+    não geram quedas e saltos falsos
+    """
+    import pandas as pd
+    from vaccine.metrics import compute_daily_metrics
+
+    VaccineData = apps.get_model('vaccine', 'VaccineData')
+    SeriesSnapshot = apps.get_model('vaccine', 'SeriesSnapshot')
+    DailyMetric = apps.get_model('vaccine', 'DailyMetric')
+
+    incremental = set(
+        SeriesSnapshot.objects.filter(semantics='incremental').values_list('country', 'state_or_region')
+    )
+    columns = ['new_vaccinated', 'new_deaths', 'vaccinated_avg_7', 'deaths_avg_7',
+               'vaccinated_avg_14', 'deaths_avg_14']
+
+    for country in VaccineData.objects.values_list('country', flat=True).distinct().order_by():
+        records = list(VaccineData.objects.filter(country=country).order_by().values_list(
+            'state_or_region', 'date', 'vaccinated', 'deaths'
+        ))
+        df = pd.DataFrame.from_records(records, columns=['state_or_region', 'date', 'vaccinated', 'deaths'])
+        df['_incremental'] = [(country, state) in incremental for state in df['state_or_region']]
+
+        objects = []
+        for is_incremental, series in df.groupby('_incremental'):
+            metrics = compute_daily_metrics(series.drop(columns='_incremental'), cumulative=not is_incremental)
+            objects.extend(
+                DailyMetric(country=country, state_or_region=record['state_or_region'], date=record['date'],
+                            **{column: record[column] for column in columns})
+                for record in metrics.to_dict('records')
+            )
+        DailyMetric.objects.filter(country=country).delete()
+        DailyMetric.objects.bulk_create(objects, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vaccine', '0011_country_region_dimensions'),
+    ]
+
+    operations = [
+        migrations.RunPython(recompute_daily_metrics, migrations.RunPython.noop),
+    ]
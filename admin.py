@@ -1,8 +1,36 @@
 from django.contrib import admin
-from .models import VaccineData
+from .models import VaccineData, SeriesSnapshot, ArtifactJob, IngestionRun, Country, Region
 
 @admin.register(VaccineData)
 class VaccineDataAdmin(admin.ModelAdmin):
     list_display = ["country", "state_or_region", "date", "vaccinated", "deaths"]
     list_filter = ["country", "date"]
     search_fields = ["state_or_region"]
+
+    def get_search_results(self, request, queryset, search_term):
+        # state_or_region guarda o id da região: a busca por trecho é feita na dimensão
+        if not search_term:
+            return queryset, False
+        names = Region.objects.filter(name__icontains=search_term).values_list("name", flat=True)
+        return queryset.filter(state_or_region__in=list(names)), False
+
+@admin.register(Country, Region)
+class DimensionAdmin(admin.ModelAdmin):
+    list_display = ["id", "name"]
+    search_fields = ["name"]
+
+@admin.register(SeriesSnapshot)
+class SeriesSnapshotAdmin(admin.ModelAdmin):
+    list_display = ["country", "state_or_region", "source", "semantics", "last_date", "vaccinated", "deaths"]
+    list_filter = ["country", "source", "semantics"]
+    search_fields = ["state_or_region"]
+
+@admin.register(ArtifactJob)
+class ArtifactJobAdmin(admin.ModelAdmin):
+    list_display = ["kind", "dataset_version", "status", "size", "created_at", "updated_at"]
+    list_filter = ["kind", "status"]
+
+@admin.register(IngestionRun)
+class IngestionRunAdmin(admin.ModelAdmin):
+    list_display = ["source", "status", "dry_run", "rows_read", "rows_inserted", "rows_updated", "started_at", "finished_at"]
+    list_filter = ["source", "status", "dry_run"]
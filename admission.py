@@ -0,0 +1,204 @@
+"""
+Controle de admissão dos endpoints caros (relatórios, exportações e importações)
+
+Cada endpoint limitado tem `concurrency` vagas de execução e `queue` vagas de
+espera, compartilhadas por todos os workers do servidor. As vagas são
+arquivos em ADMISSION_DIR travados com flock: o kernel libera a trava se o
+processo morrer, então um worker reciclado ou derrubado não deixa vagas
+presas.
+
+Uma requisição ocupa uma vaga de execução livre; se não houver, ocupa uma
+vaga de espera e tenta de novo até `timeout` segundos. Sem vaga de espera a
+resposta é 429 imediata; esgotado o tempo de espera, 503. As duas trazem
+Retry-After, estimado a partir da duração média das execuções. Assim alguns
+cliques repetidos em "exportar" não ocupam todos os workers e os endpoints
+JSON continuam respondendo.
+
+Contadores (admitidas, recusadas, duração) ficam em um arquivo JSON
+atualizado sob flock e são expostos em /api/metrics/ junto com as vagas em
+uso no momento.
+
+Sem fcntl (Windows, desenvolvimento local com um único processo) os limites
+não são aplicados.
+"""
+import json
+import math
+import time
+from functools import wraps
+from pathlib import Path
+from typing import Dict
+from django.conf import settings
+from django.http import JsonResponse
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+ADMISSION_DIR = Path(getattr(settings, "ADMISSION_DIR", settings.BASE_DIR / "run" / "admission"))
+# Vagas de execução, vagas de espera e espera máxima (s) por endpoint
+DEFAULT_LIMITS = {
+    "export_powerpoint": {"concurrency": 2, "queue": 4, "timeout": 5},
+    "export_csv": {"concurrency": 2, "queue": 4, "timeout": 5},
+    "export_xlsx": {"concurrency": 2, "queue": 4, "timeout": 5},
+    "upload_csv": {"concurrency": 2, "queue": 4, "timeout": 10},
+}
+LIMITS = {**DEFAULT_LIMITS, **getattr(settings, "ADMISSION_LIMITS", {})}
+POLL_INTERVAL = 0.05  # segundos entre tentativas de uma requisição na fila
+DEFAULT_RETRY_AFTER = 5  # segundos, antes de haver durações medidas
+
+COUNTERS = ("admitted", "queued", "rejected_queue_full", "rejected_timeout", "completed", "duration_ms")
+
+
+class Rejected(Exception):
+    """Requisição recusada pelo controle de admissão"""
+
+    def __init__(self, status: int, message: str, retry_after: int):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+def _slot_path(name: str, kind: str, index: int) -> Path:
+    return ADMISSION_DIR / f"{name}.{kind}.{index}"
+
+
+def _try_lock(name: str, kind: str, count: int):
+    """Trava a primeira vaga livre (arquivo aberto) ou retorna None"""
+    for index in range(count):
+        # Um open por tentativa: travas flock são por descrição de arquivo,
+        # então threads do mesmo processo não podem compartilhar o descritor
+        handle = open(_slot_path(name, kind, index), "a")
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return handle
+        except BlockingIOError:
+            handle.close()
+    return None
+
+
+def _busy(name: str, kind: str, count: int) -> int:
+    """Vagas ocupadas no momento (sonda cada trava sem bloquear)"""
+    busy = 0
+    for index in range(count):
+        path = _slot_path(name, kind, index)
+        if not path.exists():
+            continue
+        with open(path, "a") as handle:
+            try:
+                fcntl.flock(handle, fcntl.LOCK_SH | fcntl.LOCK_NB)
+            except BlockingIOError:
+                busy += 1
+    return busy
+
+
+def _update_counters(name: str, **increments) -> Dict:
+    """Soma os incrementos aos contadores do endpoint e retorna os valores atuais"""
+    with open(ADMISSION_DIR / "counters.json", "a+") as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        handle.seek(0)
+        data = json.loads(handle.read() or "{}")
+        counters = data.setdefault(name, dict.fromkeys(COUNTERS, 0))
+        for counter, value in increments.items():
+            counters[counter] = counters.get(counter, 0) + value
+        handle.seek(0)
+        handle.truncate()
+        handle.write(json.dumps(data))
+        return counters
+
+
+def _read_counters() -> Dict:
+    path = ADMISSION_DIR / "counters.json"
+    if not path.exists():
+        return {}
+    with open(path) as handle:
+        fcntl.flock(handle, fcntl.LOCK_SH)
+        return json.loads(handle.read() or "{}")
+
+
+def _retry_after(name: str, counters: Dict) -> int:
+    """Estimativa de quando uma vaga deve abrir: duração média x fila por vaga"""
+    if not counters.get("completed"):
+        return DEFAULT_RETRY_AFTER
+    limit = LIMITS[name]
+    average = counters["duration_ms"] / counters["completed"] / 1000
+    return max(1, math.ceil(average * (limit["queue"] + limit["concurrency"]) / limit["concurrency"]))
+
+
+def acquire(name: str):
+    """Ocupa uma vaga de execução de `name` (aguardando na fila se preciso) ou levanta Rejected"""
+    limit = LIMITS[name]
+    ADMISSION_DIR.mkdir(parents=True, exist_ok=True)
+
+    slot = _try_lock(name, "run", limit["concurrency"])
+    if slot is not None:
+        _update_counters(name, admitted=1)
+        return slot
+
+    waiting = _try_lock(name, "wait", limit["queue"])
+    if waiting is None:
+        counters = _update_counters(name, rejected_queue_full=1)
+        raise Rejected(429, "Muitas requisições simultâneas; tente novamente em instantes",
+                       _retry_after(name, counters))
+    try:
+        deadline = time.monotonic() + limit["timeout"]
+        while time.monotonic() < deadline:
+            time.sleep(POLL_INTERVAL)
+            slot = _try_lock(name, "run", limit["concurrency"])
+            if slot is not None:
+                _update_counters(name, admitted=1, queued=1)
+                return slot
+    finally:
+        waiting.close()
+
+    counters = _update_counters(name, rejected_timeout=1)
+    raise Rejected(503, "Servidor ocupado; tente novamente em instantes", _retry_after(name, counters))
+
+
+def release(name: str, slot, started: float) -> None:
+    slot.close()  # fechar o arquivo libera a trava
+    _update_counters(name, completed=1, duration_ms=round((time.perf_counter() - started) * 1000))
+
+
+def limit_concurrency(name: str):
+    """
+    Aplica os limites de LIMITS[name] a uma view. Deve ficar acima de
+    @api_view, para que a recusa não passe pelo DRF nem leia o corpo.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if fcntl is None:
+                return view(request, *args, **kwargs)
+            try:
+                slot = acquire(name)
+            except Rejected as e:
+                response = JsonResponse({"error": str(e), "retry_after": e.retry_after}, status=e.status)
+                response["Retry-After"] = str(e.retry_after)
+                return response
+
+            started = time.perf_counter()
+            try:
+                return view(request, *args, **kwargs)
+            finally:
+                release(name, slot, started)
+        return wrapper
+    return decorator
+
+
+def admission_metrics() -> Dict[str, Dict]:
+    """Vagas em uso e contadores de cada endpoint limitado (compartilhados entre workers)"""
+    if fcntl is None:
+        return {}
+    counters = _read_counters()
+    metrics = {}
+    for name, limit in LIMITS.items():
+        values = {**dict.fromkeys(COUNTERS, 0), **counters.get(name, {})}
+        metrics[name] = {
+            **limit,
+            "running": _busy(name, "run", limit["concurrency"]),
+            "waiting": _busy(name, "wait", limit["queue"]),
+            **{counter: values[counter] for counter in COUNTERS if counter != "duration_ms"},
+            "avg_duration_ms": round(values["duration_ms"] / values["completed"]) if values["completed"] else None,
+        }
+    return metrics
@@ -0,0 +1,292 @@
+"""
+Agregados do dashboard em arquivos NumPy mapeados em memória
+
+Após cada alteração dos dados, publish_aggregates grava uma versão nova dos
+agregados lidos pelo dashboard em um diretório de AGGREGATES_DIR, um arquivo
+.npy por coluna:
+
+- raw: série por (país, data) como em chart-data (date, vaccinated, deaths)
+- metrics: métricas diárias somadas por (país, data) (DailyMetric)
+- states: última leitura por (país, estado/região) (SeriesSnapshot)
+
+As linhas de cada tabela ficam agrupadas por país e index.json guarda o
+intervalo de cada país. O arquivo CURRENT aponta para a versão publicada e é
+trocado atomicamente (os.replace) depois que a versão está completa.
+
+Os workers abrem os arquivos com np.load(mmap_mode="r"): as páginas vêm do
+page cache do sistema, compartilhadas entre todos os processos, então a
+memória não cresce com o número de workers. A cada leitura o worker confere
+CURRENT (um stat) e passa a usar a nova versão quando ela aparece; a versão
+anterior continua válida para as leituras em andamento. Enquanto nenhuma
+versão foi publicada, as consultas usam o banco.
+"""
+import json
+import os
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+from django.conf import settings
+from django.db.models import Sum
+from .models import DailyMetric, SeriesSnapshot, VaccineData
+
+if TYPE_CHECKING:
+    import numpy as np
+
+AGGREGATES_DIR = Path(getattr(settings, "AGGREGATES_DIR", settings.BASE_DIR / "aggregates"))
+POINTER = "CURRENT"
+KEEP_VERSIONS = 3  # versões anteriores mantidas para leituras em andamento
+
+# Colunas e tipos de cada tabela (linhas agrupadas por país)
+TABLES = {
+    "raw": {
+        "date": "datetime64[D]", "vaccinated": "int64", "deaths": "int64",
+    },
+    "metrics": {
+        "date": "datetime64[D]", "new_vaccinated": "int64", "new_deaths": "int64",
+        "vaccinated_avg_7": "float64", "deaths_avg_7": "float64",
+        "vaccinated_avg_14": "float64", "deaths_avg_14": "float64",
+    },
+    "states": {
+        "last_date": "datetime64[D]", "vaccinated": "int64", "deaths": "int64",
+        "population": "int64", "vaccination_rate": "float64", "death_rate": "float64",
+    },
+}
+NULLABLE = {"vaccination_rate", "death_rate"}  # None gravado como NaN
+
+_lock = threading.Lock()
+_current: Optional[Tuple[Tuple[int, int], "AggregateSnapshot"]] = None
+
+
+class AggregateSnapshot:
+    """Uma versão publicada, com as colunas mapeadas (somente leitura)"""
+
+    def __init__(self, path: Path):
+        import numpy as np
+
+        self.path = path
+        self.index = json.loads((path / "index.json").read_text())
+        self.version = self.index["version"]
+        self.columns = {
+            table: {column: np.load(path / f"{table}.{column}.npy", mmap_mode="r") for column in columns}
+            for table, columns in TABLES.items()
+        }
+
+    @property
+    def countries(self) -> List[str]:
+        return list(self.index["countries"])
+
+    def rows(self, table: str, country: str) -> Dict[str, "np.ndarray"]:
+        """Colunas de um país (fatias das colunas mapeadas, sem cópia)"""
+        start, end = self.index["countries"].get(country, {}).get(table, (0, 0))
+        return {column: values[start:end] for column, values in self.columns[table].items()}
+
+    def state_names(self, country: str) -> List[Optional[str]]:
+        return self.index["countries"].get(country, {}).get("state_names", [])
+
+
+def current_snapshot() -> Optional[AggregateSnapshot]:
+    """Versão publicada mais recente, ou None se ainda não há agregados"""
+    global _current
+    pointer = AGGREGATES_DIR / POINTER
+    try:
+        stat = os.stat(pointer)
+    except FileNotFoundError:
+        _current = None
+        return None
+
+    key = (stat.st_ino, stat.st_mtime_ns)
+    cached = _current
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    with _lock:
+        if _current is None or _current[0] != key:
+            try:
+                snapshot = AggregateSnapshot(AGGREGATES_DIR / pointer.read_text().strip())
+            except FileNotFoundError:
+                # CURRENT trocado durante a leitura: fica com a versão anterior
+                return _current[1] if _current is not None else None
+            _current = (key, snapshot)
+        return _current[1]
+
+
+def _nullable(values: "np.ndarray") -> List[Optional[float]]:
+    return [None if value != value else value for value in values.tolist()]
+
+
+def snapshot_rows(countries: Iterable[str]) -> Optional[List[Dict]]:
+    """Mesmo formato de snapshots.load_snapshots, lido dos agregados publicados"""
+    snapshot = current_snapshot()
+    if snapshot is None:
+        return None
+
+    rows = []
+    for country in dict.fromkeys(countries):
+        columns = snapshot.rows("states", country)
+        values = {
+            column: _nullable(array) if column in NULLABLE else array.tolist()
+            for column, array in columns.items()
+        }
+        for position, state in enumerate(snapshot.state_names(country)):
+            rows.append({
+                "country": country,
+                "state_or_region": state,
+                **{column: values[column][position] for column in TABLES["states"]},
+            })
+    return rows
+
+
+def raw_series(country: str) -> Optional[List[Dict]]:
+    """Série de chart-data (metric=raw) lida dos agregados publicados"""
+    snapshot = current_snapshot()
+    if snapshot is None:
+        return None
+    columns = snapshot.rows("raw", country)
+    return [
+        {"date": day, "vaccinated": vaccinated, "deaths": deaths}
+        for day, vaccinated, deaths in zip(
+            columns["date"].tolist(), columns["vaccinated"].tolist(), columns["deaths"].tolist()
+        )
+    ]
+
+
+def metric_series(country: str, vaccinated_field: str, deaths_field: str) -> Optional[List[Dict]]:
+    """Série diária de uma métrica derivada lida dos agregados publicados"""
+    import numpy as np
+
+    snapshot = current_snapshot()
+    if snapshot is None:
+        return None
+    columns = snapshot.rows("metrics", country)
+
+    def rounded(values):
+        # Colunas inteiras (variação diária) seguem inteiras, como no banco
+        return np.round(values, 2).tolist() if values.dtype.kind == "f" else values.tolist()
+
+    return [
+        {"date": day, "vaccinated": vaccinated, "deaths": deaths}
+        for day, vaccinated, deaths in zip(
+            columns["date"].tolist(), rounded(columns[vaccinated_field]), rounded(columns[deaths_field])
+        )
+    ]
+
+
+def _query_country(country: str) -> Tuple[Dict[str, List[tuple]], List[Optional[str]]]:
+    """Linhas das três tabelas de um país, lidas do banco"""
+    metric_columns = [column for column in TABLES["metrics"] if column != "date"]
+    states = list(SeriesSnapshot.objects.filter(country=country).order_by("id").values_list(
+        "state_or_region", *TABLES["states"]
+    ))
+    tables = {
+        "raw": list(VaccineData.objects.filter(country=country).order_by(
+            "date", "vaccinated", "deaths"
+        ).values_list("date", "vaccinated", "deaths").distinct()),
+        "metrics": list(DailyMetric.objects.filter(country=country).values("date").annotate(
+            **{f"total_{column}": Sum(column) for column in metric_columns}
+        ).order_by("date").values_list("date", *(f"total_{column}" for column in metric_columns))),
+        "states": [row[1:] for row in states],
+    }
+    return tables, [row[0] for row in states]
+
+
+def _all_countries() -> List[str]:
+    return sorted({
+        country for model in (VaccineData, SeriesSnapshot, DailyMetric)
+        for country in model.objects.order_by().values_list("country", flat=True).distinct()
+    })
+
+
+def _lock_file():
+    """Serializa publicações concorrentes (ingestões em processos diferentes)"""
+    handle = open(AGGREGATES_DIR / ".lock", "a")
+    try:
+        import fcntl
+    except ImportError:  # Windows (desenvolvimento local, um único processo)
+        return handle
+    fcntl.flock(handle, fcntl.LOCK_EX)
+    return handle
+
+
+def publish_aggregates(countries: Optional[Iterable[str]] = None) -> Path:
+    """
+    Publica uma nova versão dos agregados. Os países em `countries` são
+    relidos do banco e os demais copiados da versão atual; sem `countries`
+    (ou sem versão publicada) todos os países são relidos.
+    """
+    import numpy as np
+    from .events import dataset_version
+
+    AGGREGATES_DIR.mkdir(parents=True, exist_ok=True)
+    with _lock_file():
+        previous = current_snapshot()
+        if countries is None or previous is None:
+            changed = set(_all_countries())
+            kept = []
+        else:
+            changed = set(countries)
+            kept = [country for country in previous.countries if country not in changed]
+        # Lida dentro do lock: o conteúdo publicado é pelo menos desta versão (a
+        # alteração sendo publicada só é registrada depois, em vaccine.derived)
+        version = dataset_version()
+
+        fresh = {country: _query_country(country) for country in sorted(changed)}
+        index = {"version": version, "countries": {}}
+        parts = {table: {column: [] for column in columns} for table, columns in TABLES.items()}
+        offsets = {table: 0 for table in TABLES}
+
+        for country in sorted(set(kept) | set(fresh)):
+            entry = {}
+            if country in fresh:
+                tables, entry["state_names"] = fresh[country]
+                if not any(tables.values()):
+                    continue  # país removido
+                for table, columns in TABLES.items():
+                    values = list(zip(*tables[table])) or [()] * len(columns)
+                    for (column, dtype), column_values in zip(columns.items(), values):
+                        if column in NULLABLE:
+                            column_values = [np.nan if value is None else value for value in column_values]
+                        parts[table][column].append(np.array(column_values, dtype=dtype))
+            else:
+                entry["state_names"] = previous.state_names(country)
+                for table in TABLES:
+                    for column, values in previous.rows(table, country).items():
+                        parts[table][column].append(values)
+
+            for table in TABLES:
+                size = len(parts[table][next(iter(TABLES[table]))][-1])
+                entry[table] = (offsets[table], offsets[table] + size)
+                offsets[table] += size
+            index["countries"][country] = entry
+
+        partial = Path(tempfile.mkdtemp(prefix=".partial-", dir=AGGREGATES_DIR))
+        try:
+            for table, columns in TABLES.items():
+                for column, dtype in columns.items():
+                    values = np.concatenate(parts[table][column]) if parts[table][column] else np.array([], dtype=dtype)
+                    np.save(partial / f"{table}.{column}.npy", values.astype(dtype, copy=False))
+            (partial / "index.json").write_text(json.dumps(index))
+            # Nome único: uma versão em uso por algum worker nunca é sobrescrita
+            target = AGGREGATES_DIR / f"v{version}{partial.name[len('.partial'):]}"
+            os.rename(partial, target)
+        except BaseException:
+            shutil.rmtree(partial, ignore_errors=True)
+            raise
+
+        pointer = AGGREGATES_DIR / f".{POINTER}.tmp"
+        pointer.write_text(target.name)
+        os.replace(pointer, AGGREGATES_DIR / POINTER)
+        _remove_old_versions(target.name)
+    return target
+
+
+def _remove_old_versions(current: str) -> None:
+    """Apaga versões antigas (arquivos ainda mapeados seguem válidos até serem liberados)"""
+    versions = sorted(
+        (path for path in AGGREGATES_DIR.glob("v*") if path.is_dir()),
+        key=lambda path: path.stat().st_mtime_ns,
+    )
+    for path in versions[:-KEEP_VERSIONS]:
+        if path.name != current:
+            shutil.rmtree(path, ignore_errors=True)
@@ -0,0 +1,113 @@
+"""
+Benchmark da memória dos workers: agregados mapeados em memória x cópia por worker
+
+Gera uma versão sintética dos agregados (vaccine.aggregates) com --rows
+linhas em um diretório temporário e inicia 1, 2, 4... processos que, como os
+workers do gunicorn, leem todas as colunas:
+
+- mmap: np.load(mmap_mode="r"), como em produção (páginas compartilhadas)
+- cópia: cada processo carrega os arrays na própria memória (um cache por worker)
+
+Para cada quantidade de workers, mostra a soma do PSS (memória proporcional:
+páginas compartilhadas divididas entre os processos) e da memória privada,
+lidas de /proc/<pid>/smaps_rollup (Linux).
+
+Uso:
+    python scripts/benchmark_aggregates.py
+    python scripts/benchmark_aggregates.py --rows 5000000 --workers 1 2 4 8
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+import django
+django.setup()
+
+import numpy as np
+from vaccine.aggregates import TABLES, AggregateSnapshot
+
+COUNTRIES = ["brasil", "portugal", "italia", "usa"]
+
+
+def synthetic_snapshot(path: Path, rows: int) -> None:
+    """Versão dos agregados com `rows` linhas por tabela, divididas entre os países"""
+    index = {"version": 0, "countries": {}}
+    per_country = rows // len(COUNTRIES)
+    for position, country in enumerate(COUNTRIES):
+        bounds = (position * per_country, (position + 1) * per_country)
+        # Sem nomes de estados: só as colunas numéricas ficam nos arquivos mapeados
+        index["countries"][country] = {"state_names": [], **{table: bounds for table in TABLES}}
+    total = per_country * len(COUNTRIES)
+    for table, columns in TABLES.items():
+        for column, dtype in columns.items():
+            if dtype.startswith("datetime64"):
+                values = np.datetime64("2021-01-01") + np.arange(total) % 1000
+            else:
+                values = np.arange(total).astype(dtype)
+            np.save(path / f"{table}.{column}.npy", values.astype(dtype))
+    (path / "index.json").write_text(json.dumps(index))
+
+
+def memory_kb() -> dict:
+    values = {}
+    with open("/proc/self/smaps_rollup") as smaps:
+        for line in smaps:
+            name, _, rest = line.partition(":")
+            if rest.strip().endswith("kB"):
+                values[name] = int(rest.split()[0])
+    return values
+
+
+def worker(path: str, mode: str, ready, done) -> None:
+    snapshot = AggregateSnapshot(Path(path))
+    columns = [values for table in snapshot.columns.values() for values in table.values()]
+    if mode == "cópia":
+        columns = [np.array(values) for values in columns]
+    # Lê todas as páginas, como as consultas de um worker ao longo do tempo
+    for values in columns:
+        values.view(np.int64).sum() if values.dtype.kind == "M" else values.sum()
+    memory = memory_kb()
+    ready.put((memory["Pss"], memory["Private_Clean"] + memory["Private_Dirty"]))
+    done.wait()
+
+
+def measure(path: str, mode: str, workers: int):
+    context = multiprocessing.get_context("fork")
+    ready, done = context.Queue(), context.Event()
+    processes = [context.Process(target=worker, args=(path, mode, ready, done)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    # Mede com todos os processos vivos (o PSS depende de quantos compartilham as páginas)
+    results = [ready.get() for _ in processes]
+    done.set()
+    for process in processes:
+        process.join()
+    return sum(pss for pss, _ in results) / 1024, sum(private for _, private in results) / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de memória dos agregados mapeados")
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        synthetic_snapshot(Path(directory), args.rows)
+        size = sum(file.stat().st_size for file in Path(directory).iterdir()) / 1024 / 1024
+        print(f"{args.rows:,} linhas por tabela, {size:.0f} MB em disco\n")
+        print("modo    workers   PSS total (MB)   privada total (MB)")
+        for mode in ("mmap", "cópia"):
+            for workers in args.workers:
+                pss, private = measure(directory, mode, workers)
+                print(f"{mode:<7} {workers:>7}   {pss:>14.0f}   {private:>18.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Verificação dos conectores HTTP da ingestão (vaccine.connectors) contra o
+servidor local de fixtures (scripts/fixture_server.py), sem acesso à rede:
+
+1. OWID: o arquivo de fixture é interpretado (países, linhas, entradas
+   malformadas ignoradas) e uma ingestão --dry-run completa passa por ele
+2. Feeds CSV e JSON, com estado declarado no feed ou por linha
+3. Novas tentativas: 503 nas primeiras requisições e 429 com Retry-After
+4. Erros definitivos (404) não são repetidos
+5. Timeout de leitura e falha parcial: o endpoint lento vira aviso e os
+   demais seguem; se todos falham, IngestionError
+6. Limite por host: --endpoints endpoints com --delay s de atraso nunca têm
+   mais que --max-per-host requisições simultâneas, e o tempo total cai em
+   relação à busca sequencial
+
+Código de saída 1 se alguma verificação falhar.
+
+Uso:
+    python scripts/benchmark_connectors.py
+    python scripts/benchmark_connectors.py --root fixtures/connectors --endpoints 24 --max-per-host 6
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import fixture_server
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+DEFAULT_ROOT = Path(__file__).resolve().parent.parent / "fixtures" / "connectors"
+
+
+class Checks:
+    def __init__(self):
+        self.failed = []
+
+    def __call__(self, label: str, ok: bool, detail: str = "") -> None:
+        print(f"   {'OK    ' if ok else 'FALHOU'} {label}{f' ({detail})' if detail else ''}")
+        if not ok:
+            self.failed.append(label)
+
+
+def feed(base: str, path: str, country: str = "brasil", state: str = None, format: str = "csv") -> dict:
+    return {"url": f"{base}{path}", "country": country, "state": state, "format": format}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verificação dos conectores HTTP com um servidor local")
+    parser.add_argument("--root", default=str(DEFAULT_ROOT), help="diretório das fixtures")
+    parser.add_argument("--endpoints", type=int, default=12, help="endpoints da medição do limite por host")
+    parser.add_argument("--max-per-host", type=int, default=4)
+    parser.add_argument("--delay", type=float, default=0.3, help="atraso de cada endpoint (s)")
+    args = parser.parse_args()
+
+    server = fixture_server.start(args.root)
+    base = f"http://127.0.0.1:{server.server_port}"
+    # Antes de django.setup: a fonte owid passa a apontar para o servidor local
+    # e os downloads vão para um cache temporário
+    os.environ["CONNECTOR_BASE_URLS"] = json.dumps({"owid": base})
+    os.environ["DOWNLOAD_CACHE_DIR"] = tempfile.mkdtemp(prefix="connectors-cache-")
+
+    import django
+    django.setup()
+    from vaccine.connectors import FeedConnector, HttpClient, IngestionError, OwidConnector
+    from vaccine.ingestion import run_ingestion
+
+    check = Checks()
+    fast = dict(backoff=0.05)  # backoff curto para a verificação ser rápida
+
+    print(f"Servidor de fixtures em {base} ({server.root})\n")
+
+    print("1. OWID")
+    source = OwidConnector()
+    raw = source.fetch(source.countries, client=HttpClient(**fast))
+    counts = {country: len(source.parse(raw, country)) for country in source.countries}
+    check("todos os países com 30 linhas", set(counts.values()) == {30}, str(counts))
+    check("arquivo baixado uma vez para todos os países", server.stats()["total"] == 1)
+    run = run_ingestion("owid", dry_run=True)
+    check("ingestão --dry-run pelo servidor local", run.rows_read == 120 and run.status == run.DONE,
+          f"{run.rows_read} linhas lidas, etapas {run.stages}")
+
+    print("\n2. Feeds CSV e JSON")
+    source = FeedConnector(json.load(open(Path(args.root) / "feeds.json")))
+    source.feeds = [{**item, "url": item["url"].replace("http://127.0.0.1:8800", base)} for item in source.feeds]
+    raw = source.fetch(source.countries, client=HttpClient(**fast))
+    states = {country: sorted({row[0] for row in source.parse(raw, country)}) for country in source.countries}
+    rows = sum(len(source.parse(raw, country)) for country in source.countries)
+    check("linhas de todos os feeds", rows == 120, f"{rows} linhas")
+    check("estado do feed e estado por linha",
+          states == {"brasil": ["Rio de Janeiro", "São Paulo"], "portugal": ["Lisboa", "Porto"]}, str(states))
+
+    print("\n3. Novas tentativas")
+    server.reset()
+    client = HttpClient(**fast)
+    started = time.perf_counter()
+    source = FeedConnector([feed(base, "/feeds/sp.csv?fail=2", state="São Paulo"),
+                            feed(base, "/feeds/rj.json?throttle=1", state="Rio de Janeiro", format="json")])
+    raw = source.fetch(["brasil"], client=client)
+    elapsed = time.perf_counter() - started
+    requests_seen = server.stats()["requests"]
+    check("503 repetido até a resposta válida", requests_seen.get("/feeds/sp.csv?fail=2") == 3)
+    check("429 respeita Retry-After", requests_seen.get("/feeds/rj.json?throttle=1") == 2 and elapsed >= 1,
+          f"{elapsed:.2f} s")
+    check("nenhum aviso", not source.warnings and len(source.parse(raw, "brasil")) == 60)
+
+    print("\n4. Erros definitivos")
+    server.reset()
+    source = FeedConnector([feed(base, "/feeds/sp.csv", state="São Paulo"),
+                            feed(base, "/feeds/inexistente.csv", state="Bahia")])
+    raw = source.fetch(["brasil"], client=HttpClient(**fast))
+    check("404 sem novas tentativas", server.stats()["requests"].get("/feeds/inexistente.csv") == 1)
+    check("404 vira aviso e o outro feed segue", len(source.warnings) == 1 and len(source.parse(raw, "brasil")) == 30,
+          source.warnings[0] if source.warnings else "")
+
+    print("\n5. Timeouts e falhas parciais")
+    server.reset()
+    source = FeedConnector([feed(base, "/feeds/sp.csv", state="São Paulo"),
+                            feed(base, "/feeds/rj.json?delay=1", state="Rio de Janeiro", format="json")])
+    raw = source.fetch(["brasil"], client=HttpClient(timeout=(1, 0.3), retries=1, **fast))
+    check("timeout de leitura repetido e registrado como aviso",
+          server.stats()["requests"].get("/feeds/rj.json?delay=1") == 2 and len(source.warnings) == 1,
+          source.warnings[0] if source.warnings else "")
+    check("feed que respondeu foi interpretado", len(source.parse(raw, "brasil")) == 30)
+    source = FeedConnector([feed(base, "/feeds/sp.csv?status=500", state="São Paulo")])
+    try:
+        source.fetch(["brasil"], client=HttpClient(retries=1, **fast))
+        check("todos os endpoints falhando levantam IngestionError", False)
+    except IngestionError as e:
+        check("todos os endpoints falhando levantam IngestionError", True, str(e))
+
+    print(f"\n6. Limite por host ({args.endpoints} endpoints de {args.delay * 1000:.0f} ms)")
+    feeds = [feed(base, f"/feeds/sp.csv?delay={args.delay}&n={i}", state=f"Estado {i}")
+             for i in range(args.endpoints)]
+    timings = {}
+    for label, max_per_host in (("sequencial", 1), ("concorrente", args.max_per_host)):
+        server.reset()
+        source = FeedConnector(feeds)
+        started = time.perf_counter()
+        raw = source.fetch(["brasil"], client=HttpClient(max_per_host=max_per_host, **fast))
+        timings[label] = time.perf_counter() - started
+        stats = server.stats()
+        print(f"   {label:<12} max_per_host={max_per_host:<3} simultâneas no servidor={stats['max_concurrent']:<3} "
+              f"{timings[label] * 1000:>6.0f} ms")
+        check(f"{label}: limite por host respeitado", stats["max_concurrent"] <= max_per_host)
+        check(f"{label}: todas as linhas", len(source.parse(raw, "brasil")) == 30 * args.endpoints)
+    check("busca concorrente mais rápida", timings["concorrente"] < timings["sequencial"] / 2,
+          f"{timings['sequencial'] / timings['concorrente']:.1f}x")
+
+    server.shutdown()
+    print(f"\n{'Todas as verificações passaram' if not check.failed else f'{len(check.failed)} falha(s)'}")
+    sys.exit(1 if check.failed else 0)
+
+
+if __name__ == "__main__":
+    main()
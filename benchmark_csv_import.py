@@ -0,0 +1,128 @@
+"""
+Benchmark da importação de CSV: importador linha a linha x validação vetorizada
+
+Gera um CSV sintético (com uma fração de linhas inválidas e duplicadas) e
+mede as linhas por segundo de:
+
+- legado: csv.DictReader + int() + save() por linha (o upload_csv anterior)
+- vetorizado: vaccine.imports.import_csv (pandas em blocos + bulk upsert)
+- só validação: read_chunks + validate_chunk, sem gravar no banco
+
+Os registros são gravados em um país próprio (BENCH_COUNTRY), removido ao final.
+
+Uso:
+    python scripts/benchmark_csv_import.py                     # 20 mil linhas
+    python scripts/benchmark_csv_import.py --rows 200000 --skip-legacy
+"""
+import argparse
+import csv
+import io
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+import django
+django.setup()
+
+from vaccine.models import VaccineData, SeriesSnapshot, DailyMetric
+from vaccine.aggregates import publish_aggregates
+from vaccine.derived import refresh_derived_data
+from vaccine.imports import DuplicateTracker, import_csv, read_chunks, validate_chunk
+
+BENCH_COUNTRY = "benchmark_csv"
+ERROR_EVERY = 100  # uma linha inválida e uma duplicada a cada N linhas
+
+
+def synthetic_csv(rows: int, states: int = 27) -> str:
+    """CSV no formato do upload, com erros de tipo e duplicatas espalhados"""
+    # Mais estados para arquivos grandes, mantendo as datas no passado
+    states = max(states, -(-rows // 1500))
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(["date", "state_or_region", "vaccinated", "deaths", "population"])
+    start = date(2021, 1, 1)
+    for i in range(rows):
+        state, day = f"Estado {i % states}", start + timedelta(days=i // states)
+        if i % ERROR_EVERY == 1:
+            writer.writerow([day, state, "n/a", i // 50, 10_000_000])
+        elif i % ERROR_EVERY == 2:
+            # Repete a linha anterior do mesmo estado
+            writer.writerow([start + timedelta(days=max(i - states, 0) // states), state, i, i // 50, 10_000_000])
+        else:
+            writer.writerow([day, state, i, i // 50, 10_000_000])
+    return output.getvalue()
+
+
+def legacy_import(content: str, country: str) -> int:
+    """Importador anterior: uma conversão e um INSERT por linha"""
+    imported, states, dates = 0, set(), set()
+    for row in csv.DictReader(io.StringIO(content)):
+        try:
+            VaccineData(
+                country=country,
+                state_or_region=row.get("state_or_region", "Nacional"),
+                date=row["date"],
+                vaccinated=int(row.get("vaccinated", 0)),
+                deaths=int(row.get("deaths", 0)),
+                population=int(row.get("population", 0)),
+            ).save()
+            imported += 1
+            states.add(row.get("state_or_region", "Nacional"))
+            dates.add(row["date"])
+        except Exception:
+            continue
+    refresh_derived_data(country, source="csv", states=states, since=date.fromisoformat(min(dates)))
+    return imported
+
+
+def validate_only(content: str) -> int:
+    duplicates = DuplicateTracker()
+    valid, line = 0, 2
+    for chunk in read_chunks(io.StringIO(content)):
+        clean, _ = validate_chunk(chunk, line, duplicates)
+        line += len(chunk)
+        valid += len(clean)
+    return valid
+
+
+def cleanup():
+    for model in (VaccineData, SeriesSnapshot, DailyMetric):
+        model.objects.filter(country=BENCH_COUNTRY).delete()
+    publish_aggregates([BENCH_COUNTRY])
+
+
+def measure(name: str, rows: int, func) -> None:
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print(f"{name:<14} {result:>10,}  {elapsed:>8.2f}  {rows / elapsed:>10,.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da importação de CSV")
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--skip-legacy", action="store_true", help="não roda o importador linha a linha")
+    args = parser.parse_args()
+
+    content = synthetic_csv(args.rows)
+    print(f"{args.rows:,} linhas, {len(content) / 1024 / 1024:.1f} MB\n")
+    print("importador      válidas  tempo(s)    linhas/s")
+
+    cleanup()
+    try:
+        if not args.skip_legacy:
+            measure("legado", args.rows, lambda: legacy_import(content, BENCH_COUNTRY))
+            cleanup()
+        measure("vetorizado", args.rows,
+                lambda: import_csv(io.StringIO(content), BENCH_COUNTRY)["imported_count"])
+        measure("só validação", args.rows, lambda: validate_only(content))
+    finally:
+        cleanup()
+
+
+if __name__ == "__main__":
+    main()
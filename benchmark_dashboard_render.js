@@ -0,0 +1,119 @@
+#!/usr/bin/env node
+/**
+ * Benchmark de renderização do gráfico de evolução do dashboard (sem navegador)
+ *
+ * Extrai o <script> de dashboard.html, executa em um contexto `vm` do Node com
+ * stubs mínimos de document/axios/Plotly e mede createEvolutionChart para
+ * séries de 10k e 100k pontos. A implementação antiga (data.find dentro de
+ * dates.map, O(n²)) é medida para comparação nos tamanhos em que é viável.
+ *
+ * Uso: node benchmark_dashboard_render.js [caminho/para/dashboard.html]
+ */
+const fs = require("fs");
+const path = require("path");
+const vm = require("vm");
+
+const SIZES = [10000, 100000];
+const LEGACY_MAX_SIZE = 20000;  // acima disso a versão O(n²) leva minutos
+const REPEAT = 5;
+
+function findDashboard() {
+    const candidates = [
+        process.argv[2],
+        path.join(__dirname, "dashboard.html"),
+        path.join(__dirname, "..", "templates", "dashboard.html"),
+    ].filter(Boolean);
+    const found = candidates.find(candidate => fs.existsSync(candidate));
+    if (!found) {
+        throw new Error("dashboard.html não encontrado");
+    }
+    return found;
+}
+
+function extractScript(html) {
+    const scripts = [...html.matchAll(/<script>([\s\S]*?)<\/script>/g)];
+    if (scripts.length === 0) {
+        throw new Error("Nenhum <script> inline em dashboard.html");
+    }
+    return scripts[scripts.length - 1][1];
+}
+
+function createContext(renders) {
+    const values = { chartType: "line", metricType: "both", countryFilter: "all", seriesMetric: "raw" };
+    const elements = {};
+    const element = id => elements[id] || (elements[id] = {
+        value: values[id] || "",
+        style: {},
+        textContent: "",
+        innerHTML: "",
+        addEventListener() {},
+        appendChild() {},
+    });
+
+    const plot = (id, traces) => renders.push({ id, traces });
+    return vm.createContext({
+        console,
+        setTimeout,
+        document: { getElementById: element, createElement: () => element(`_${Math.random()}`) },
+        window: {},
+        axios: { get: () => new Promise(() => {}), post: () => new Promise(() => {}) },
+        Plotly: { react: plot, newPlot: plot },
+    });
+}
+
+function generateSeries(points) {
+    const start = Date.UTC(2000, 0, 1);
+    const data = new Array(points);
+    for (let i = 0; i < points; i++) {
+        const date = new Date(start + i * 86400000).toISOString().slice(0, 10);
+        data[i] = { date, vaccinated: i * 1000, deaths: i * 10 };
+    }
+    return data;
+}
+
+// Implementação anterior de createEvolutionChart (apenas a parte de indexação)
+function legacyIndex(data) {
+    const dates = [...new Set(data.map(d => d.date))].sort();
+    const vaccinated = dates.map(date => {
+        const item = data.find(d => d.date === date);
+        return item ? (item.vaccinated || 0) : 0;
+    });
+    const deaths = dates.map(date => {
+        const item = data.find(d => d.date === date);
+        return item ? (item.deaths || 0) : 0;
+    });
+    return { dates, vaccinated, deaths };
+}
+
+function time(fn) {
+    const samples = [];
+    for (let i = 0; i < REPEAT; i++) {
+        const start = process.hrtime.bigint();
+        fn();
+        samples.push(Number(process.hrtime.bigint() - start) / 1e6);
+    }
+    samples.sort((a, b) => a - b);
+    return samples[Math.floor(samples.length / 2)];
+}
+
+function main() {
+    const dashboard = findDashboard();
+    const renders = [];
+    const context = createContext(renders);
+    vm.runInContext(extractScript(fs.readFileSync(dashboard, "utf8")), context);
+
+    console.log(`Dashboard: ${dashboard}`);
+    console.log("pontos      atual (ms)   legado (ms)   tipo do traço");
+    for (const size of SIZES) {
+        const data = generateSeries(size);
+        context.__data = data;
+        const current = time(() => vm.runInContext("createEvolutionChart(__data)", context));
+        const legacy = size <= LEGACY_MAX_SIZE ? time(() => legacyIndex(data)).toFixed(1) : "-";
+        const last = renders[renders.length - 1];
+        console.log(
+            `${String(size).padEnd(10)}  ${current.toFixed(1).padStart(10)}   ${String(legacy).padStart(11)}   ${last.traces[0].type}`
+        );
+    }
+}
+
+main();
@@ -0,0 +1,219 @@
+"""
+Benchmark das dimensões de país e estado/região (vaccine.dimensions)
+
+Gera dois bancos SQLite temporários com as mesmas --countries x --regions
+séries de --days dias em VaccineData:
+
+- texto: país e estado repetidos em cada linha, como até a migração 0011
+- dimensões: colunas smallint com o id de Country/Region
+
+e compara:
+
+1. Tamanho em disco (depois de VACUUM) e de cada tabela/índice (dbstat)
+2. Latência mediana dos agregados agrupados que o dashboard faz (por país,
+   por estado de um país, série diária de um país) e da busca pelo índice
+   único; no banco com dimensões o tempo inclui traduzir nomes em ids e ids
+   de volta em nomes, como faz o DimensionField
+
+Usa apenas o sqlite3 (não precisa do Django). Código de saída 1 se o banco
+com dimensões não for menor ou se as consultas devolverem resultados diferentes.
+
+Uso:
+    python scripts/benchmark_dimensions.py
+    python scripts/benchmark_dimensions.py --countries 40 --regions 60 --days 1500
+"""
+import argparse
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+COLUMNS = """
+    "id" integer NOT NULL PRIMARY KEY AUTOINCREMENT,
+    "date" date NOT NULL,
+    "vaccinated" integer NOT NULL,
+    "deaths" integer NOT NULL,
+    "population" integer NOT NULL,
+    "vaccination_rate" real NULL,
+    "death_rate" real NULL,
+"""
+INDEXES = """
+CREATE UNIQUE INDEX "vaccinedata_series_date" ON "vaccine_vaccinedata" ("country", "state_or_region", "date");
+CREATE INDEX "vaccine_vac_country_idx" ON "vaccine_vaccinedata" ("country");
+CREATE INDEX "vaccine_vac_date_idx" ON "vaccine_vaccinedata" ("date");
+CREATE INDEX "vaccinedata_vaccination_rate" ON "vaccine_vaccinedata" ("vaccination_rate");
+CREATE INDEX "vaccinedata_death_rate" ON "vaccine_vaccinedata" ("death_rate");
+"""
+SCHEMAS = {
+    "texto": f"""
+CREATE TABLE "vaccine_vaccinedata" ({COLUMNS}
+    "country" varchar(100) NOT NULL,
+    "state_or_region" varchar(100) NULL
+);
+{INDEXES}""",
+    "dimensões": f"""
+CREATE TABLE "vaccine_country" ("id" integer NOT NULL PRIMARY KEY AUTOINCREMENT, "name" varchar(100) NOT NULL UNIQUE);
+CREATE TABLE "vaccine_region" ("id" integer NOT NULL PRIMARY KEY AUTOINCREMENT, "name" varchar(100) NOT NULL UNIQUE);
+CREATE TABLE "vaccine_vaccinedata" ({COLUMNS}
+    "country" smallint NOT NULL,
+    "state_or_region" smallint NULL
+);
+{INDEXES}""",
+}
+
+# {consulta: (sql, dimensão de cada parâmetro, dimensão da 1ª coluna do resultado)}
+QUERIES = {
+    "totais por país": (
+        'SELECT country, COUNT(*), MAX(date), MAX(vaccinated), MAX(deaths) FROM vaccine_vaccinedata '
+        'GROUP BY country', (), "country"),
+    "totais por estado (1 país)": (
+        'SELECT state_or_region, MAX(vaccinated), MAX(deaths), MAX(vaccination_rate) FROM vaccine_vaccinedata '
+        'WHERE country = ? GROUP BY state_or_region', ("country",), "region"),
+    "série diária (1 país)": (
+        'SELECT date, SUM(vaccinated), SUM(deaths) FROM vaccine_vaccinedata '
+        'WHERE country = ? GROUP BY date ORDER BY date', ("country",), None),
+    "busca pelo índice único": (
+        'SELECT vaccinated, deaths FROM vaccine_vaccinedata '
+        'WHERE country = ? AND state_or_region = ? AND date = ?', ("country", "region", None), None),
+}
+
+
+def series_names(countries: int, regions: int):
+    country_names = ["brasil", "portugal", "italia", "usa"] + [f"país sintético {i:03d}" for i in range(countries - 4)]
+    region_names = ["Nacional"] + [f"Estado ou região sintética {i:03d}" for i in range(regions - 1)]
+    return country_names[:countries], region_names[:regions]
+
+
+def build(path: Path, encoded: bool, countries, regions, days: int) -> None:
+    connection = sqlite3.connect(path)
+    connection.executescript(SCHEMAS["dimensões" if encoded else "texto"])
+    country_ids = {name: index + 1 for index, name in enumerate(sorted(countries))}
+    region_ids = {name: index + 1 for index, name in enumerate(sorted(regions))}
+    if encoded:
+        connection.executemany('INSERT INTO vaccine_country (id, name) VALUES (?, ?)',
+                               [(id, name) for name, id in country_ids.items()])
+        connection.executemany('INSERT INTO vaccine_region (id, name) VALUES (?, ?)',
+                               [(id, name) for name, id in region_ids.items()])
+    start = date(2021, 1, 1)
+    random_ = random.Random(0)
+    for country in countries:
+        rows = []
+        for region in regions:
+            population = random_.randint(100000, 50000000)
+            state = None if region == "Nacional" else region
+            for day in range(days):
+                vaccinated = min(population, day * population // days)
+                deaths = day * population // 100000
+                rows.append((
+                    (start + timedelta(days=day)).isoformat(), vaccinated, deaths, population,
+                    vaccinated / population * 100, deaths / population * 100000,
+                    country_ids[country] if encoded else country,
+                    None if state is None else (region_ids[state] if encoded else state),
+                ))
+        connection.executemany(
+            'INSERT INTO vaccine_vaccinedata (date, vaccinated, deaths, population, vaccination_rate, '
+            'death_rate, country, state_or_region) VALUES (?, ?, ?, ?, ?, ?, ?, ?)', rows)
+        connection.commit()
+    connection.execute("ANALYZE")
+    connection.commit()
+    connection.execute("VACUUM")
+    connection.close()
+
+
+def object_sizes(connection) -> dict:
+    """{tabela ou índice: bytes}, ou {} se o SQLite não tiver dbstat"""
+    try:
+        return dict(connection.execute("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name"))
+    except sqlite3.OperationalError:
+        return {}
+
+
+class Database:
+    """
+    Executa as consultas; no banco com dimensões, traduz nomes em ids e ids em
+    nomes com dicionários carregados uma vez, como o cache do DimensionField
+    """
+
+    def __init__(self, path: Path, encoded: bool):
+        self.connection = sqlite3.connect(path)
+        self.ids = {}
+        if encoded:
+            for dimension, table in (("country", "vaccine_country"), ("region", "vaccine_region")):
+                self.ids[dimension] = dict(self.connection.execute(f"SELECT name, id FROM {table}"))
+        self.names = {dimension: {id: name for name, id in ids.items()} for dimension, ids in self.ids.items()}
+
+    def run(self, sql: str, kinds: tuple, column, params: tuple):
+        if not self.ids:
+            return self.connection.execute(sql, params).fetchall()
+        params = [self.ids[kind].get(value, 0) if kind else value for kind, value in zip(kinds, params)]
+        rows = self.connection.execute(sql, params).fetchall()
+        if column:
+            names = self.names[column]
+            rows = [(names.get(row[0]),) + row[1:] for row in rows]
+        return rows
+
+
+def timed(database: Database, query: tuple, params: tuple, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        rows = database.run(*query, params)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings), rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tamanho e latência: país/estado em texto x dimensões")
+    parser.add_argument("--countries", type=int, default=20)
+    parser.add_argument("--regions", type=int, default=30, help="séries por país (incluindo Nacional)")
+    parser.add_argument("--days", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=15)
+    args = parser.parse_args()
+
+    countries, regions = series_names(args.countries, args.regions)
+    workdir = tempfile.TemporaryDirectory()
+    paths = {}
+    for label in SCHEMAS:
+        paths[label] = Path(workdir.name) / f"{label}.sqlite3"
+        started = time.perf_counter()
+        build(paths[label], label == "dimensões", countries, regions, args.days)
+        print(f"Banco '{label}' gerado em {time.perf_counter() - started:.1f} s")
+    rows = args.countries * args.regions * args.days
+    print(f"\n{rows:,} linhas ({args.countries} países x {args.regions} séries x {args.days} dias)\n")
+
+    databases = {label: Database(path, label == "dimensões") for label, path in paths.items()}
+    sizes = {label: object_sizes(database.connection) for label, database in databases.items()}
+    totals = {label: path.stat().st_size for label, path in paths.items()}
+    before, after = SCHEMAS
+    print(f"   {'tamanho em disco':<34} {before:>10} {after:>10} {'redução':>8}")
+    for name in sorted(sizes[before], key=lambda name: -sizes[before][name]):
+        if not name.startswith("vaccine") and not name.startswith("vaccinedata"):
+            continue
+        print(f"   {name:<34} {sizes[before][name] / 1e6:>7.1f} MB {sizes[after].get(name, 0) / 1e6:>7.1f} MB "
+              f"{1 - sizes[after].get(name, 0) / sizes[before][name]:>8.0%}")
+    print(f"   {'arquivo':<34} {totals[before] / 1e6:>7.1f} MB {totals[after] / 1e6:>7.1f} MB "
+          f"{1 - totals[after] / totals[before]:>8.0%}")
+
+    country, state = countries[0], regions[len(regions) // 2]
+    day = (date(2021, 1, 1) + timedelta(days=args.days // 2)).isoformat()
+    params = {"totais por país": (), "totais por estado (1 país)": (country,), "série diária (1 país)": (country,),
+              "busca pelo índice único": (country, state, day)}
+    print(f"\n   {'latência mediana (ms)':<34} {before:>10} {after:>10} {'razão':>8}")
+    same = True
+    for label, query in QUERIES.items():
+        results = {name: timed(database, query, params[label], args.repeat) for name, database in databases.items()}
+        same = same and sorted(results[before][1], key=repr) == sorted(results[after][1], key=repr)
+        print(f"   {label:<34} {results[before][0] * 1000:>10.2f} {results[after][0] * 1000:>10.2f} "
+              f"{results[before][0] / results[after][0]:>7.2f}x")
+    print(f"\n   resultados idênticos nos dois bancos: {'sim' if same else 'NÃO'}")
+
+    workdir.cleanup()
+    sys.exit(0 if same and totals[after] < totals[before] else 1)
+
+
+if __name__ == "__main__":
+    main()
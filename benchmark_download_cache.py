@@ -0,0 +1,175 @@
+"""
+Verificação do cache de downloads (vaccine.download_cache) contra o
+servidor local de fixtures (scripts/fixture_server.py)
+
+Gera um arquivo no formato da OWID com --filler países extras de --days
+dias (para o tamanho se aproximar do arquivo real) e mede, com cache e
+servidor temporários:
+
+1. Primeiro download (200): bytes transferidos, tamanho guardado comprimido
+2. Arquivo inalterado (304): nada transferido; enquanto a versão não foi
+   ingerida, o arquivo do cache é interpretado
+3. Versão já ingerida: o 304 dispensa a interpretação (e --force a refaz)
+4. Download interrompido na metade: retomado com Range (206) na nova
+   tentativa e na execução seguinte, sem baixar de novo o que já chegou
+5. Corpo gzip do servidor guardado como recebido
+6. Arquivo alterado durante a interrupção: If-Range não confere, o servidor
+   responde 200 e o download recomeça
+
+Código de saída 1 se alguma verificação falhar.
+
+Uso:
+    python scripts/benchmark_download_cache.py
+    python scripts/benchmark_download_cache.py --filler 200 --days 900
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import fixture_server
+from benchmark_connectors import Checks
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+OWID_PATH = "data/owid-covid-data.json"
+COUNTRIES = {"BRA": "Brazil", "PRT": "Portugal", "ITA": "Italy", "USA": "United States"}
+
+
+def owid_document(filler: int, days: int, seed: int = 0) -> dict:
+    """Documento no formato da OWID: os 4 países do dashboard e `filler` países extras"""
+    start = date(2021, 1, 1)
+    names = {**COUNTRIES, **{f"X{i:03d}": f"Pais {i}" for i in range(filler)}}
+    document = {}
+    for index, (iso, name) in enumerate(names.items()):
+        document[iso] = {"location": name, "data": [
+            {"date": (start + timedelta(days=day)).isoformat(),
+             "people_fully_vaccinated": 1000000 * (index + 1) + day * 1000 + seed,
+             "total_deaths": 10000 * (index + 1) + day * 7,
+             "population": 5000000 * (index + 1),
+             "new_cases": day * 13 % 9973}
+            for day in range(days)
+        ]}
+    return document
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verificação do cache de downloads com um servidor local")
+    parser.add_argument("--filler", type=int, default=150, help="países extras no arquivo")
+    parser.add_argument("--days", type=int, default=600, help="dias por país")
+    args = parser.parse_args()
+
+    workdir = tempfile.TemporaryDirectory()
+    root = Path(workdir.name) / "fixtures"
+    (root / "data").mkdir(parents=True)
+    owid_file = root / OWID_PATH
+    owid_file.write_text(json.dumps(owid_document(args.filler, args.days)))
+
+    server = fixture_server.start(root)
+    base = f"http://127.0.0.1:{server.server_port}"
+    os.environ["CONNECTOR_BASE_URLS"] = json.dumps({"owid": base})
+    os.environ["DOWNLOAD_CACHE_DIR"] = str(Path(workdir.name) / "cache")
+
+    import django
+    django.setup()
+    from vaccine.connectors import FetchError, HttpClient, OwidConnector
+    from vaccine.download_cache import DOWNLOADED, NOT_MODIFIED, RESUMED, DownloadCache
+
+    check = Checks()
+    size = owid_file.stat().st_size
+    url = f"{base}/{OWID_PATH}"
+    print(f"Arquivo OWID de teste: {size / 1e6:.1f} MB ({len(COUNTRIES) + args.filler} países x {args.days} dias)\n")
+    print(f"   {'cenário':<34} {'status':<13} {'transferido':>12} {'linhas':>7} {'tempo(ms)':>10}")
+
+    def ingest(label: str, force: bool = False):
+        """fetch + parse como na etapa de ingestão"""
+        server.reset()
+        source = OwidConnector()
+        source.force = force
+        started = time.perf_counter()
+        raw = source.fetch(source.countries, client=HttpClient(backoff=0.05))
+        rows = sum(len(source.parse(raw, country)) for country in source.countries)
+        elapsed = time.perf_counter() - started
+        download = source._downloads[0][0]
+        print(f"   {label:<34} {download.status:<13} {server.stats()['bytes'] / 1e6:>9.2f} MB {rows:>7} "
+              f"{elapsed * 1000:>10.0f}")
+        return source, download, rows, elapsed
+
+    _, download, rows, first = ingest("1. primeiro download")
+    entry = DownloadCache().entry(url)
+    check("200 com o arquivo inteiro", download.status == DOWNLOADED and server.stats()["bytes"] == size)
+    check("guardado comprimido", entry["stored"] < size / 3,
+          f"{size / 1e6:.1f} MB -> {entry['stored'] / 1e6:.2f} MB, ETag {entry['etag']}")
+
+    source, download, rows_again, _ = ingest("2. inalterado, não ingerido")
+    check("304 sem corpo", download.status == NOT_MODIFIED and server.stats()["bytes"] == 0)
+    check("interpretado a partir do cache", rows_again == rows)
+
+    source.commit(source.countries)
+    source, download, skipped_rows, skipped = ingest("3. inalterado, já ingerido")
+    check("304 dispensa a interpretação", skipped_rows == 0 and source.unchanged == set(source.countries),
+          f"{first / skipped:.0f}x mais rápido que o primeiro download" if skipped else "")
+    _, download, forced_rows, _ = ingest("   --force", force=True)
+    check("--force interpreta o arquivo do cache", forced_rows == rows and download.status == NOT_MODIFIED)
+
+    print("\n4. Download interrompido")
+    cut = size * 2 // 5
+    cache = DownloadCache(Path(workdir.name) / "cache-resume")
+    server.reset()
+    download = cache.fetch(HttpClient(backoff=0.05), f"{url}?cut={cut}")
+    stats = server.stats()
+    check("retomado na nova tentativa (206)", download.status == RESUMED and stats["statuses"] == {200: 1, 206: 1},
+          f"{stats['bytes'] / 1e6:.2f} MB transferidos para {size / 1e6:.2f} MB")
+    check("conteúdo íntegro", download.content == owid_file.read_bytes())
+
+    cache = DownloadCache(Path(workdir.name) / "cache-resume-run")
+    server.reset()
+    try:
+        cache.fetch(HttpClient(retries=0), f"{url}?cut={cut}")
+        check("interrupção sem novas tentativas falha", False)
+    except FetchError:
+        pass
+    partial = next(cache.directory.glob("*.part")).stat().st_size
+    download = cache.fetch(HttpClient(retries=0), f"{url}?cut={cut}")
+    stats = server.stats()
+    check("retomado na execução seguinte", download.status == RESUMED and partial == cut
+          and stats["bytes"] == size and download.content == owid_file.read_bytes(),
+          f"parcial de {partial / 1e6:.2f} MB, {stats['bytes'] / 1e6:.2f} MB transferidos no total")
+
+    print("\n5. Corpo gzip do servidor")
+    cache = DownloadCache(Path(workdir.name) / "cache-gzip")
+    server.reset()
+    download = cache.fetch(HttpClient(backoff=0.05), f"{url}?gzip=1&cut=200000")
+    stats = server.stats()
+    check("retomado e guardado como recebido", download.status == RESUMED
+          and download.content == owid_file.read_bytes(),
+          f"{stats['bytes'] / 1e6:.2f} MB transferidos, guardado {download.path.stat().st_size / 1e6:.2f} MB")
+
+    print("\n6. Arquivo alterado durante a interrupção")
+    cache = DownloadCache(Path(workdir.name) / "cache-changed")
+    server.reset()
+    try:
+        cache.fetch(HttpClient(retries=0), f"{url}?cut={cut}&v=2")
+    except FetchError:
+        pass
+    owid_file.write_text(json.dumps(owid_document(args.filler, args.days, seed=1)))
+    download = cache.fetch(HttpClient(retries=0), f"{url}?cut={cut}&v=2")
+    check("If-Range não confere: 200 e download completo", download.status == DOWNLOADED
+          and server.stats()["statuses"] == {200: 2} and download.content == owid_file.read_bytes())
+
+    _, download, rows_changed, _ = ingest("   arquivo da OWID alterado")
+    check("versão nova é baixada e interpretada", download.status == DOWNLOADED and rows_changed == rows)
+
+    server.shutdown()
+    workdir.cleanup()
+    print(f"\n{'Todas as verificações passaram' if not check.failed else f'{len(check.failed)} falha(s)'}")
+    sys.exit(1 if check.failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Benchmark da inicialização do gunicorn: CMD anterior x gunicorn.conf.py
+
+Para cada configuração, inicia o gunicorn em uma porta livre e mede:
+
+- tempo até o primeiro 200 de /api/dashboard/ desde o início do processo
+  (inclui o boot dos workers)
+- depois que todos os workers subiram (--settle), uma rajada de requisições
+  concorrentes (4 por worker, cada uma em uma conexão nova), que chega aos
+  workers ainda sem tráfego: a pior e a mediana da rajada
+- a mediana de --requests requisições sequenciais em seguida (estado quente)
+- RSS e PSS somados do master e dos workers (Linux, /proc/<pid>/smaps_rollup)
+
+Configurações:
+- cmd: o CMD anterior do Dockerfile (ASGI, workers uvicorn, sem preload)
+- conf-uvicorn: gunicorn.conf.py com workers uvicorn (padrão)
+- conf-gthread: gunicorn.conf.py com GUNICORN_WORKER_CLASS=gthread
+
+Uso:
+    python scripts/benchmark_gunicorn.py
+    python scripts/benchmark_gunicorn.py --workers 8 --requests 100
+"""
+import argparse
+import os
+from concurrent.futures import ThreadPoolExecutor
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PATH = "/api/dashboard/?countries=brasil,portugal,italia,usa&country=brasil"
+STARTUP_TIMEOUT = 60  # segundos
+
+
+def configurations(workers: int, empty_config: str):
+    base = ["gunicorn", "--workers", str(workers)]
+    return {
+        # Sem -c o gunicorn lê ./gunicorn.conf.py: o CMD anterior roda com um arquivo vazio
+        "cmd": (base + ["-c", empty_config, "--worker-class", "uvicorn.workers.UvicornWorker",
+                        "config.asgi:application"], {}),
+        "conf-uvicorn": (base + ["-c", "gunicorn.conf.py"], {}),
+        "conf-gthread": (base + ["-c", "gunicorn.conf.py"], {"GUNICORN_WORKER_CLASS": "gthread"}),
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def request(url: str) -> float:
+    start = time.perf_counter()
+    with urllib.request.urlopen(url, timeout=30) as response:
+        response.read()
+    return time.perf_counter() - start
+
+
+def process_tree(pid: int):
+    children = []
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as stat:
+                    if int(stat.read().rsplit(")", 1)[1].split()[1]) == pid:
+                        children.append(int(entry))
+            except (FileNotFoundError, ProcessLookupError):
+                continue
+    return [pid] + children
+
+
+def memory_mb(pids):
+    rss = pss = 0
+    for pid in pids:
+        with open(f"/proc/{pid}/smaps_rollup") as smaps:
+            for line in smaps:
+                if line.startswith("Rss:"):
+                    rss += int(line.split()[1])
+                elif line.startswith("Pss:"):
+                    pss += int(line.split()[1])
+    return rss / 1024, pss / 1024
+
+
+def run(name: str, command, env, workers: int, requests: int, settle: float):
+    port = free_port()
+    url = f"http://127.0.0.1:{port}{PATH}"
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m"] + command + ["--bind", f"127.0.0.1:{port}"],
+        cwd=ROOT, env={**os.environ, **env}, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while True:
+            if server.poll() is not None:
+                raise RuntimeError(f"{name}: gunicorn encerrou com código {server.returncode}")
+            if time.perf_counter() - started > STARTUP_TIMEOUT:
+                raise RuntimeError(f"{name}: sem resposta após {STARTUP_TIMEOUT} s")
+            try:
+                request(url)
+                break
+            except OSError:
+                time.sleep(0.05)
+        ready = time.perf_counter() - started
+
+        # Mesmo número de workers vivos e ociosos em todas as configurações
+        time.sleep(settle)
+        with ThreadPoolExecutor(max_workers=workers * 4) as executor:
+            burst = list(executor.map(lambda _: request(url), range(workers * 4)))
+        warm = [request(url) for _ in range(requests)]
+        rss, pss = memory_mb(process_tree(server.pid))
+        return {
+            "ready": ready * 1000,
+            "burst_worst": max(burst) * 1000,
+            "burst_median": statistics.median(burst) * 1000,
+            "warm": statistics.median(warm) * 1000,
+            "rss": rss,
+            "pss": pss,
+        }
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de inicialização do gunicorn")
+    parser.add_argument("--workers", type=int, default=4, help="workers em todas as configurações")
+    parser.add_argument("--requests", type=int, default=50, help="requisições medidas após o início")
+    parser.add_argument("--settle", type=float, default=5.0,
+                        help="segundos de espera para o boot de todos os workers")
+    parser.add_argument("--only", nargs="+", help="configurações a executar")
+    args = parser.parse_args()
+
+    with tempfile.NamedTemporaryFile(suffix=".py") as empty_config:
+        configs = configurations(args.workers, empty_config.name)
+        names = args.only or list(configs)
+        print(f"{args.workers} workers, {args.requests} requisições em {PATH}\n")
+        print(f"{'configuração':<14} {'pronto(ms)':>10} {'rajada pior(ms)':>16} {'rajada mediana(ms)':>19} "
+              f"{'quente(ms)':>11} {'RSS(MB)':>8} {'PSS(MB)':>8}")
+        for name in names:
+            command, env = configs[name]
+            result = run(name, command, env, args.workers, args.requests, args.settle)
+            print(f"{name:<14} {result['ready']:>10.0f} {result['burst_worst']:>16.1f} "
+                  f"{result['burst_median']:>19.1f} {result['warm']:>11.1f} {result['rss']:>8.0f} "
+                  f"{result['pss']:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Verificação da coalescência de consultas (vaccine.singleflight)
+
+1. Contagem: --processes processos (como os workers do gunicorn) com
+   --threads threads cada disparam ao mesmo tempo a mesma chamada, que leva
+   --delay segundos. Cada execução real é registrada em um arquivo; com
+   single-flight deve haver exatamente uma, e todas as chamadas recebem o
+   mesmo resultado. Sem single-flight, uma por chamada. Código de saída 1
+   se houver mais de uma execução.
+
+2. Consultas reais: a mesma rajada em chart-data (métrica --metric) e
+   state-data do país --country, com e sem coalescência: execuções,
+   tempo total da rajada e a pior latência.
+
+Uso:
+    python scripts/benchmark_singleflight.py
+    python scripts/benchmark_singleflight.py --processes 8 --threads 16 --delay 0.5
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+import django
+django.setup()
+
+from django.db import close_old_connections, connections
+from vaccine import singleflight
+from vaccine.queries import chart_payload
+from vaccine.snapshots import state_totals
+
+STATS = ("computed", "shared", "shared_remote", "fallback")
+
+
+def counted(log_path: str, delay: float, value: int):
+    """Chamada cara de teste: registra a execução e devolve um resultado"""
+    with open(log_path, "a") as log:
+        log.write(f"{os.getpid()}\n")
+    time.sleep(delay)
+    return {"value": value * 2, "rows": list(range(10))}
+
+
+def isolated(func, *args):
+    try:
+        return func(*args)
+    finally:
+        close_old_connections()
+
+
+def worker(barrier, threads: int, coalesce: bool, namespace: str, func, args, results):
+    """Um processo: `threads` chamadas simultâneas, liberadas junto com os outros processos"""
+    singleflight.stats.clear()
+    # A chave considera só os argumentos, como em vaccine.queries
+    query = partial(isolated, func)
+    call = (lambda: singleflight.run(namespace, query, *args)) if coalesce else (lambda: query(*args))
+
+    def timed(_):
+        start = time.perf_counter()
+        result = call()
+        return time.perf_counter() - start, result
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        barrier.wait()
+        outcomes = list(executor.map(timed, range(threads)))
+    results.put({
+        "latencies": [latency for latency, _ in outcomes],
+        "results": {repr(result) for _, result in outcomes},
+        "stats": {name: singleflight.stats[name] for name in STATS},
+    })
+
+
+def burst(processes: int, threads: int, coalesce: bool, namespace: str, func, *args):
+    """Dispara processes x threads chamadas idênticas e agrega o que cada processo viu"""
+    context = multiprocessing.get_context("fork")
+    barrier = context.Barrier(processes)
+    results = context.Queue()
+    connections.close_all()  # conexões não podem ser herdadas
+    started = time.perf_counter()
+    children = [
+        context.Process(target=worker, args=(barrier, threads, coalesce, namespace, func, args, results))
+        for _ in range(processes)
+    ]
+    for child in children:
+        child.start()
+    reports = [results.get() for _ in children]
+    for child in children:
+        child.join()
+    elapsed = time.perf_counter() - started
+
+    stats = {name: sum(report["stats"][name] for report in reports) for name in STATS}
+    return {
+        "elapsed": elapsed,
+        "worst": max(latency for report in reports for latency in report["latencies"]),
+        "distinct": len(set().union(*(report["results"] for report in reports))),
+        "stats": stats,
+    }
+
+
+def check_count(args) -> bool:
+    calls = args.processes * args.threads
+    print(f"1. {args.processes} processos x {args.threads} threads = {calls} chamadas idênticas "
+          f"de {args.delay * 1000:.0f} ms\n")
+    ok = True
+    for coalesce in (False, True):
+        with tempfile.NamedTemporaryFile(suffix=".log") as log:
+            namespace = f"check-{time.time_ns()}"
+            report = burst(args.processes, args.threads, coalesce, namespace, counted, log.name, args.delay, 21)
+            executions = len(open(log.name).read().splitlines())
+        label = "com single-flight" if coalesce else "sem single-flight"
+        print(f"   {label:<18} execuções={executions:<4} resultados distintos={report['distinct']} "
+              f"rajada={report['elapsed'] * 1000:.0f} ms")
+        if coalesce:
+            print(f"   {'':<18} {report['stats']}")
+            ok = executions == 1 and report["distinct"] == 1
+    print(f"\n   {'OK' if ok else 'FALHOU'}: {'uma execução' if ok else 'mais de uma execução'} "
+          f"para {calls} chamadas simultâneas\n")
+    return ok
+
+
+def compare_queries(args) -> None:
+    print(f"2. Consultas reais ({args.processes} x {args.threads} chamadas simultâneas)\n")
+    print(f"   {'consulta':<28} {'modo':<18} {'execuções':>9} {'rajada(ms)':>11} {'pior(ms)':>9}")
+    queries = [
+        (f"chart-data {args.metric}", "chart-data", chart_payload, (args.country, args.metric)),
+        ("state-data vaccination_rate", "state-data", state_totals, (args.country, "latest", "vaccination_rate")),
+    ]
+    for label, namespace, func, call_args in queries:
+        for coalesce in (False, True):
+            report = burst(args.processes, args.threads, coalesce, namespace, func, *call_args)
+            executions = (report["stats"]["computed"] + report["stats"]["fallback"]) if coalesce \
+                else args.processes * args.threads
+            mode = "com single-flight" if coalesce else "sem single-flight"
+            print(f"   {label:<28} {mode:<18} {executions:>9} {report['elapsed'] * 1000:>11.0f} "
+                  f"{report['worst'] * 1000:>9.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verificação da coalescência de consultas idênticas")
+    parser.add_argument("--processes", type=int, default=4, help="processos (workers)")
+    parser.add_argument("--threads", type=int, default=8, help="chamadas simultâneas por processo")
+    parser.add_argument("--delay", type=float, default=0.3, help="duração da chamada de teste (s)")
+    parser.add_argument("--country", default="brasil")
+    parser.add_argument("--metric", default="avg7")
+    args = parser.parse_args()
+
+    ok = check_count(args)
+    compare_queries(args)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
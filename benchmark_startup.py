@@ -0,0 +1,102 @@
+"""
+Benchmark do tempo de importação e da memória de um worker ao iniciar
+
+Cada rodada é um processo novo (`python -X importtime`) que faz o mesmo que um
+worker do gunicorn antes do primeiro request: django.setup() e o carregamento
+das rotas (urls -> views). Mede o tempo de importação, o RSS ao final e
+verifica que nenhuma dependência pesada (pandas, python-pptx, openpyxl...) foi
+importada: elas devem carregar só no primeiro uso.
+
+Sai com código 1 se alguma dependência pesada for importada ou se a mediana
+passar dos limites, para uso em CI:
+
+    python scripts/benchmark_startup.py
+    python scripts/benchmark_startup.py --max-ms 800 --max-rss-mb 60 --repeat 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Carregadas apenas em relatórios, exportações e importações de CSV
+HEAVY_MODULES = ["pandas", "numpy", "pptx", "openpyxl", "lxml", "PIL", "pyarrow"]
+
+# Limites padrão (mediana), com folga sobre o medido após o carregamento sob demanda
+MAX_IMPORT_MS = 1000
+MAX_RSS_MB = 75
+
+WORKER_STARTUP = f"""
+import json, os, resource, sys, time
+sys.path.insert(0, {ROOT!r})
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+start = time.perf_counter()
+import django
+django.setup()
+from django.urls import get_resolver
+get_resolver().url_patterns
+print(json.dumps({{
+    "ms": (time.perf_counter() - start) * 1000,
+    "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "heavy": [name for name in {HEAVY_MODULES!r} if name in sys.modules],
+}}))
+"""
+
+
+def parse_importtime(stderr: str):
+    """(módulo, tempo acumulado em µs) das importações de primeiro nível"""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not name.startswith("  "):  # sem recuo: importado diretamente
+            modules.append((name.strip(), int(cumulative)))
+    return modules
+
+
+def run_once():
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", WORKER_STARTUP],
+                            capture_output=True, text=True, check=True, cwd=ROOT)
+    return json.loads(result.stdout.strip().splitlines()[-1]), parse_importtime(result.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de inicialização do worker")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-ms", type=float, default=MAX_IMPORT_MS)
+    parser.add_argument("--max-rss-mb", type=float, default=MAX_RSS_MB)
+    parser.add_argument("--top", type=int, default=10, help="importações mais lentas exibidas")
+    args = parser.parse_args()
+
+    runs = [run_once() for _ in range(args.repeat)]
+    import_ms = statistics.median(run["ms"] for run, _ in runs)
+    rss_mb = statistics.median(run["rss_mb"] for run, _ in runs)
+    heavy = sorted({name for run, _ in runs for name in run["heavy"]})
+
+    print(f"Rodadas: {args.repeat}")
+    print(f"Importação (mediana): {import_ms:.0f} ms (limite {args.max_ms:.0f} ms)")
+    print(f"RSS (mediana): {rss_mb:.1f} MB (limite {args.max_rss_mb:.0f} MB)")
+    print("\nImportações de primeiro nível mais lentas (última rodada):")
+    for name, cumulative in sorted(runs[-1][1], key=lambda item: -item[1])[:args.top]:
+        print(f"  {cumulative / 1000:>8.1f} ms  {name}")
+
+    failures = []
+    if heavy:
+        failures.append(f"dependências pesadas importadas na inicialização: {', '.join(heavy)}")
+    if import_ms > args.max_ms:
+        failures.append(f"importação acima do limite ({import_ms:.0f} > {args.max_ms:.0f} ms)")
+    if rss_mb > args.max_rss_mb:
+        failures.append(f"RSS acima do limite ({rss_mb:.1f} > {args.max_rss_mb:.0f} MB)")
+
+    if failures:
+        print("\nFALHOU:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+    print("\nOK")
+
+
+if __name__ == "__main__":
+    main()
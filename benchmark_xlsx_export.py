@@ -0,0 +1,81 @@
+"""
+Benchmark da exportação Excel (modo write-only)
+
+Grava N linhas sintéticas com o mesmo formato de VaccineData usando
+vaccine.exports.write_xlsx e mede tempo, tamanho do arquivo e pico de memória
+(RSS). Cada tamanho roda em um processo separado, para que o pico de um não
+contamine o outro: a memória deve ficar constante enquanto as linhas crescem.
+
+Uso:
+    python scripts/benchmark_xlsx_export.py                 # 100k, 1M e 5M linhas
+    python scripts/benchmark_xlsx_export.py --rows 5000000  # um tamanho
+    python scripts/benchmark_xlsx_export.py --db            # exporta o banco atual
+"""
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+SIZES = [100_000, 1_000_000, 5_000_000]
+STATES = ["São Paulo", "Rio de Janeiro", "Minas Gerais", "Bahia", "Paraná"]
+
+
+def synthetic_rows(count):
+    """Linhas no formato de iter_rows, geradas sob demanda"""
+    start = date(2020, 1, 1)
+    for i in range(count):
+        yield "brasil", STATES[i % len(STATES)], start + timedelta(days=i // len(STATES) % 3650), i, i // 50, 10_000_000
+
+
+def peak_rss_mb():
+    # ru_maxrss é em KB no Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_single(rows, use_db):
+    import django
+    django.setup()
+    from vaccine.exports import EXPORT_COLUMNS, export_xlsx, write_xlsx
+
+    baseline = peak_rss_mb()
+    with tempfile.TemporaryFile() as output:
+        start = time.perf_counter()
+        if use_db:
+            result = export_xlsx(output, summary=True)
+        else:
+            result = write_xlsx(synthetic_rows(rows), output, headers=[h for _, h in EXPORT_COLUMNS])
+        elapsed = time.perf_counter() - start
+        size = output.seek(0, os.SEEK_END)
+
+    print(f"{result['rows']:>10,}  {result['sheets']:>9}  {elapsed:>8.1f}  {result['rows'] / elapsed:>10,.0f}  "
+          f"{size / 1024 / 1024:>9.1f}  {baseline:>9.1f}  {peak_rss_mb():>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da exportação Excel")
+    parser.add_argument("--rows", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--db", action="store_true", help="exporta as linhas do banco em vez de sintéticas")
+    parser.add_argument("--single", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        run_single(args.rows[0], args.db)
+        return
+
+    print("    linhas  planilhas  tempo(s)   linhas/s  arquivo(MB)  RSS base  RSS pico")
+    for rows in ([0] if args.db else args.rows):
+        command = [sys.executable, os.path.abspath(__file__), "--single", "--rows", str(rows)]
+        if args.db:
+            command.append("--db")
+        subprocess.run(command, check=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,382 @@
+"""
+Fontes de dados da ingestão (vaccine.ingestion) e conectores HTTP
+
+Source é a interface de todas as fontes. Cada conector HTTP declara seus
+endpoints (URL, país e, para feeds estaduais, o estado) e um parser da
+resposta. Os endpoints dos países pedidos são buscados em paralelo por um
+pool de threads sobre uma única sessão HTTP (conexões reaproveitadas), com:
+
+- limite de requisições simultâneas por host (CONNECTOR_MAX_PER_HOST)
+- timeout de conexão e de leitura (CONNECTOR_TIMEOUT)
+- novas tentativas com backoff exponencial e jitter em falhas de rede,
+  timeouts e respostas 429/5xx, respeitando Retry-After (CONNECTOR_RETRIES)
+
+Um endpoint que falha após as tentativas não interrompe os demais: os
+países dele ficam sem alterações nesta execução e a falha é registrada em
+IngestionRun.error.
+
+Os downloads passam pelo cache em disco (vaccine.download_cache):
+requisições condicionais, retomada de downloads interrompidos e arquivos
+guardados comprimidos. Um endpoint que responde 304 não é interpretado de
+novo para os países em que aquela versão já foi ingerida (--force ignora).
+
+Fontes:
+- owid: Our World in Data (um arquivo JSON com todos os países)
+- feeds: feeds CSV ou JSON configurados em CONNECTOR_FEEDS_FILE (ministérios,
+  secretarias estaduais), um endpoint por feed
+
+CONNECTOR_BASE_URLS troca o endereço de uma fonte, por exemplo pelo servidor
+local de fixtures (scripts/fixture_server.py).
+"""
+import csv
+import io
+import json
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from urllib.parse import urlsplit, urlunsplit
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+from .download_cache import Download, DownloadCache
+from .snapshots import CUMULATIVE
+
+MAX_PER_HOST = getattr(settings, "CONNECTOR_MAX_PER_HOST", 4)
+MAX_WORKERS = getattr(settings, "CONNECTOR_MAX_WORKERS", 16)
+RETRIES = getattr(settings, "CONNECTOR_RETRIES", 3)
+BACKOFF = getattr(settings, "CONNECTOR_BACKOFF", 0.5)  # segundos, dobra a cada tentativa
+MAX_BACKOFF = 30  # segundos
+# (conexão, leitura) em segundos
+TIMEOUT = getattr(settings, "CONNECTOR_TIMEOUT", (5, 60))
+BASE_URLS = getattr(settings, "CONNECTOR_BASE_URLS", {})
+FEEDS_FILE = getattr(settings, "CONNECTOR_FEEDS_FILE", None)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+DEFAULT_COUNTRIES = ["brasil", "portugal", "italia", "usa"]
+NATIONAL = "Nacional"
+
+# (estado/região, data, vacinados, óbitos, população)
+Row = Tuple[str, date, int, int, int]
+
+
+class IngestionError(Exception):
+    """Falha ao obter ou interpretar os dados da fonte"""
+
+
+class Source(ABC):
+    """
+    Fonte de dados: `fetch` baixa o conteúdo bruto dos países pedidos uma vez
+    e `parse` extrai as linhas de um país (chamado em paralelo, um país por
+    thread). Falhas parciais da busca vão para `warnings` e os países sem
+    alterações na fonte desde a última ingestão, para `unchanged`.
+    """
+    name = ""
+    semantics = CUMULATIVE
+    countries: List[str] = DEFAULT_COUNTRIES
+    force = False  # interpreta mesmo o que não mudou na fonte
+
+    def __init__(self):
+        self.warnings: List[str] = []
+        self.unchanged: Set[str] = set()
+
+    @abstractmethod
+    def fetch(self, countries: List[str]):
+        """Conteúdo bruto dos países pedidos (uma busca para todos)"""
+        pass
+
+    @abstractmethod
+    def parse(self, raw, country: str) -> List[Row]:
+        """Linhas de um país extraídas do conteúdo bruto"""
+        pass
+
+    def commit(self, countries: List[str]) -> None:
+        """Chamado depois que os dados de `countries` foram gravados"""
+
+
+class FetchError(Exception):
+    """Endpoint sem resposta válida após todas as tentativas"""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status  # status HTTP do erro definitivo, se houver
+
+
+@dataclass(frozen=True)
+class Endpoint:
+    """Um recurso de uma fonte: URL e a série que ele alimenta"""
+    url: str
+    country: str
+    state: Optional[str] = None  # None: o parser informa o estado de cada linha
+    format: str = "json"
+
+
+class HttpClient:
+    """
+    Sessão HTTP compartilhada pelas threads: pool de conexões por host,
+    limite de requisições simultâneas por host, timeouts e novas tentativas
+    """
+
+    def __init__(self, max_per_host: int = MAX_PER_HOST, retries: int = RETRIES,
+                 backoff: float = BACKOFF, timeout=TIMEOUT):
+        self.max_per_host = max_per_host
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=MAX_WORKERS, pool_maxsize=max_per_host, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._hosts: Dict[str, threading.Semaphore] = {}
+        self._lock = threading.Lock()
+        self.attempts = 0  # requisições feitas, incluindo novas tentativas
+
+    def _host_slot(self, url: str) -> threading.Semaphore:
+        host = urlsplit(url).netloc
+        with self._lock:
+            return self._hosts.setdefault(host, threading.Semaphore(self.max_per_host))
+
+    def _delay(self, attempt: int, response: Optional[requests.Response]) -> float:
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), MAX_BACKOFF)
+        return min(self.backoff * 2 ** attempt, MAX_BACKOFF) * random.uniform(0.5, 1.0)
+
+    def get(self, url: str, headers=None, consume: Optional[Callable[[requests.Response], Any]] = None):
+        """
+        GET com novas tentativas; levanta FetchError se todas falharem.
+
+        `headers` é um dict ou uma função chamada a cada tentativa (ex.: Range
+        de um download parcial). Com `consume`, o corpo é lido em streaming
+        por consume(response), ainda dentro da vaga do host, e o retorno dela
+        é o resultado; uma interrupção durante a leitura conta como falha de
+        rede. Sem `consume`, retorna a resposta já lida.
+        """
+        slot = self._host_slot(url)
+        for attempt in range(self.retries + 1):
+            response = None
+            with slot:
+                with self._lock:
+                    self.attempts += 1
+                try:
+                    response = self.session.get(url, headers=headers() if callable(headers) else headers,
+                                                timeout=self.timeout, stream=consume is not None)
+                    if response.status_code not in RETRY_STATUSES:
+                        response.raise_for_status()
+                        return consume(response) if consume else response
+                    error = f"HTTP {response.status_code}"
+                except requests.HTTPError as e:
+                    raise FetchError(f"{url}: {e}", status=e.response.status_code) from e
+                except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError) as e:
+                    error = type(e).__name__
+                finally:
+                    if response is not None and consume:
+                        response.close()
+            # A espera acontece fora da vaga do host
+            if attempt < self.retries:
+                time.sleep(self._delay(attempt, response))
+        raise FetchError(f"{url}: {error} após {self.retries + 1} tentativas")
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class Connector(Source):
+    """
+    Fonte HTTP: `endpoints` declara os recursos de cada país e
+    `parse_response` converte o arquivo baixado de um endpoint em linhas
+    """
+
+    def __init__(self, cache: Optional[DownloadCache] = None):
+        super().__init__()
+        self.cache = cache or DownloadCache()
+        self._downloads: List[Tuple[Download, List[str]]] = []
+
+    @abstractmethod
+    def endpoints(self, countries: List[str]) -> List[Endpoint]:
+        """Recursos a buscar para os países pedidos"""
+        pass
+
+    @abstractmethod
+    def parse_response(self, endpoint: Endpoint, download: Download, country: str) -> List[Row]:
+        """Linhas de um país contidas no arquivo baixado de um endpoint"""
+        pass
+
+    def resolve_url(self, url: str) -> str:
+        """Aplica CONNECTOR_BASE_URLS[name] (esquema e host) à URL declarada"""
+        base = BASE_URLS.get(self.name)
+        if not base:
+            return url
+        parts, base_parts = urlsplit(url), urlsplit(base)
+        return urlunsplit((base_parts.scheme, base_parts.netloc, base_parts.path.rstrip("/") + parts.path,
+                           parts.query, ""))
+
+    def fetch(self, countries: List[str], client: Optional[HttpClient] = None) -> Dict[str, List[Tuple]]:
+        """Busca os endpoints em paralelo; retorna {país: [(endpoint, download)]}"""
+        endpoints = self.endpoints(countries)
+        own_client = client is None
+        client = client or HttpClient()
+
+        def fetch_one(endpoint: Endpoint):
+            url = self.resolve_url(endpoint.url)
+            try:
+                try:
+                    return endpoint, self.cache.fetch(client, url), None
+                except FetchError as e:
+                    if e.status != 416:
+                        raise
+                    # Retomada recusada: recomeça o download do início
+                    self.cache.discard_partial(url)
+                    return endpoint, self.cache.fetch(client, url), None
+            except FetchError as e:
+                return endpoint, None, str(e)
+
+        try:
+            with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, max(1, len(endpoints)))) as executor:
+                results = list(executor.map(fetch_one, endpoints))
+        finally:
+            if own_client:
+                client.close()
+
+        failures = [error for _, _, error in results if error]
+        if failures and len(failures) == len(results):
+            raise IngestionError(f"Nenhum endpoint de {self.name} respondeu: {'; '.join(failures)}")
+        self.warnings.extend(failures)
+
+        raw: Dict[str, List[Tuple]] = {}
+        skipped: Set[str] = set()
+        failed: Set[str] = set()
+        for endpoint, download, error in results:
+            # Um endpoint sem país (ex.: arquivo com todos os países) atende a todos
+            targets = [endpoint.country] if endpoint.country else countries
+            if download is None:
+                failed.update(targets)
+                continue
+            self._downloads.append((download, targets))
+            for country in targets:
+                if download.not_modified and country in download.ingested and not self.force:
+                    skipped.add(country)  # versão já ingerida: nem interpreta
+                else:
+                    raw.setdefault(country, []).append((endpoint, download))
+        self.unchanged = skipped - failed - set(raw)
+        return raw
+
+    def parse(self, raw: Dict[str, List[Tuple]], country: str) -> List[Row]:
+        return [row for endpoint, download in raw.get(country, [])
+                for row in self.parse_response(endpoint, download, country)]
+
+    def commit(self, countries: List[str]) -> None:
+        for download, targets in self._downloads:
+            self.cache.mark_ingested(download.url, [country for country in targets if country in countries])
+
+
+class OwidConnector(Connector):
+    """Our World in Data: people_fully_vaccinated e total_deaths (séries acumuladas)"""
+    name = "owid"
+    URL = "https://covid.ourworldindata.org/data/owid-covid-data.json"
+    COUNTRY_NAMES = {
+        "brasil": "Brazil",
+        "portugal": "Portugal",
+        "italia": "Italy",
+        "usa": "United States",
+    }
+    countries = list(COUNTRY_NAMES)
+
+    def __init__(self, cache: Optional[DownloadCache] = None):
+        super().__init__(cache)
+        self._documents: Dict[int, Dict] = {}
+        self._lock = threading.Lock()
+
+    def endpoints(self, countries: List[str]) -> List[Endpoint]:
+        # Um único arquivo com todos os países, interpretado uma vez
+        return [Endpoint(self.URL, country="")]
+
+    def _document(self, download: Download) -> Dict:
+        with self._lock:
+            if id(download) not in self._documents:
+                try:
+                    self._documents[id(download)] = download.json()
+                except ValueError as e:
+                    raise IngestionError(f"Resposta inválida da OWID: {e}") from e
+            return self._documents[id(download)]
+
+    def _country_data(self, raw: Dict, name: str) -> Optional[Dict]:
+        # O arquivo é indexado pelo código ISO, com o nome em "location"
+        if name in raw:
+            return raw[name]
+        return next((entry for entry in raw.values()
+                     if isinstance(entry, dict) and entry.get("location") == name), None)
+
+    def parse_response(self, endpoint: Endpoint, download: Download, country: str) -> List[Row]:
+        country_data = self._country_data(self._document(download), self.COUNTRY_NAMES[country])
+        if not country_data:
+            return []
+
+        rows = []
+        for entry in country_data.get("data", []):
+            try:
+                vaccinated = int(entry.get("people_fully_vaccinated") or 0)
+                deaths = int(entry.get("total_deaths") or 0)
+                if not entry.get("date") or (vaccinated == 0 and deaths == 0):
+                    continue
+                day = datetime.strptime(entry["date"], "%Y-%m-%d").date()
+                rows.append((NATIONAL, day, vaccinated, deaths, int(entry.get("population") or 0)))
+            except (TypeError, ValueError):
+                continue  # entrada malformada: as demais seguem
+        return rows
+
+
+def load_feeds(path=None) -> List[Dict]:
+    """
+    Feeds configurados (arquivo JSON): lista de
+    {"url", "country", "state" (opcional), "format": "csv" | "json"}
+    """
+    path = path or FEEDS_FILE
+    if not path:
+        return []
+    with open(path, encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+class FeedConnector(Connector):
+    """
+    Feeds de ministérios e secretarias estaduais em CSV ou JSON com as colunas
+    do upload de CSV: date, vaccinated, deaths, population e, se o feed não
+    declarar o estado, state_or_region
+    """
+    name = "feeds"
+
+    def __init__(self, feeds: Optional[List[Dict]] = None, cache: Optional[DownloadCache] = None):
+        super().__init__(cache)
+        self.feeds = load_feeds() if feeds is None else feeds
+        self.countries = sorted({feed["country"] for feed in self.feeds})
+
+    def endpoints(self, countries: List[str]) -> List[Endpoint]:
+        return [
+            Endpoint(feed["url"], feed["country"], feed.get("state"), feed.get("format", "json"))
+            for feed in self.feeds if feed["country"] in countries
+        ]
+
+    def parse_response(self, endpoint: Endpoint, download: Download, country: str) -> List[Row]:
+        if endpoint.format == "csv":
+            records = csv.DictReader(io.StringIO(download.content.decode("utf-8-sig")))
+        else:
+            try:
+                records = download.json()
+            except ValueError as e:
+                raise IngestionError(f"Resposta inválida de {endpoint.url}: {e}") from e
+
+        rows = []
+        for record in records:
+            try:
+                state = endpoint.state or (record.get("state_or_region") or "").strip() or NATIONAL
+                day = date.fromisoformat(str(record["date"]).strip())
+                rows.append((state, day, int(record["vaccinated"]), int(record["deaths"]),
+                             int(record["population"])))
+            except (KeyError, TypeError, ValueError):
+                continue  # linha malformada: as demais seguem
+        return rows
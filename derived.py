@@ -0,0 +1,42 @@
+"""
+Atualização dos dados derivados após cada ingestão
+
+Ponto único chamado por manage.py ingest, upload_csv e CSVImporter depois de gravar
+linhas em VaccineData: mantém em dia as taxas per capita, os snapshots (última
+leitura por série) e as métricas diárias (variações e médias móveis),
+publica os agregados mapeados em memória lidos pelos workers
+(vaccine.aggregates) e registra a nova versão do dataset anunciada em
+/api/events/. Nessa ordem: quando o dashboard recebe o aviso e busca os
+dados de novo, os agregados já incluem a alteração.
+"""
+from datetime import date
+from typing import Iterable, Optional
+from .aggregates import publish_aggregates
+from .events import record_data_change
+from .metrics import refresh_daily_metrics, refresh_rates
+from .snapshots import CUMULATIVE, refresh_snapshots, resolve_semantics
+
+
+def refresh_derived_data(country: str, source: str, semantics: Optional[str] = None,
+                         states: Optional[Iterable[str]] = None,
+                         since: Optional[date] = None) -> int:
+    """
+    Atualiza taxas, snapshots e métricas diárias de um país.
+    `since` é a data mais antiga alterada pela ingestão (None recalcula tudo).
+    Retorna a nova versão do dataset.
+    """
+    semantics = resolve_semantics(source, semantics)
+    states = list(states) if states is not None else None
+
+    if semantics == CUMULATIVE:
+        # Em séries incrementais o valor diário não representa cobertura
+        refresh_rates(country, states=states, since=since)
+    refresh_snapshots(country, source=source, semantics=semantics, states=states)
+    refresh_daily_metrics(country, cumulative=semantics == CUMULATIVE, states=states, since=since)
+    try:
+        publish_aggregates([country])
+    finally:
+        # Mesmo se a publicação falhar os dados mudaram: a versão nova invalida
+        # os arquivos gerados (vaccine.jobs) e as consultas ao banco
+        version = record_data_change([country], source=source)
+    return version
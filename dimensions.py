@@ -0,0 +1,208 @@
+"""
+Dimensões de país e estado/região (codificação em dicionário)
+
+VaccineData e DailyMetric têm uma linha por série e dia: repetir o nome do
+país e do estado em cada linha (e de novo no índice único) multiplica o
+tamanho das tabelas, dos índices e das páginas em cache. Essas colunas
+guardam o id (smallint) de uma linha de Country ou Region, e DimensionField
+converte nos dois sentidos com um dicionário em memória por processo:
+
+- as consultas continuam usando os nomes: filter(country="brasil"),
+  state_or_region__in=[...] e values("state_or_region") aceitam e devolvem
+  texto, e as respostas da API não mudam
+- gravações (save, bulk_create) cadastram os nomes novos na dimensão
+- um nome desconhecido numa consulta não corresponde a nenhuma linha
+
+Só as consultas exact, in e isnull são suportadas; buscas por trecho do nome
+são feitas na dimensão (Region.objects.filter(name__icontains=...)).
+Ordenar por essas colunas segue o id, isto é, a ordem de cadastro.
+
+Os dicionários valem para um estado do dataset (último DataChange): a cada
+requisição que usa as dimensões, uma consulta confere se ele mudou. Se o
+banco foi trocado (data_snapshot restore --force) ou outro processo gravou,
+os dicionários são descartados e relidos, em vez de traduzir ids com o
+mapeamento antigo.
+"""
+import threading
+from typing import Dict, Optional, Set, Tuple
+from django.apps import apps
+from django.core.signals import request_started
+from django.db import IntegrityError, models, transaction
+from django.utils.functional import cached_property
+
+# Incrementado a cada requisição: o estado do dataset é conferido no máximo
+# uma vez por requisição (e uma vez em processos sem requisições)
+_generation = 0
+_checked_generation = -1
+_dataset_state: Optional[Tuple] = None
+
+
+def _request_started(**kwargs) -> None:
+    global _generation
+    _generation += 1
+
+
+request_started.connect(_request_started, dispatch_uid="vaccine.dimensions")
+
+
+def _validate() -> None:
+    """Descarta os dicionários se o dataset mudou desde que foram carregados"""
+    global _checked_generation, _dataset_state
+    if _checked_generation == _generation:
+        return
+    # id e data do último DataChange: um banco restaurado de outro estado
+    # nunca tem os dois iguais aos do banco anterior
+    state = apps.get_model("vaccine.DataChange").objects.order_by("-id").values_list("id", "created_at").first()
+    if state != _dataset_state:
+        clear_cache()
+        _dataset_state = state
+    _checked_generation = _generation
+
+
+MAX_MISSING = 1000  # nomes no cache negativo de cada dimensão
+
+
+class Dictionary:
+    """Nomes e ids de uma dimensão; recarregado do banco quando falta um valor"""
+
+    def __init__(self, label: str):
+        self.label = label
+        self.ids: Dict[str, int] = {}
+        self.names: Dict[int, str] = {}
+        # Cadastrados em uma transação ainda não confirmada: podem ser desfeitos
+        self.pending: Set[str] = set()
+        # Nomes procurados e ausentes da dimensão (cache negativo): um nome
+        # inexistente numa consulta não relê a tabela a cada requisição.
+        # Esquecidos quando esta ou outra gravação cadastra nomes
+        self.missing: Set[str] = set()
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        return apps.get_model(self.label)
+
+    def _load(self) -> Dict[str, int]:
+        rows = dict(self.model.objects.values_list("name", "id"))
+        with self._lock:
+            self.ids = {name: id for name, id in rows.items() if name not in self.pending}
+            self.names = {id: name for name, id in self.ids.items()}
+            self.missing.difference_update(rows)
+        return rows
+
+    def _remember(self, name: str, id: int) -> None:
+        with self._lock:
+            self.pending.discard(name)
+            self.missing.discard(name)
+            self.ids[name] = id
+            self.names[id] = name
+
+    def id_of(self, name: str, create: bool = False) -> Optional[int]:
+        _validate()
+        id = self.ids.get(name)
+        if id is None and (create or name not in self.missing):
+            id = self._load().get(name)
+            if id is None and not create:
+                with self._lock:
+                    if len(self.missing) >= MAX_MISSING:
+                        self.missing.clear()  # nomes arbitrários vindos da URL
+                    self.missing.add(name)
+        if id is None and create:
+            id = self._create(name)
+        return id
+
+    def name_of(self, id: int) -> Optional[str]:
+        _validate()
+        name = self.names.get(id)
+        if name is None:
+            name = next((name for name, row_id in self._load().items() if row_id == id), None)
+        return name
+
+    def _create(self, name: str) -> int:
+        try:
+            with transaction.atomic():
+                id = self.model.objects.create(name=name).pk
+        except IntegrityError:
+            id = self.model.objects.get(name=name).pk  # cadastrado por outro processo
+            if name not in self.pending:
+                self._remember(name, id)
+            return id
+        if transaction.get_connection().in_atomic_block:
+            with self._lock:
+                self.pending.add(name)
+            transaction.on_commit(lambda: self._remember(name, id))
+        else:
+            self._remember(name, id)
+        return id
+
+    def clear(self) -> None:
+        with self._lock:
+            self.ids, self.names, self.missing = {}, {}, set()
+
+
+_dictionaries: Dict[str, Dictionary] = {}
+_dictionaries_lock = threading.Lock()
+
+
+def dictionary(label: str) -> Dictionary:
+    with _dictionaries_lock:
+        return _dictionaries.setdefault(label, Dictionary(label))
+
+
+def clear_cache() -> None:
+    """Esquece os dicionários (ex.: depois de trocar o arquivo do banco)"""
+    global _checked_generation
+    _checked_generation = -1
+    for entry in list(_dictionaries.values()):
+        entry.clear()
+
+
+class DimensionField(models.SmallIntegerField):
+    """
+    Coluna smallint com o id de uma linha da dimensão `to` ("app.Modelo",
+    com campo `name`); no Python o valor é o nome
+    """
+    description = "Nome codificado pelo id de uma dimensão"
+    LOOKUPS = {"exact", "in", "isnull"}
+
+    def __init__(self, to: str, *args, **kwargs):
+        self.to = to
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs["to"] = self.to
+        return name, path, args, kwargs
+
+    @property
+    def dictionary(self) -> Dictionary:
+        return dictionary(self.to)
+
+    @cached_property
+    def validators(self):
+        # Os limites do smallint valem para o id, não para o nome
+        return list(self._validators)
+
+    def get_lookup(self, lookup_name):
+        if lookup_name not in self.LOOKUPS:
+            return None
+        return super().get_lookup(lookup_name)
+
+    def from_db_value(self, value, expression, connection):
+        return None if value is None else self.dictionary.name_of(value)
+
+    def to_python(self, value):
+        return None if value is None else str(value)
+
+    def get_prep_value(self, value):
+        # Consulta: um nome fora da dimensão vira um id inexistente (0)
+        if value is None:
+            return None
+        return self.dictionary.id_of(str(value)) or 0
+
+    def get_db_prep_save(self, value, connection):
+        if value is None:
+            return None
+        return self.dictionary.id_of(str(value), create=True)
+
+    def formfield(self, **kwargs):
+        return models.Field.formfield(self, **kwargs)  # texto, não número
@@ -0,0 +1,231 @@
+"""
+Cache em disco dos arquivos baixados pelos conectores (vaccine.connectors)
+
+Para cada URL são guardados o corpo comprimido (gzip) e os validadores da
+resposta (ETag, Last-Modified). Os downloads seguintes são condicionais
+(If-None-Match / If-Modified-Since): um 304 reaproveita o arquivo do cache
+sem transferir o corpo, e o conector nem o interpreta se essa versão já foi
+ingerida para o país.
+
+O corpo é gravado em um arquivo parcial à medida que chega. Um download
+interrompido (queda de conexão, timeout, processo encerrado) é retomado de
+onde parou com Range e If-Range, na próxima tentativa ou na próxima
+execução; se o arquivo mudou no servidor, a resposta é 200 e o download
+recomeça do início.
+
+Arquivos em DOWNLOAD_CACHE_DIR, por URL (sha1 da URL):
+- {chave}.gz         corpo completo, comprimido
+- {chave}.json       validadores, tamanhos e países em que a versão foi ingerida
+- {chave}.part       download em andamento (bytes como recebidos)
+- {chave}.part.json  validadores e codificação da resposta do parcial
+"""
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+from dataclasses import dataclass, field
+from functools import cached_property
+from pathlib import Path
+from typing import Dict, Optional, Set
+import requests
+import urllib3
+from django.conf import settings
+from django.utils import timezone
+
+DOWNLOAD_CACHE_DIR = Path(getattr(settings, "DOWNLOAD_CACHE_DIR", settings.BASE_DIR / "cache" / "downloads"))
+CHUNK_SIZE = 1 << 16
+
+DOWNLOADED = "downloaded"
+RESUMED = "resumed"
+NOT_MODIFIED = "not_modified"
+
+CONTENT_RANGE = re.compile(r"bytes (\d+)-(\d+)/(\d+|\*)")
+
+
+@dataclass
+class Download:
+    """Arquivo obtido pelo cache; o corpo é descomprimido só quando lido"""
+    url: str
+    path: Path
+    status: str
+    version: str
+    transferred: int = 0  # bytes recebidos nesta busca
+    ingested: Set[str] = field(default_factory=set)  # países em que esta versão já foi ingerida
+
+    @property
+    def not_modified(self) -> bool:
+        return self.status == NOT_MODIFIED
+
+    @cached_property
+    def content(self) -> bytes:
+        with gzip.open(self.path, "rb") as handle:
+            return handle.read()
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class DownloadCache:
+    """Cache de downloads compartilhado pelas threads de um conector"""
+
+    def __init__(self, directory: Path = DOWNLOAD_CACHE_DIR):
+        self.directory = Path(directory)
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def _paths(self, url: str) -> Dict[str, Path]:
+        key = hashlib.sha1(url.encode()).hexdigest()
+        return {
+            "body": self.directory / f"{key}.gz",
+            "meta": self.directory / f"{key}.json",
+            "part": self.directory / f"{key}.part",
+            "part_meta": self.directory / f"{key}.part.json",
+        }
+
+    def _url_lock(self, url: str) -> threading.Lock:
+        with self._lock:
+            return self._locks.setdefault(url, threading.Lock())
+
+    def entry(self, url: str) -> Optional[Dict]:
+        """Metadados da versão guardada da URL, ou None"""
+        paths = self._paths(url)
+        if not paths["body"].exists():
+            return None
+        return _read_json(paths["meta"])
+
+    def fetch(self, client, url: str) -> Download:
+        """
+        Busca a URL pelo HttpClient `client` (condicional ou retomando o
+        parcial) e devolve o arquivo guardado. Erros vêm de client.get.
+        """
+        paths = self._paths(url)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with self._url_lock(url):
+            entry = self.entry(url)
+            return client.get(url, headers=lambda: self._headers(paths, entry),
+                              consume=lambda response: self._consume(url, paths, entry, response))
+
+    def discard_partial(self, url: str) -> None:
+        """Descarta o download parcial (ex.: o servidor recusou a retomada com 416)"""
+        paths = self._paths(url)
+        for path in (paths["part"], paths["part_meta"]):
+            path.unlink(missing_ok=True)
+
+    def mark_ingested(self, url: str, countries) -> None:
+        """Registra que a versão guardada foi ingerida para `countries`"""
+        paths = self._paths(url)
+        with self._url_lock(url):
+            entry = self.entry(url)
+            if entry is not None:
+                entry["ingested"] = sorted(set(entry.get("ingested", [])) | set(countries))
+                _write_json(paths["meta"], entry)
+
+    def _partial(self, paths: Dict[str, Path]) -> Optional[Dict]:
+        """Parcial retomável: tamanho e validador para If-Range"""
+        part_meta = _read_json(paths["part_meta"])
+        if not part_meta or not part_meta.get("validator") or not paths["part"].exists():
+            return None
+        size = paths["part"].stat().st_size
+        return {**part_meta, "size": size} if size else None
+
+    def _headers(self, paths: Dict[str, Path], entry: Optional[Dict]) -> Dict[str, str]:
+        # Só gzip: o parcial guarda os bytes como recebidos e vira o arquivo comprimido
+        headers = {"Accept-Encoding": "gzip"}
+        partial = self._partial(paths)
+        if partial:
+            headers["Range"] = f"bytes={partial['size']}-"
+            headers["If-Range"] = partial["validator"]
+        elif entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def _consume(self, url: str, paths: Dict[str, Path], entry: Optional[Dict],
+                 response: requests.Response) -> Download:
+        if response.status_code == 304:
+            if not entry:
+                raise requests.ConnectionError("304 sem cópia no cache")
+            return Download(url, paths["body"], NOT_MODIFIED, _version(entry),
+                            ingested=set(entry.get("ingested", [])))
+
+        partial = self._partial(paths) if response.status_code == 206 else None
+        if response.status_code == 206:
+            match = CONTENT_RANGE.match(response.headers.get("Content-Range", ""))
+            if not partial or not match or int(match.group(1)) != partial["size"]:
+                self.discard_partial(url)
+                raise requests.ConnectionError(f"Content-Range inesperado: {response.headers.get('Content-Range')}")
+            part_meta = partial
+        else:
+            etag = response.headers.get("ETag")
+            part_meta = {
+                "etag": etag,
+                "last_modified": response.headers.get("Last-Modified"),
+                "encoding": response.headers.get("Content-Encoding", "identity"),
+                # ETag fraco não vale em If-Range
+                "validator": etag if etag and not etag.startswith("W/") else response.headers.get("Last-Modified"),
+            }
+            _write_json(paths["part_meta"], part_meta)
+
+        transferred = 0
+        with open(paths["part"], "ab" if partial else "wb") as handle:
+            try:
+                for chunk in response.raw.stream(CHUNK_SIZE, decode_content=False):
+                    handle.write(chunk)
+                    transferred += len(chunk)
+            except urllib3.exceptions.HTTPError as e:
+                # Interrompido: o que chegou fica no parcial para a retomada
+                raise requests.ConnectionError(e) from e
+
+        entry = self._complete(paths, part_meta)
+        return Download(url, paths["body"], RESUMED if partial else DOWNLOADED, _version(entry), transferred)
+
+    def _complete(self, paths: Dict[str, Path], part_meta: Dict) -> Dict:
+        """Converte o parcial completo no arquivo comprimido do cache"""
+        size = paths["part"].stat().st_size
+        encoding = part_meta.get("encoding", "identity")
+        if encoding == "gzip":
+            os.replace(paths["part"], paths["body"])
+        elif encoding == "identity":
+            tmp = paths["body"].with_suffix(".gz.tmp")
+            with open(paths["part"], "rb") as source, gzip.open(tmp, "wb", compresslevel=6) as target:
+                shutil.copyfileobj(source, target, CHUNK_SIZE)
+            os.replace(tmp, paths["body"])
+            paths["part"].unlink()
+        else:
+            for path in (paths["part"], paths["part_meta"]):
+                path.unlink(missing_ok=True)
+            raise requests.ConnectionError(f"Content-Encoding não suportado: {encoding}")
+
+        entry = {
+            "etag": part_meta.get("etag"),
+            "last_modified": part_meta.get("last_modified"),
+            "size": size,
+            "stored": paths["body"].stat().st_size,
+            "downloaded_at": timezone.now().isoformat(),
+            "ingested": [],
+        }
+        _write_json(paths["meta"], entry)
+        paths["part_meta"].unlink(missing_ok=True)
+        return entry
+
+
+def _version(entry: Dict) -> str:
+    return entry.get("etag") or entry.get("last_modified") or entry.get("downloaded_at", "")
+
+
+def _read_json(path: Path) -> Optional[Dict]:
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path: Path, data: Dict) -> None:
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(data))
+    os.replace(tmp, path)
@@ -0,0 +1,90 @@
+"""
+Download de arquivos gerados com suporte a HTTP Range
+
+Permite retomar downloads grandes (exportações) de onde pararam: o cliente
+envia `Range: bytes=<início>-[<fim>]` e recebe 206 com apenas esse trecho.
+If-Range com o ETag do arquivo garante que a retomada é do mesmo arquivo.
+Apenas um intervalo por requisição é suportado; múltiplos intervalos recebem
+o arquivo inteiro (permitido pela RFC 9110).
+"""
+import os
+import re
+from typing import Iterator, Optional, Tuple
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.http import content_disposition_header
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+CHUNK_SIZE = 64 * 1024
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Intervalo (início, fim inclusive) pedido no header Range.
+    None quando não há Range utilizável; ValueError quando é insatisfazível.
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if match is None:
+        return None
+
+    start, end = match.groups()
+    if not start and not end:
+        return None
+    if not start:
+        # bytes=-500: os últimos 500 bytes
+        length = int(end)
+        if length == 0 or size == 0:
+            raise ValueError("intervalo vazio")
+        return max(size - length, 0), size - 1
+
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        raise ValueError("intervalo fora do arquivo")
+    return start, end
+
+
+def _iter_file(path: str, start: int, length: int) -> Iterator[bytes]:
+    with open(path, "rb") as file:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def ranged_file_response(request, path: str, content_type: str, filename: str,
+                         etag: Optional[str] = None) -> HttpResponse:
+    """Resposta de download completa (200) ou parcial (206) para `path`"""
+    size = os.path.getsize(path)
+    etag = f'"{etag}"' if etag else None
+
+    range_header = request.headers.get("Range")
+    if_range = request.headers.get("If-Range")
+    if if_range and if_range != etag:
+        # O arquivo mudou desde o download parcial: envia tudo de novo
+        range_header = None
+
+    try:
+        byte_range = parse_range(range_header, size)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return response
+
+    if byte_range is None:
+        response = FileResponse(open(path, "rb"), as_attachment=True, filename=filename,
+                                content_type=content_type)
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(_iter_file(path, start, end - start + 1),
+                                         status=206, content_type=content_type)
+        response["Content-Length"] = str(end - start + 1)
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+        response["Content-Disposition"] = content_disposition_header(True, filename)
+
+    response["Accept-Ranges"] = "bytes"
+    if etag:
+        response["ETag"] = etag
+    return response
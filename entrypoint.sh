@@ -2,11 +2,26 @@
 
 set -e
 
+# Snapshot gerado no build da imagem (ou com `manage.py data_snapshot build`):
+# restaurado em segundos, só se o banco ainda não tiver dados
+if [ -f "${DATA_SEED_PATH:-/app/seed/data.sqlite3}" ]; then
+    echo "Restaurando snapshot dos dados..."
+    python manage.py data_snapshot restore || echo "Aviso: Falha ao restaurar o snapshot"
+fi
+
 echo "Executando migrações do Django..."
 python manage.py migrate --noinput
 
-echo "Carregando dados de exemplo..."
-python /app/scripts/collect_data.py || echo "Aviso: Falha ao coletar dados, usando dados de exemplo"
+# Agregados compartilhados pelos workers (mapeados em memória), do banco atual
+python manage.py publish_aggregates || echo "Aviso: Falha ao publicar agregados; consultas usarão o banco"
+
+# A coleta roda em segundo plano, com o servidor já aceitando requisições;
+# /api/ready/ informa a versão e a idade dos dados enquanto isso. Com
+# INGEST_ON_START=0 a atualização fica só com o agendamento (manage.py ingest)
+if [ "${INGEST_ON_START:-1}" = "1" ]; then
+    echo "Atualizando dados em segundo plano..."
+    (python manage.py ingest --source owid --fallback sample || echo "Aviso: Falha ao coletar dados") &
+fi
 
 echo "Iniciando servidor Django..."
 exec "$@"
@@ -0,0 +1,110 @@
+"""
+Versão do conjunto de dados e notificações (Server-Sent Events)
+
+Cada ingestão grava um DataChange; o id é a versão do dataset. O endpoint
+/api/events/ mantém conexões SSE abertas e anuncia as novas versões com os
+países afetados, para que o dashboard atualize apenas os gráficos impactados.
+
+Em cada processo ASGI um único poller consulta o banco e distribui as mudanças
+para as filas de todas as conexões, então milhares de clientes ociosos custam
+apenas uma corrotina cada.
+"""
+import asyncio
+import json
+from typing import Dict, Iterable, List, Optional, Set
+from django.conf import settings
+from django.db.models import Max
+from .models import DataChange
+
+POLL_INTERVAL = getattr(settings, "EVENTS_POLL_INTERVAL", 2.0)  # segundos
+HEARTBEAT_INTERVAL = getattr(settings, "EVENTS_HEARTBEAT_INTERVAL", 20.0)
+RECONNECT_DELAY_MS = getattr(settings, "EVENTS_RECONNECT_DELAY_MS", 5000)
+QUEUE_SIZE = 32
+
+
+def record_data_change(countries: Iterable[str], source: str = "") -> int:
+    """Registra uma alteração dos dados e retorna a nova versão"""
+    change = DataChange.objects.create(countries=sorted(set(countries)), source=source)
+    return change.id
+
+
+def dataset_version() -> int:
+    """Versão atual do dataset (maior id de DataChange, 0 se vazio)"""
+    return DataChange.objects.aggregate(version=Max("id"))["version"] or 0
+
+
+async def adataset_version() -> int:
+    """Versão atual do dataset (versão assíncrona)"""
+    return (await DataChange.objects.aaggregate(version=Max("id")))["version"] or 0
+
+
+async def achanges_since(version: int, limit: int = 500) -> List[Dict]:
+    """Alterações posteriores a `version`, em ordem"""
+    return [
+        {"version": change.id, "countries": change.countries}
+        async for change in DataChange.objects.filter(id__gt=version).order_by("id")[:limit]
+    ]
+
+
+def format_event(event: str, data: Dict, event_id: Optional[int] = None) -> str:
+    """Serializa um evento no formato text/event-stream"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data)}")
+    return "\n".join(lines) + "\n\n"
+
+
+class ChangeBroadcaster:
+    """
+    Distribui as alterações do dataset para as conexões SSE do processo.
+    O poller só roda enquanto houver pelo menos um assinante.
+    """
+
+    def __init__(self, interval: float = POLL_INTERVAL):
+        self._interval = interval
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._version: Optional[int] = None
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self._subscribers.add(queue)
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._poll())
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+
+    def _publish(self, change: Dict) -> None:
+        for queue in self._subscribers:
+            if queue.full():
+                # Cliente lento: descarta o evento mais antigo
+                queue.get_nowait()
+            queue.put_nowait(change)
+
+    async def _poll(self) -> None:
+        if self._version is None:
+            self._version = await adataset_version()
+
+        while self._subscribers:
+            await asyncio.sleep(self._interval)
+            try:
+                changes = await achanges_since(self._version)
+            except Exception:
+                continue
+            for change in changes:
+                self._version = change["version"]
+                self._publish(change)
+
+        # Sem assinantes: a próxima conexão parte da versão atual
+        self._version = None
+
+
+broadcaster = ChangeBroadcaster()
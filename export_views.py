@@ -0,0 +1,281 @@
+"""
+Endpoints de arquivos: importação de CSV (simples e em partes), relatórios
+PowerPoint e exportações
+
+Separados de views para que as rotas JSON do dashboard não importem as
+dependências pesadas: pandas (vaccine.imports), python-pptx
+(vaccine.presentation) e openpyxl são carregados apenas na primeira
+importação, relatório ou exportação atendida pelo worker.
+"""
+from rest_framework.response import Response
+from rest_framework.decorators import api_view
+from rest_framework import status
+from django.conf import settings
+from django.http import FileResponse
+from .models import VaccineData, ArtifactJob, UploadSession
+from .snapshots import resolve_semantics
+from .queries import parse_countries
+from .downloads import ranged_file_response
+from .admission import limit_concurrency
+from . import exports, jobs, uploads
+import csv
+import os
+import tempfile
+from datetime import datetime
+
+# Espera curta em export-powerpoint: um relatório já gerado (ou rápido) sai na
+# hora; os demais respondem 202 e o cliente acompanha em /api/reports/<id>/
+REPORT_WAIT = min(getattr(settings, "REPORT_WAIT", 1), 2)
+
+@limit_concurrency("upload_csv")
+@api_view(["POST"])
+def upload_csv(request):
+    """Upload de arquivo CSV para importar dados"""
+    if 'file' not in request.FILES:
+        return Response({"error": "Nenhum arquivo enviado"}, status=status.HTTP_400_BAD_REQUEST)
+    
+    csv_file = request.FILES['file']
+    country_name = request.POST.get('country', 'custom_country')
+    
+    # Semântica das séries importadas: "cumulative" (padrão) ou "incremental"
+    try:
+        semantics = resolve_semantics("csv", request.POST.get('semantics'))
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        # Leitura em blocos com validação vetorizada (vaccine.imports, usa pandas)
+        from .imports import import_csv
+        summary = import_csv(csv_file, country_name, semantics)
+    except Exception as e:
+        return Response({
+            "error": f"Erro ao processar arquivo: {str(e)}"
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response({
+        "success": True,
+        "message": f"{summary['imported_count']} registros importados com sucesso",
+        "imported_count": summary["imported_count"],
+        "errors_count": summary["errors_count"],
+        # Primeiros MAX_ERRORS erros: {line, column, value, error}
+        "errors": summary["errors"],
+    })
+
+def _report_options(request):
+    """Opções do relatório: query string ou, no POST, o corpo (form ou JSON)"""
+    data = request.data if request.method == "POST" else request.GET
+    if hasattr(data, "getlist"):
+        return {"countries": parse_countries(data)}
+    return {"countries": data.get("countries")}
+
+def _artifact_response(request, job):
+    """Download de um arquivo já gerado (aceita Range para retomar downloads)"""
+    meta = jobs.describe(job)
+    return ranged_file_response(request, job.path, meta["content_type"], meta["filename"], etag=job.key)
+
+def _get_job(job_id, kind):
+    return ArtifactJob.objects.filter(pk=job_id, kind=kind).first()
+
+def _submit_response(kind, options):
+    """Agenda (ou reaproveita) um job: 200 se o arquivo já existe, 202 caso contrário"""
+    try:
+        job = jobs.submit(kind, options)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    ready = job.status == ArtifactJob.DONE
+    return Response(jobs.job_payload(job), status=status.HTTP_200_OK if ready else status.HTTP_202_ACCEPTED)
+
+def _job_status_response(job_id, kind):
+    job = _get_job(job_id, kind)
+    if job is None:
+        return Response({"error": "Arquivo não encontrado"}, status=status.HTTP_404_NOT_FOUND)
+    return Response(jobs.job_payload(job))
+
+def _download_response(request, job_id, kind):
+    job = _get_job(job_id, kind)
+    if job is None or job.status != ArtifactJob.DONE or not os.path.exists(job.path):
+        return Response({"error": "Arquivo não disponível"}, status=status.HTTP_404_NOT_FOUND)
+    return _artifact_response(request, job)
+
+@limit_concurrency("export_powerpoint")
+@api_view(["GET"])
+def export_powerpoint(request):
+    """
+    Gera apresentação PowerPoint com as análises. O arquivo é gerado em
+    segundo plano e reaproveitado enquanto a versão do dataset não mudar;
+    se não ficar pronto em REPORT_WAIT segundos (no máximo 2), responde 202
+    com o job e o endereço de acompanhamento em Location, sem prender o worker.
+    """
+    try:
+        job = jobs.wait(jobs.submit("powerpoint", _report_options(request)), timeout=REPORT_WAIT)
+    except Exception as e:
+        return Response({
+            "error": f"Erro ao gerar PowerPoint: {str(e)}"
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    if job.status == ArtifactJob.DONE:
+        return _artifact_response(request, job)
+    if job.status == ArtifactJob.FAILED:
+        return Response({
+            "error": f"Erro ao gerar PowerPoint: {job.error}"
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    return Response(jobs.job_payload(job), status=status.HTTP_202_ACCEPTED,
+                    headers={"Location": f"/api/reports/{job.id}/"})
+
+@api_view(["POST"])
+def create_report(request):
+    """Agenda (ou reaproveita) a geração de um relatório PowerPoint"""
+    return _submit_response("powerpoint", _report_options(request))
+
+@api_view(["GET"])
+def get_report(request, job_id):
+    """Estado de um job de relatório"""
+    return _job_status_response(job_id, "powerpoint")
+
+@api_view(["GET"])
+def download_report(request, job_id):
+    """Download do arquivo de um job concluído"""
+    return _download_response(request, job_id, "powerpoint")
+
+@api_view(["POST"])
+def create_export(request):
+    """
+    Agenda uma exportação filtrada: countries, states, date_from, date_to,
+    columns e format (csv.gz, parquet ou xlsx). Pedidos idênticos para a mesma
+    versão do dataset compartilham o mesmo job.
+    """
+    data = request.data
+    if hasattr(data, "getlist"):
+        data = {key: ",".join(data.getlist(key)) for key in data.keys()}
+    return _submit_response("export", data)
+
+@api_view(["GET"])
+def get_export(request, job_id):
+    """Estado de um job de exportação"""
+    return _job_status_response(job_id, "export")
+
+@api_view(["GET"])
+def download_export(request, job_id):
+    """Download de uma exportação concluída (com suporte a Range)"""
+    return _download_response(request, job_id, "export")
+
+def _get_upload(upload_id):
+    return UploadSession.objects.filter(pk=upload_id).first()
+
+@api_view(["POST"])
+def create_upload(request):
+    """
+    Inicia um upload de CSV em partes: country, size (bytes), filename,
+    semantics e chunk_size opcionais. Responde com o tamanho das partes.
+    """
+    data = request.data
+    try:
+        upload = uploads.create_upload(
+            data.get("country"), data.get("size"), semantics=data.get("semantics"),
+            filename=data.get("filename") or "", chunk_size=data.get("chunk_size"),
+        )
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(uploads.upload_payload(upload), status=status.HTTP_201_CREATED)
+
+@api_view(["GET"])
+def get_upload(request, upload_id):
+    """
+    Estado do upload: bytes recebidos, próxima parte e resumo da importação.
+    Depois do finalize o cliente só consulta esta rota, então é aqui que um
+    leitor morto (worker reiniciado) é retomado.
+    """
+    upload = _get_upload(upload_id)
+    if upload is None:
+        return Response({"error": "Upload não encontrado"}, status=status.HTTP_404_NOT_FOUND)
+    uploads.ensure_parser(upload)
+    return Response(uploads.upload_payload(upload))
+
+@api_view(["PUT"])
+def upload_chunk(request, upload_id, index):
+    """Recebe a parte `index` (corpo bruto da requisição, gravado em fluxo)"""
+    upload = _get_upload(upload_id)
+    if upload is None:
+        return Response({"error": "Upload não encontrado"}, status=status.HTTP_404_NOT_FOUND)
+    try:
+        upload = uploads.write_chunk(upload, index, request.stream)
+    except uploads.ChunkConflict as e:
+        return Response({**uploads.upload_payload(upload), "error": str(e)}, status=status.HTTP_409_CONFLICT)
+    except ValueError as e:
+        return Response({**uploads.upload_payload(upload), "error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(uploads.upload_payload(upload))
+
+@api_view(["POST"])
+def finalize_upload(request, upload_id):
+    """Encerra o envio; a importação termina em segundo plano (acompanhe via GET)"""
+    upload = _get_upload(upload_id)
+    if upload is None:
+        return Response({"error": "Upload não encontrado"}, status=status.HTTP_404_NOT_FOUND)
+    try:
+        upload = uploads.finalize(upload)
+    except uploads.ChunkConflict as e:
+        return Response({**uploads.upload_payload(upload), "error": str(e)}, status=status.HTTP_409_CONFLICT)
+    done = upload.status in (UploadSession.DONE, UploadSession.FAILED)
+    return Response(uploads.upload_payload(upload), status=status.HTTP_200_OK if done else status.HTTP_202_ACCEPTED)
+
+@limit_concurrency("export_csv")
+@api_view(["GET"])
+def export_csv(request):
+    """Exporta todos os dados em CSV"""
+    try:
+        response = FileResponse(
+            content_type='text/csv',
+            as_attachment=True,
+            filename=f"dados_vacinacao_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        )
+        
+        writer = csv.writer(response)
+        writer.writerow(['país', 'estado_região', 'data', 'vacinados', 'óbitos', 'população'])
+        
+        for data in VaccineData.objects.all():
+            writer.writerow([
+                data.country,
+                data.state_or_region or 'N/A',
+                data.date,
+                data.vaccinated,
+                data.deaths,
+                data.population
+            ])
+        
+        return response
+    
+    except Exception as e:
+        return Response({
+            "error": f"Erro ao exportar CSV: {str(e)}"
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@limit_concurrency("export_xlsx")
+@api_view(["GET"])
+def export_xlsx(request):
+    """
+    Exporta os dados em Excel (?countries=brasil,usa para filtrar,
+    ?summary=1 para incluir planilhas de resumo por país)
+    """
+    countries = [
+        c.strip().lower() for value in request.GET.getlist("countries") for c in value.split(",") if c.strip()
+    ]
+    summary = request.GET.get("summary") in ("1", "true", "yes")
+    
+    try:
+        # O arquivo é montado em disco (memória constante) e enviado em blocos
+        output = tempfile.TemporaryFile()
+        exports.export_xlsx(output, countries=countries or None, summary=summary)
+        output.seek(0)
+        
+        return FileResponse(
+            output,
+            as_attachment=True,
+            filename=f"dados_vacinacao_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
+            content_type=exports.XLSX_CONTENT_TYPE
+        )
+    
+    except Exception as e:
+        return Response({
+            "error": f"Erro ao exportar Excel: {str(e)}"
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -0,0 +1,278 @@
+"""
+Exportação dos dados brutos (Excel, CSV compactado e Parquet)
+
+As linhas de VaccineData são lidas com iterator() (cursor do lado do servidor
+no PostgreSQL, leitura em blocos no SQLite) e gravadas em fluxo: o Excel usa o
+modo write-only do openpyxl, o CSV passa direto pelo gzip e o Parquet é gravado
+em row groups de CHUNK_SIZE linhas. A memória usada não depende do número de
+linhas. Ao atingir o limite de linhas do Excel a exportação continua em uma
+nova planilha.
+
+Os jobs de /api/exports/ (vaccine.jobs) chamam render_export com as opções
+normalizadas por normalize_export_options.
+"""
+import csv
+import gzip
+import io
+from datetime import date
+from typing import IO, Dict, Iterable, List, Optional, Sequence, Tuple
+from django.db.models import OuterRef, Subquery
+from .models import Country, Region, VaccineData, SeriesSnapshot
+from .snapshots import load_snapshots, states_from_snapshots, totals_from_snapshots
+
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# Formato -> (extensão do arquivo, content type)
+EXPORT_FORMATS = {
+    "csv.gz": ("csv.gz", "application/gzip"),
+    "parquet": ("parquet", "application/vnd.apache.parquet"),
+    "xlsx": ("xlsx", XLSX_CONTENT_TYPE),
+}
+DEFAULT_FORMAT = "csv.gz"
+
+# Limite de linhas por planilha do Excel (incluindo o cabeçalho)
+XLSX_MAX_ROWS = 1_048_576
+CHUNK_SIZE = 2000
+
+# (campo do modelo, cabeçalho) na ordem do export_csv
+EXPORT_COLUMNS = [
+    ("country", "país"),
+    ("state_or_region", "estado_região"),
+    ("date", "data"),
+    ("vaccinated", "vacinados"),
+    ("deaths", "óbitos"),
+    ("population", "população"),
+]
+
+EXPORT_FIELDS = [field for field, _ in EXPORT_COLUMNS]
+HEADERS = dict(EXPORT_COLUMNS)
+
+SUMMARY_HEADERS = ["país", "vacinados", "óbitos", "população", "taxa_vacinação_%", "óbitos_por_100k"]
+STATE_HEADERS = ["estado_região", "vacinados", "óbitos", "taxa_vacinação_%", "óbitos_por_100k"]
+
+
+def _split(values) -> List[str]:
+    if isinstance(values, str):
+        values = values.split(",")
+    return [value.strip() for value in values or [] if value.strip()]
+
+
+def _parse_date(value) -> Optional[str]:
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(str(value)).isoformat()
+    except ValueError:
+        raise ValueError(f"Data inválida: {value} (use AAAA-MM-DD)")
+
+
+def normalize_export_options(options: Optional[Dict] = None) -> Dict:
+    """
+    Filtros e formato de uma exportação em forma canônica (chave do cache):
+    países, estados/regiões, intervalo de datas, colunas e formato
+    """
+    options = options or {}
+    export_format = options.get("format") or DEFAULT_FORMAT
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Formato inválido: {export_format} (use {', '.join(EXPORT_FORMATS)})")
+
+    columns = _split(options.get("columns"))
+    invalid = [column for column in columns if column not in HEADERS]
+    if invalid:
+        raise ValueError(f"Coluna inválida: {', '.join(invalid)}")
+
+    date_from, date_to = _parse_date(options.get("date_from")), _parse_date(options.get("date_to"))
+    if date_from and date_to and date_from > date_to:
+        raise ValueError("date_from deve ser anterior a date_to")
+
+    return {
+        "countries": sorted({country.lower() for country in _split(options.get("countries"))}) or None,
+        "states": sorted(set(_split(options.get("states")))) or None,
+        "date_from": date_from,
+        "date_to": date_to,
+        # Ordem canônica das colunas, independente da ordem pedida
+        "columns": [field for field in EXPORT_FIELDS if field in columns] or list(EXPORT_FIELDS),
+        "format": export_format,
+    }
+
+
+def export_queryset(countries: Optional[List[str]] = None, states: Optional[List[str]] = None,
+                    date_from: Optional[str] = None, date_to: Optional[str] = None,
+                    columns: Optional[List[str]] = None):
+    """
+    Linhas exportadas, ordenadas por país, estado e data. As colunas de país e
+    estado guardam o id da dimensão (vaccine.dimensions), então a ordenação
+    usa o nome cadastrado em Country/Region
+    """
+    rows = VaccineData.objects.all()
+    if countries:
+        rows = rows.filter(country__in=countries)
+    if states:
+        rows = rows.filter(state_or_region__in=states)
+    if date_from:
+        rows = rows.filter(date__gte=date_from)
+    if date_to:
+        rows = rows.filter(date__lte=date_to)
+    rows = rows.annotate(
+        country_name=Subquery(Country.objects.filter(id=OuterRef("country")).values("name")),
+        state_name=Subquery(Region.objects.filter(id=OuterRef("state_or_region")).values("name")),
+    )
+    return rows.order_by("country_name", "state_name", "date").values_list(*(columns or EXPORT_FIELDS))
+
+
+def iter_rows(queryset, columns: Optional[List[str]] = None,
+              chunk_size: int = CHUNK_SIZE) -> Iterable[Tuple]:
+    """Percorre o queryset em blocos, sem carregar a tabela na memória"""
+    columns = columns or EXPORT_FIELDS
+    if "state_or_region" not in columns:
+        yield from queryset.iterator(chunk_size=chunk_size)
+        return
+
+    state = columns.index("state_or_region")
+    for row in queryset.iterator(chunk_size=chunk_size):
+        if row[state] is None:
+            row = row[:state] + ("N/A",) + row[state + 1:]
+        yield row
+
+
+def summary_sheets(countries: List[str]) -> List[Tuple[str, List[str], List[Sequence]]]:
+    """
+    Planilhas de resumo a partir dos snapshots já agregados: totais por país
+    e uma planilha por país com os estados/regiões
+    """
+    snapshots = load_snapshots(countries)
+    totals = totals_from_snapshots(snapshots, countries)
+    sheets = [("Resumo", SUMMARY_HEADERS, [
+        [country, data["vaccinated"], data["deaths"], data["population"],
+         data["vaccination_rate"], data["death_rate"]]
+        for country, data in totals.items()
+    ])]
+
+    for country in countries:
+        states = states_from_snapshots(snapshots, country)
+        if states:
+            sheets.append((f"Resumo {country}"[:31], STATE_HEADERS, [
+                [state["state"], state["vaccinated"], state["deaths"],
+                 state["vaccination_rate"], state["death_rate"]]
+                for state in states
+            ]))
+    return sheets
+
+
+def write_xlsx(rows: Iterable[Sequence], output: IO[bytes], headers: Sequence[str],
+               summaries: Iterable[Tuple[str, List[str], List[Sequence]]] = (),
+               max_rows: int = XLSX_MAX_ROWS, sheet_title: str = "Dados") -> Dict[str, int]:
+    """
+    Grava as linhas em um .xlsx (modo write-only) dividindo em planilhas de
+    `max_rows` linhas. As planilhas de resumo vêm antes dos dados.
+    Retorna o total de linhas e de planilhas de dados.
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+
+    for title, summary_headers, summary_rows in summaries:
+        sheet = workbook.create_sheet(title)
+        sheet.append(summary_headers)
+        for row in summary_rows:
+            sheet.append(row)
+
+    sheet = None
+    sheets = 0
+    total = 0
+    sheet_rows = max_rows
+    for row in rows:
+        if sheet_rows >= max_rows:
+            sheets += 1
+            sheet = workbook.create_sheet(sheet_title if sheets == 1 else f"{sheet_title} {sheets}")
+            sheet.append(headers)
+            sheet_rows = 1
+        sheet.append(row)
+        sheet_rows += 1
+        total += 1
+
+    if sheet is None:
+        sheets = 1
+        workbook.create_sheet(sheet_title).append(headers)
+
+    workbook.save(output)
+    return {"rows": total, "sheets": sheets}
+
+
+def export_xlsx(output: IO[bytes], countries: Optional[List[str]] = None,
+                summary: bool = False) -> Dict[str, int]:
+    """Exporta VaccineData (opcionalmente só alguns países) para `output`"""
+    summaries = []
+    if summary:
+        summary_countries = countries or list(
+            SeriesSnapshot.objects.order_by("country").values_list("country", flat=True).distinct()
+        )
+        summaries = summary_sheets(summary_countries)
+
+    return write_xlsx(
+        iter_rows(export_queryset(countries)), output,
+        headers=[HEADERS[field] for field in EXPORT_FIELDS], summaries=summaries
+    )
+
+
+def write_csv_gz(rows: Iterable[Sequence], output: IO[bytes], headers: Sequence[str]) -> int:
+    """Grava as linhas em CSV compactado com gzip, em fluxo"""
+    total = 0
+    with gzip.GzipFile(fileobj=output, mode="wb") as compressed:
+        text = io.TextIOWrapper(compressed, encoding="utf-8", newline="")
+        writer = csv.writer(text)
+        writer.writerow(headers)
+        for row in rows:
+            writer.writerow(row)
+            total += 1
+        text.flush()
+        text.detach()
+    return total
+
+
+def write_parquet(rows: Iterable[Sequence], output: IO[bytes], columns: Sequence[str],
+                  chunk_size: int = 50_000) -> int:
+    """Grava as linhas em Parquet, um row group a cada `chunk_size` linhas"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ValueError("Exportação em Parquet requer o pacote pyarrow")
+
+    types = {"country": pa.string(), "state_or_region": pa.string(), "date": pa.date32(),
+             "vaccinated": pa.int64(), "deaths": pa.int64(), "population": pa.int64()}
+    schema = pa.schema([(HEADERS[column], types[column]) for column in columns])
+
+    def to_table(batch):
+        return pa.Table.from_arrays(
+            [pa.array(values, type=field.type) for values, field in zip(zip(*batch), schema)], schema=schema
+        )
+
+    total = 0
+    with pq.ParquetWriter(output, schema, compression="snappy") as writer:
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= chunk_size:
+                writer.write_table(to_table(batch))
+                total += len(batch)
+                batch = []
+        if batch:
+            writer.write_table(to_table(batch))
+            total += len(batch)
+    return total
+
+
+def render_export(options: Dict, output: IO[bytes]) -> int:
+    """Gera uma exportação filtrada no formato pedido; retorna o número de linhas"""
+    columns = options["columns"]
+    rows = iter_rows(export_queryset(
+        options["countries"], options["states"], options["date_from"], options["date_to"], columns
+    ), columns)
+    headers = [HEADERS[column] for column in columns]
+
+    if options["format"] == "xlsx":
+        return write_xlsx(rows, output, headers)["rows"]
+    if options["format"] == "parquet":
+        return write_parquet(rows, output, columns)
+    return write_csv_gz(rows, output, headers)
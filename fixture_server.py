@@ -0,0 +1,195 @@
+"""
+Servidor HTTP local que serve arquivos de fixture no lugar das fontes
+externas (vaccine.connectors), com falhas injetáveis pela query string:
+
+- ?delay=0.5    atraso da resposta em segundos
+- ?fail=2       as 2 primeiras requisições desta URL respondem 503
+- ?throttle=1   a primeira requisição desta URL responde 429 com Retry-After
+- ?status=404   sempre responde com este status
+- ?cut=1000     a primeira resposta desta URL é interrompida após 1000 bytes
+- ?gzip=1       corpo com Content-Encoding: gzip, se o cliente aceitar
+- ?norange=1    ignora Range (responde 200 com o arquivo inteiro)
+
+Os arquivos são servidos com ETag e Last-Modified e o servidor responde
+304 a requisições condicionais (If-None-Match, If-Modified-Since) e 206 a
+Range: bytes=N- (respeitando If-Range), como as fontes reais.
+
+GET /__stats__ devolve as requisições recebidas (total, por URL, por status,
+bytes de corpo enviados e o máximo de requisições simultâneas) e
+POST /__reset__ zera as contagens.
+
+Uso:
+    python scripts/fixture_server.py --root fixtures/connectors --port 8800
+    CONNECTOR_BASE_URLS='{"owid": "http://127.0.0.1:8800"}' python manage.py ingest --source owid
+    CONNECTOR_FEEDS_FILE=fixtures/connectors/feeds.json python manage.py ingest --source feeds
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import mimetypes
+import socket
+import sys
+import threading
+import time
+from collections import Counter
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+
+class FixtureServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, root: Path):
+        super().__init__(address, FixtureHandler)
+        self.root = Path(root).resolve()
+        self.lock = threading.Lock()
+        self.reset()
+
+    def handle_error(self, request, client_address):
+        # Cliente que desistiu por timeout: esperado com ?delay
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+    def reset(self) -> None:
+        with self.lock:
+            self.requests = Counter()
+            self.statuses = Counter()
+            self.sent = 0
+            self.active = 0
+            self.max_active = 0
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {"total": sum(self.requests.values()), "max_concurrent": self.max_active,
+                    "requests": dict(self.requests), "statuses": dict(self.statuses), "bytes": self.sent}
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, como as fontes reais
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        if self.path == "/__reset__":
+            self.server.reset()
+            return self._send(200, b"{}", "application/json")
+        self._send(404, b"not found", "text/plain")
+
+    def do_GET(self):
+        if self.path == "/__stats__":
+            return self._send(200, json.dumps(self.server.stats()).encode(), "application/json")
+
+        server = self.server
+        with server.lock:
+            server.requests[self.path] += 1
+            count = server.requests[self.path]
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+        try:
+            self._serve(count)
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def _serve(self, count: int) -> None:
+        url = urlsplit(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        time.sleep(float(params.get("delay", 0)))
+
+        if "status" in params:
+            return self._send(int(params["status"]), b"erro simulado", "text/plain")
+        if count <= int(params.get("fail", 0)):
+            return self._send(503, b"indisponivel", "text/plain")
+        if count <= int(params.get("throttle", 0)):
+            return self._send(429, b"muitas requisicoes", "text/plain", {"Retry-After": "1"})
+
+        path = (self.server.root / url.path.lstrip("/")).resolve()
+        if self.server.root not in path.parents or not path.is_file():
+            return self._send(404, b"not found", "text/plain")
+
+        body = path.read_bytes()
+        headers = {"Last-Modified": formatdate(path.stat().st_mtime, usegmt=True)}
+        if params.get("gzip") and "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body, mtime=0)
+            headers["Content-Encoding"] = "gzip"
+        headers["ETag"] = f'"{hashlib.sha1(body).hexdigest()[:16]}"'
+        content_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+
+        if self._not_modified(headers, path.stat().st_mtime):
+            return self._send(304, b"", content_type, headers)
+
+        status, start = 200, 0
+        requested = self.headers.get("Range", "")
+        if_range = self.headers.get("If-Range")
+        if requested.startswith("bytes=") and requested.endswith("-") and not params.get("norange") \
+                and if_range in (None, headers["ETag"], headers["Last-Modified"]):
+            start = int(requested[6:-1])
+            if start >= len(body):
+                return self._send(416, b"", content_type, {"Content-Range": f"bytes */{len(body)}"})
+            status = 206
+            headers["Content-Range"] = f"bytes {start}-{len(body) - 1}/{len(body)}"
+        self._send(status, body[start:], content_type, headers,
+                   cut=int(params["cut"]) if "cut" in params and count == 1 else None)
+
+    def _not_modified(self, headers: dict, mtime: float) -> bool:
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match:
+            return headers["ETag"] in [tag.strip() for tag in if_none_match.split(",")]
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_modified_since:
+            try:
+                return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def _send(self, status: int, body: bytes, content_type: str, headers: dict = None, cut: int = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if cut is not None:
+            body = body[:cut]
+        if self.command != "HEAD" and status != 304:
+            self.wfile.write(body)
+        if not self.path.startswith("/__"):
+            with self.server.lock:
+                self.server.statuses[status] += 1
+                self.server.sent += len(body)
+        if cut is not None:
+            # Conexão cai no meio do corpo
+            self.wfile.flush()
+            self.connection.shutdown(socket.SHUT_RDWR)
+            self.close_connection = True
+
+
+def start(root, host: str = "127.0.0.1", port: int = 0) -> FixtureServer:
+    """Inicia o servidor em uma thread; port=0 escolhe uma porta livre"""
+    server = FixtureServer((host, port), root)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor local de fixtures para os conectores")
+    parser.add_argument("--root", default=str(Path(__file__).resolve().parent.parent / "fixtures" / "connectors"))
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8800)
+    args = parser.parse_args()
+
+    server = FixtureServer((args.host, args.port), args.root)
+    print(f"Servindo {server.root} em http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Configuração do gunicorn para produção e Docker: `gunicorn -c gunicorn.conf.py`
+
+- preload_app: o master importa Django e a aplicação uma única vez e
+  aquece o estado compartilhado (vaccine.warmup) antes do fork; os workers
+  herdam tudo por copy-on-write e já nascem prontos para o primeiro request
+- gc.freeze() após o aquecimento: o coletor de lixo dos workers não percorre
+  (e portanto não copia) os objetos herdados do master
+- workers reciclados a cada GUNICORN_MAX_REQUESTS requisições (com jitter),
+  recriados a partir do master já aquecido
+
+Classe de worker (GUNICORN_WORKER_CLASS):
+- uvicorn.workers.UvicornWorker (padrão): ASGI, views assíncronas e conexões
+  SSE (/api/events/) abertas sem ocupar uma thread
+- gthread: WSGI com GUNICORN_THREADS threads por worker; o SSE passa a
+  responder só a versão atual e o navegador reconecta periodicamente
+
+Todos os valores podem ser sobrescritos por variáveis de ambiente.
+"""
+import gc
+import multiprocessing
+import os
+
+CPU_COUNT = multiprocessing.cpu_count()
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "uvicorn.workers.UvicornWorker")
+wsgi_app = "config.wsgi:application" if worker_class in ("sync", "gthread") else "config.asgi:application"
+workers = int(os.environ.get("GUNICORN_WORKERS", max(2, CPU_COUNT)))
+# Só usado por gthread: as threads esperam o banco e a rede, não a CPU
+threads = int(os.environ.get("GUNICORN_THREADS", max(4, 2 * CPU_COUNT)))
+
+preload_app = True
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 1000))
+max_requests_jitter = max_requests // 10
+
+# Relatórios e exportações síncronos (fallback dos jobs) podem levar dezenas de segundos
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 120))
+graceful_timeout = 30
+keepalive = 5
+
+
+def when_ready(server):
+    """Chamado no master depois do preload e antes do fork dos workers"""
+    from vaccine.warmup import warm_up
+
+    elapsed = warm_up()
+    gc.freeze()
+    server.log.info("Estado aquecido em %.0f ms (%s workers %s)", elapsed * 1000, workers, worker_class)
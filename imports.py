@@ -0,0 +1,209 @@
+"""
+Importação de CSV em blocos com validação vetorizada
+
+O arquivo é lido com pandas em blocos de CHUNK_SIZE linhas (sem carregar tudo
+na memória). Cada bloco passa por uma validação vetorizada: conversão de
+tipos, datas, faixas de valores e duplicatas de (estado, data) dentro do
+arquivo. As linhas inválidas viram relatórios estruturados ({linha, coluna,
+valor, erro}) e as válidas seguem para o banco em um upsert em lote.
+
+As duplicatas são marcadas em um mapa de bits de dias por estado, desde
+MIN_DATE; a memória depende do número de estados, não do número de linhas.
+"""
+from datetime import date
+from typing import IO, Dict, Iterable, List, Optional, Set, Tuple, Union
+import numpy as np
+import pandas as pd
+from .models import VaccineData
+from .derived import refresh_derived_data
+from .snapshots import resolve_semantics
+
+REQUIRED_COLUMNS = ["date", "vaccinated", "deaths", "population"]
+NUMERIC_COLUMNS = ["vaccinated", "deaths", "population"]
+DEFAULT_STATE = "Nacional"
+
+CHUNK_SIZE = 50_000
+BATCH_SIZE = 2000
+MAX_ERRORS = 1000  # relatórios de erro guardados por importação
+MAX_VALUE = 2**31 - 1  # limite de IntegerField
+
+# Datas aceitas: do início da pandemia até hoje
+MIN_DATE = date(2020, 1, 1)
+
+
+class DuplicateTracker:
+    """Marca os pares (estado, data) já vistos no arquivo: um bit por dia em cada estado"""
+
+    def __init__(self, min_date: date = MIN_DATE, max_date: Optional[date] = None):
+        self.min_date = pd.Timestamp(min_date)
+        self.days = (pd.Timestamp(max_date or date.today()) - self.min_date).days + 1
+        self.seen: Dict[str, np.ndarray] = {}
+
+    def check(self, states: pd.Series, dates: pd.Series) -> np.ndarray:
+        """Retorna a máscara das linhas repetidas e registra as demais"""
+        days = (dates - self.min_date).dt.days.to_numpy()
+        duplicated = np.zeros(len(days), dtype=bool)
+
+        for state, positions in states.groupby(states, sort=False).indices.items():
+            seen = self.seen.setdefault(state, np.zeros((self.days + 7) // 8, dtype=np.uint8))
+            state_days = days[positions]
+            byte, bit = state_days >> 3, np.left_shift(1, state_days & 7).astype(np.uint8)
+            # Repetida no bloco (após a primeira ocorrência) ou em blocos anteriores
+            repeated = pd.Series(state_days).duplicated().to_numpy() | (seen[byte] & bit != 0)
+            duplicated[positions] = repeated
+            np.bitwise_or.at(seen, byte, bit)
+
+        return duplicated
+
+
+def _error_reports(df: pd.DataFrame, mask: pd.Series, column: str, message: str) -> List[Dict]:
+    """Um relatório {linha, coluna, valor, erro} por linha marcada em `mask`"""
+    return [
+        {"line": int(line), "column": column, "value": value, "error": message}
+        for line, value in zip(df.loc[mask, "_line"], df.loc[mask, column])
+    ]
+
+
+def validate_chunk(df: pd.DataFrame, first_line: int,
+                   duplicates: DuplicateTracker) -> Tuple[pd.DataFrame, List[Dict]]:
+    """
+    Valida um bloco lido como texto. Retorna as linhas válidas já convertidas
+    (state_or_region, date, vaccinated, deaths, population) e os erros.
+    `first_line` é o número da linha do arquivo da primeira linha do bloco.
+    """
+    df = df.copy()
+    df["_line"] = np.arange(first_line, first_line + len(df))
+    errors = []
+    invalid = pd.Series(False, index=df.index)
+
+    if "state_or_region" in df:
+        states = df["state_or_region"].fillna("").str.strip()
+        states = states.mask(states == "", DEFAULT_STATE)
+    else:
+        states = pd.Series(DEFAULT_STATE, index=df.index)
+
+    dates = pd.to_datetime(df["date"].str.strip(), format="%Y-%m-%d", errors="coerce")
+    bad = dates.isna()
+    errors += _error_reports(df, bad, "date", "data inválida (use AAAA-MM-DD)")
+    out_of_range = ~bad & ((dates < duplicates.min_date) | (dates > pd.Timestamp(date.today())))
+    errors += _error_reports(df, out_of_range, "date", f"data fora do período ({MIN_DATE} até hoje)")
+    invalid |= bad | out_of_range
+
+    values = {}
+    for column in NUMERIC_COLUMNS:
+        numbers = pd.to_numeric(df[column].str.strip(), errors="coerce")
+        bad = numbers.isna() | (numbers % 1 != 0)
+        errors += _error_reports(df, bad, column, "valor não é um número inteiro")
+        negative = ~bad & (numbers < 0)
+        errors += _error_reports(df, negative, column, "valor negativo")
+        too_large = ~bad & (numbers > MAX_VALUE)
+        errors += _error_reports(df, too_large, column, "valor acima do limite")
+        invalid |= bad | negative | too_large
+        values[column] = numbers
+
+    population = values["population"]
+    for column in ("vaccinated", "deaths"):
+        exceeds = ~invalid & (population > 0) & (values[column] > population)
+        errors += _error_reports(df, exceeds, column, "valor maior que a população")
+        invalid |= exceeds
+
+    valid = ~invalid
+    duplicated = pd.Series(False, index=df.index)
+    duplicated[valid] = duplicates.check(states[valid], dates[valid])
+    errors += _error_reports(df, duplicated, "date", "estado e data repetidos no arquivo")
+    valid &= ~duplicated
+
+    clean = pd.DataFrame({
+        "state_or_region": states[valid],
+        "date": dates[valid].dt.date,
+        **{column: values[column][valid].astype("int64") for column in NUMERIC_COLUMNS},
+    })
+    errors.sort(key=lambda error: error["line"])
+    return clean, errors
+
+
+def read_chunks(source: Union[str, IO], chunk_size: int = CHUNK_SIZE) -> Iterable[pd.DataFrame]:
+    """Lê o CSV em blocos, com todas as colunas como texto (a conversão é feita na validação)"""
+    reader = pd.read_csv(source, dtype=str, keep_default_na=False, chunksize=chunk_size,
+                         encoding="utf-8", skipinitialspace=True)
+    for chunk in reader:
+        missing = [column for column in REQUIRED_COLUMNS if column not in chunk.columns]
+        if missing:
+            raise ValueError(f"Campo obrigatório ausente: {', '.join(missing)}")
+        yield chunk
+
+
+def write_chunk(country: str, clean: pd.DataFrame) -> int:
+    """
+    Grava as linhas válidas de um bloco (upsert por país, estado e data).
+    Cada lote de BATCH_SIZE linhas é uma transação curta, para não segurar o
+    lock de escrita do SQLite enquanto o bloco inteiro é gravado.
+    """
+    objects = [
+        VaccineData(country=country, state_or_region=state, date=day,
+                    vaccinated=vaccinated, deaths=deaths, population=population)
+        for state, day, vaccinated, deaths, population in clean.itertuples(index=False, name=None)
+    ]
+    for start in range(0, len(objects), BATCH_SIZE):
+        VaccineData.objects.bulk_create(
+            objects[start:start + BATCH_SIZE], update_conflicts=True,
+            unique_fields=["country", "state_or_region", "date"],
+            update_fields=["vaccinated", "deaths", "population"],
+        )
+    return len(objects)
+
+
+class ImportSession:
+    """
+    Estado de uma importação: países, estados e datas gravados, erros e
+    duplicatas já vistas. Recebe os blocos em ordem e, ao final, atualiza os
+    dados derivados uma única vez.
+    """
+
+    def __init__(self, country: str, semantics: Optional[str] = None):
+        self.country = country.lower()
+        self.semantics = resolve_semantics("csv", semantics)
+        self.duplicates = DuplicateTracker()
+        self.imported_count = 0
+        self.error_count = 0
+        self.errors: List[Dict] = []
+        self.states: Set[str] = set()
+        self.since: Optional[date] = None
+        self.next_line = 2  # a linha 1 é o cabeçalho
+
+    def add_chunk(self, chunk: pd.DataFrame) -> None:
+        clean, errors = validate_chunk(chunk, self.next_line, self.duplicates)
+        self.next_line += len(chunk)
+
+        self.error_count += len(errors)
+        self.errors.extend(errors[:MAX_ERRORS - len(self.errors)])
+
+        if not clean.empty:
+            self.imported_count += write_chunk(self.country, clean)
+            self.states.update(clean["state_or_region"].unique())
+            first = clean["date"].min()
+            self.since = first if self.since is None else min(self.since, first)
+
+    def finish(self) -> Dict:
+        if self.states:
+            refresh_derived_data(self.country, source="csv", semantics=self.semantics,
+                                 states=self.states, since=self.since)
+        return self.summary()
+
+    def summary(self) -> Dict:
+        return {
+            "country": self.country,
+            "semantics": self.semantics,
+            "imported_count": self.imported_count,
+            "errors_count": self.error_count,
+            "errors": self.errors,
+        }
+
+
+def import_csv(source: Union[str, IO], country: str, semantics: Optional[str] = None,
+               chunk_size: int = CHUNK_SIZE) -> Dict:
+    """Importa um CSV (caminho ou arquivo aberto) e retorna o resumo com os erros por linha"""
+    session = ImportSession(country, semantics)
+    for chunk in read_chunks(source, chunk_size):
+        session.add_chunk(chunk)
+    return session.finish()
@@ -0,0 +1,246 @@
+"""
+Ingestão de dados das fontes externas (manage.py ingest)
+
+Uma execução passa por quatro etapas, cada uma com a duração registrada:
+
+- fetch: baixa o conteúdo bruto da fonte (fontes HTTP passam pelo cache de
+  downloads; o que não mudou desde a última ingestão não é interpretado)
+- parse: extrai as linhas de cada país e compara com o banco (inseridas,
+  atualizadas, inalteradas); com --workers os países são processados em
+  paralelo, cada thread com sua própria conexão de leitura
+- write: grava apenas as linhas novas ou alteradas, em lotes de BATCH_SIZE
+  (upsert), um país por vez: o SQLite aceita um único escritor
+- derive: recalcula taxas, snapshots, métricas diárias e agregados dos
+  países alterados a partir da data mais antiga alterada
+
+Uma trava de arquivo (INGEST_LOCK_PATH) impede execuções sobrepostas, por
+exemplo a coleta na inicialização do container e um agendamento via cron.
+Cada execução, inclusive as de --dry-run e as que falham, fica registrada
+em IngestionRun.
+
+Novas fontes são classes derivadas de Source (ou, para fontes HTTP, de
+vaccine.connectors.Connector) registradas em SOURCES.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from .models import IngestionRun, VaccineData
+from .derived import refresh_derived_data
+from .connectors import FeedConnector, IngestionError, OwidConnector, Row, Source
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+INGEST_LOCK_PATH = Path(getattr(settings, "INGEST_LOCK_PATH", settings.BASE_DIR / "run" / "ingest.lock"))
+BATCH_SIZE = 2000
+
+
+class IngestionLocked(Exception):
+    """Outra ingestão está em andamento"""
+
+
+class SampleSource(Source):
+    """Dados de exemplo: 90 dias até hoje, por estado (sem rede)"""
+    name = "sample"
+    DAYS = 90
+    STATES = {
+        "brasil": ["São Paulo", "Rio de Janeiro", "Minas Gerais", "Bahia"],
+        "portugal": ["Lisboa", "Porto", "Covilhã"],
+        "italia": ["Roma", "Milão", "Nápoles"],
+        "usa": ["California", "Nova York", "Texas"],
+    }
+    BASE_VACCINATED = {
+        "brasil": 80000000,
+        "portugal": 5000000,
+        "italia": 35000000,
+        "usa": 200000000,
+    }
+    countries = list(STATES)
+
+    def fetch(self, countries: List[str]):
+        return date.today() - timedelta(days=self.DAYS)
+
+    def parse(self, base_date: date, country: str) -> List[Row]:
+        base_vaccinated = self.BASE_VACCINATED[country]
+        rows = []
+        for state in self.STATES[country]:
+            for i in range(self.DAYS):
+                vaccinated = int(base_vaccinated * (0.5 + (i / 180)) + (i * 50000))
+                deaths = int(vaccinated * 0.02 + (i * 100))
+                rows.append((state, base_date + timedelta(days=i), vaccinated, deaths, base_vaccinated * 2))
+        return rows
+
+
+SOURCES = {source.name: source for source in (OwidConnector, FeedConnector, SampleSource)}
+
+
+@dataclass
+class CountryPlan:
+    """Resultado da comparação das linhas de um país com o banco"""
+    country: str
+    read: int = 0
+    unchanged: int = 0
+    skipped: bool = False  # sem alterações na fonte: nem foi interpretado
+    inserts: List[Row] = field(default_factory=list)
+    updates: List[Row] = field(default_factory=list)
+
+    @property
+    def changed(self) -> List[Row]:
+        return self.inserts + self.updates
+
+    @property
+    def since(self) -> Optional[date]:
+        """Data mais antiga alterada (ponto de partida do recálculo dos derivados)"""
+        return min((row[1] for row in self.changed), default=None)
+
+    @property
+    def states(self) -> List[str]:
+        return sorted({row[0] for row in self.changed})
+
+    def counts(self) -> Dict[str, int]:
+        return {"read": self.read, "inserted": len(self.inserts), "updated": len(self.updates),
+                "unchanged": self.unchanged, "skipped": self.skipped}
+
+
+@contextmanager
+def ingestion_lock(path: Path = INGEST_LOCK_PATH) -> Iterator[None]:
+    """Trava exclusiva e não bloqueante: levanta IngestionLocked se outra ingestão a segura"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a") as handle:
+        if fcntl is not None:
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                raise IngestionLocked(f"Outra ingestão está em andamento ({path})") from None
+        yield
+
+
+def plan_country(source: Source, raw, country: str, since: Optional[date] = None) -> CountryPlan:
+    """Linhas do país na fonte (a partir de `since`) separadas em novas, alteradas e inalteradas"""
+    try:
+        rows = [row for row in source.parse(raw, country) if since is None or row[1] >= since]
+        existing = VaccineData.objects.filter(country=country)
+        if since is not None:
+            existing = existing.filter(date__gte=since)
+        current = {
+            (state, day): values
+            for state, day, *values in existing.values_list(
+                "state_or_region", "date", "vaccinated", "deaths", "population"
+            ).iterator(chunk_size=BATCH_SIZE)
+        }
+    finally:
+        connection.close()  # conexão própria da thread
+
+    plan = CountryPlan(country, read=len(rows), skipped=country in source.unchanged)
+    for row in rows:
+        values = current.get(row[:2])
+        if values is None:
+            plan.inserts.append(row)
+        elif tuple(values) != row[2:]:
+            plan.updates.append(row)
+        else:
+            plan.unchanged += 1
+    return plan
+
+
+def write_rows(country: str, rows: List[Row]) -> None:
+    """Upsert em lotes; cada lote é uma transação curta (o lock de escrita do SQLite é liberado entre eles)"""
+    for start in range(0, len(rows), BATCH_SIZE):
+        VaccineData.objects.bulk_create(
+            [
+                VaccineData(country=country, state_or_region=state, date=day,
+                            vaccinated=vaccinated, deaths=deaths, population=population)
+                for state, day, vaccinated, deaths, population in rows[start:start + BATCH_SIZE]
+            ],
+            update_conflicts=True,
+            unique_fields=["country", "state_or_region", "date"],
+            update_fields=["vaccinated", "deaths", "population"],
+        )
+
+
+def run_ingestion(source_name: str, countries: Optional[List[str]] = None, since: Optional[date] = None,
+                  workers: int = 1, dry_run: bool = False, force: bool = False) -> IngestionRun:
+    """
+    Executa a ingestão da fonte `source_name` e retorna o registro da execução.
+    Com `force`, interpreta também o que não mudou na fonte. Levanta
+    IngestionLocked se outra ingestão estiver em andamento e IngestionError
+    (ou o erro original) se a execução falhar; o registro é gravado como
+    falho antes disso.
+    """
+    source = SOURCES[source_name]()
+    source.force = force
+    countries = countries or source.countries
+    unknown = [country for country in countries if country not in source.countries]
+    if unknown:
+        raise IngestionError(f"Países sem dados na fonte {source_name}: {', '.join(unknown)}")
+
+    with ingestion_lock():
+        run = IngestionRun.objects.create(
+            source=source_name, dry_run=dry_run,
+            options={"countries": countries, "since": since.isoformat() if since else None, "workers": workers,
+                     "force": force},
+        )
+        stages = {}
+        try:
+            with _stage(stages, "fetch"):
+                raw = source.fetch(countries)
+
+            with _stage(stages, "parse"), ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+                plans = list(executor.map(lambda country: plan_country(source, raw, country, since), countries))
+
+            if not dry_run:
+                with _stage(stages, "write"):
+                    for plan in plans:
+                        write_rows(plan.country, plan.changed)
+
+                with _stage(stages, "derive"):
+                    for plan in plans:
+                        if plan.changed:
+                            run.dataset_version = refresh_derived_data(
+                                plan.country, source=source.name, semantics=source.semantics,
+                                states=plan.states, since=plan.since,
+                            )
+
+                # Com --since as datas anteriores não foram comparadas: a versão
+                # baixada só conta como ingerida numa execução completa
+                if since is None:
+                    source.commit(countries)
+        except Exception as e:
+            _finish(run, IngestionRun.FAILED, stages, error=str(e))
+            raise
+
+        run.countries = {plan.country: plan.counts() for plan in plans}
+        run.rows_read = sum(plan.read for plan in plans)
+        run.rows_inserted = sum(len(plan.inserts) for plan in plans)
+        run.rows_updated = sum(len(plan.updates) for plan in plans)
+        run.rows_unchanged = sum(plan.unchanged for plan in plans)
+        # Endpoints que falharam sem impedir a execução
+        _finish(run, IngestionRun.DONE, stages, error="\n".join(source.warnings))
+        return run
+
+
+@contextmanager
+def _stage(stages: Dict[str, float], name: str) -> Iterator[None]:
+    """Registra a duração da etapa, inclusive quando ela falha"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stages[name] = time.perf_counter() - start
+
+
+def _finish(run: IngestionRun, status: str, stages: Dict[str, float], error: str = "") -> None:
+    run.status = status
+    run.stages = {stage: round(seconds, 3) for stage, seconds in stages.items()}
+    run.error = error
+    run.finished_at = timezone.now()
+    run.save()
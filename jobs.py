@@ -0,0 +1,268 @@
+"""
+Geração de arquivos em segundo plano com cache por versão do dataset
+
+submit() registra (ou reaproveita) um ArtifactJob cuja chave é o hash de
+tipo + opções + versão do dataset e entrega a geração a um pool de threads do
+processo. Enquanto o dataset não muda, pedidos repetidos (inclusive
+simultâneos) recebem o mesmo job e o download serve o arquivo já gravado em
+ARTIFACTS_DIR. Os arquivos expiram após ARTIFACT_TTL segundos.
+
+Um job em execução renova updated_at a cada HEARTBEAT_INTERVAL: só é
+reexecutado por outro pedido se o processo que o gerava parou de dar sinal
+de vida. Cada tentativa grava em um arquivo temporário próprio e só conclui
+o job se ainda for a dona dele.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from pathlib import Path
+from typing import Dict, Optional
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, close_old_connections
+from django.utils import timezone
+from .models import ArtifactJob
+from .events import dataset_version
+from . import exports, reports
+
+ARTIFACTS_DIR = Path(getattr(settings, "ARTIFACTS_DIR", settings.BASE_DIR / "artifacts"))
+WORKERS = getattr(settings, "ARTIFACT_WORKERS", 2)
+# Job sem sinal de vida há mais tempo que isso é considerado perdido (processo reiniciado)
+STALE_AFTER = timedelta(seconds=getattr(settings, "ARTIFACT_JOB_TIMEOUT", 600))
+HEARTBEAT_INTERVAL = min(30, STALE_AFTER.total_seconds() / 4)  # segundos entre sinais de vida
+# Validade dos arquivos gerados
+TTL = timedelta(seconds=getattr(settings, "ARTIFACT_TTL", 24 * 3600))
+POLL_INTERVAL = 0.2  # segundos, usado por wait()
+
+
+def _write_report(options: Dict, output) -> None:
+    # python-pptx só é importado quando um relatório é gerado
+    from .presentation import write_report
+    write_report(options, output)
+
+
+# Tipos de arquivo: normalização das opções, gravação em um arquivo aberto,
+# (extensão, content type) a partir das opções, prefixo da URL na API e do nome do arquivo
+ARTIFACT_KINDS = {
+    "powerpoint": {
+        "normalize": reports.normalize_options,
+        "render": _write_report,
+        "describe": lambda options: ("pptx", reports.PPTX_CONTENT_TYPE),
+        "url": "reports",
+        "filename": "analise_vacinacao",
+    },
+    "export": {
+        "normalize": exports.normalize_export_options,
+        "render": exports.render_export,
+        "describe": lambda options: exports.EXPORT_FORMATS[options["format"]],
+        "url": "exports",
+        "filename": "dados_vacinacao",
+    },
+}
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="artifacts")
+    return _executor
+
+
+def resolve_kind(kind: str) -> Dict:
+    if kind not in ARTIFACT_KINDS:
+        raise ValueError(f"Tipo de arquivo inválido: {kind}")
+    return ARTIFACT_KINDS[kind]
+
+
+def artifact_key(kind: str, options: Dict, version: int) -> str:
+    """Chave do cache: hash de tipo, opções canônicas e versão do dataset"""
+    payload = json.dumps([kind, options, version], sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _needs_run(job: ArtifactJob) -> bool:
+    """Job que precisa ser (re)executado: falhou, perdeu o arquivo ou ficou órfão"""
+    if job.status == ArtifactJob.FAILED:
+        return True
+    if job.status == ArtifactJob.DONE:
+        return not os.path.exists(job.path) or (job.expires_at is not None and job.expires_at <= timezone.now())
+    return job.updated_at < timezone.now() - STALE_AFTER
+
+
+def cleanup_expired() -> int:
+    """Remove arquivos e jobs expirados (e jobs que falharam há mais de TTL)"""
+    now = timezone.now()
+    expired = ArtifactJob.objects.filter(status=ArtifactJob.DONE, expires_at__lte=now) | \
+        ArtifactJob.objects.filter(status=ArtifactJob.FAILED, updated_at__lte=now - TTL)
+    removed = 0
+    for job in expired:
+        if job.path and os.path.exists(job.path):
+            os.remove(job.path)
+        # Só apaga se ninguém reivindicou o job nesse meio tempo
+        removed += ArtifactJob.objects.filter(pk=job.pk, updated_at=job.updated_at).delete()[0]
+    return removed
+
+
+def submit(kind: str, options: Optional[Dict] = None) -> ArtifactJob:
+    """
+    Retorna o job do arquivo pedido para a versão atual do dataset,
+    agendando a geração apenas se ainda não existir um job válido.
+    """
+    spec = resolve_kind(kind)
+    options = spec["normalize"](options)
+    cleanup_expired()
+    version = dataset_version()
+    key = artifact_key(kind, options, version)
+
+    try:
+        job, created = ArtifactJob.objects.get_or_create(
+            key=key, defaults={"kind": kind, "options": options, "dataset_version": version}
+        )
+    except IntegrityError:
+        # Outro processo criou o mesmo job ao mesmo tempo
+        return ArtifactJob.objects.get(key=key)
+
+    if not created:
+        if not _needs_run(job):
+            return job
+        # Reivindica o job: apenas quem atualizar a linha reexecuta
+        claimed = ArtifactJob.objects.filter(
+            pk=job.pk, status=job.status, updated_at=job.updated_at
+        ).update(status=ArtifactJob.PENDING, error="", updated_at=timezone.now())
+        job.refresh_from_db()
+        if not claimed:
+            return job
+
+    _get_executor().submit(_run, job.pk)
+    return job
+
+
+class Heartbeat(threading.Thread):
+    """
+    Sinal de vida de um job em execução: renova updated_at a cada
+    HEARTBEAT_INTERVAL enquanto o arquivo é gerado. Se a linha mudou desde o
+    último sinal, outro pedido reivindicou o job e `lost` fica verdadeiro.
+    """
+
+    def __init__(self, job_id: int, beat):
+        super().__init__(name=f"artifacts-heartbeat-{job_id}", daemon=True)
+        self.job_id = job_id
+        self.beat = beat  # updated_at gravado por esta tentativa
+        self.lost = False
+        self._finished = threading.Event()
+
+    def run(self) -> None:
+        try:
+            while not self._finished.wait(HEARTBEAT_INTERVAL) and self.touch():
+                pass
+        finally:
+            close_old_connections()
+
+    def touch(self) -> bool:
+        now = timezone.now()
+        try:
+            owned = ArtifactJob.objects.filter(
+                pk=self.job_id, status=ArtifactJob.RUNNING, updated_at=self.beat
+            ).update(updated_at=now)
+        except DatabaseError:
+            return True  # banco ocupado: tenta de novo no próximo intervalo
+        if owned:
+            self.beat = now
+        else:
+            self.lost = True
+        return bool(owned)
+
+    def stop(self) -> bool:
+        """Encerra os sinais de vida; verdadeiro se esta tentativa ainda é a dona do job"""
+        self._finished.set()
+        self.join()
+        return not self.lost and self.touch()
+
+
+def _run(job_id: int) -> None:
+    """Gera o arquivo de um job (executa em uma thread do pool)"""
+    heartbeat = tmp_path = None
+    try:
+        job = ArtifactJob.objects.get(pk=job_id)
+        started = timezone.now()
+        if not ArtifactJob.objects.filter(
+            pk=job_id, status=ArtifactJob.PENDING, updated_at=job.updated_at
+        ).update(status=ArtifactJob.RUNNING, updated_at=started):
+            return  # reivindicado por outra tentativa
+        heartbeat = Heartbeat(job_id, started)
+        heartbeat.start()
+
+        spec = ARTIFACT_KINDS[job.kind]
+        extension, _ = spec["describe"](job.options)
+
+        # Grava direto em disco (exportações grandes não passam pela memória),
+        # em um arquivo temporário desta tentativa
+        ARTIFACTS_DIR.mkdir(parents=True, exist_ok=True)
+        path = ARTIFACTS_DIR / f"{job.key}.{extension}"
+        fd, tmp_path = tempfile.mkstemp(dir=ARTIFACTS_DIR, prefix=f"{job.key}.", suffix=".tmp")
+        with os.fdopen(fd, "wb") as output:
+            spec["render"](job.options, output)
+
+        if not heartbeat.stop():
+            return  # outra tentativa assumiu o job e grava o próprio arquivo
+        # Arquivo completo: se outra tentativa também terminar, troca por outro igual
+        os.replace(tmp_path, path)
+        tmp_path = None
+
+        now = timezone.now()
+        ArtifactJob.objects.filter(pk=job_id, updated_at=heartbeat.beat).update(
+            status=ArtifactJob.DONE, path=str(path), size=path.stat().st_size,
+            expires_at=now + TTL, updated_at=now
+        )
+    except Exception as e:
+        owner = ArtifactJob.objects.filter(pk=job_id)
+        if heartbeat is not None:
+            heartbeat.stop()
+            owner = owner.filter(updated_at=heartbeat.beat)
+        owner.update(status=ArtifactJob.FAILED, error=str(e), updated_at=timezone.now())
+    finally:
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        close_old_connections()
+
+
+def wait(job: ArtifactJob, timeout: float) -> ArtifactJob:
+    """Aguarda o job terminar (ou o timeout) e retorna o estado atualizado"""
+    deadline = time.monotonic() + timeout
+    while job.status not in (ArtifactJob.DONE, ArtifactJob.FAILED) and time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        job.refresh_from_db()
+    return job
+
+
+def describe(job: ArtifactJob) -> Dict:
+    """Extensão, content type e nome do arquivo para download"""
+    spec = resolve_kind(job.kind)
+    extension, content_type = spec["describe"](job.options)
+    return {
+        "extension": extension,
+        "content_type": content_type,
+        "filename": f"{spec['filename']}_v{job.dataset_version}.{extension}",
+    }
+
+
+def job_payload(job: ArtifactJob) -> Dict:
+    """Representação do job na API"""
+    url = resolve_kind(job.kind)["url"]
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "options": job.options,
+        "dataset_version": job.dataset_version,
+        "size": job.size,
+        "error": job.error or None,
+        "expires_at": job.expires_at,
+        "download_url": f"/api/{url}/{job.id}/download/" if job.status == ArtifactJob.DONE else None,
+    }
@@ -0,0 +1,150 @@
+"""
+Teste de carga dos endpoints de leitura do dashboard
+
+Abre N clientes HTTP concorrentes (asyncio puro, sem dependências) que repetem
+requisições keep-alive durante um intervalo fixo e reporta vazão e latências.
+Serve para comparar o deploy WSGI (workers síncronos) com o ASGI (uvicorn).
+
+Com --background, alguns clientes ficam repetindo uma requisição lenta (ex.:
+export-powerpoint) durante a rodada; apenas as requisições de --url entram
+nas estatísticas.
+
+Uso:
+    python scripts/loadtest.py --url http://127.0.0.1:8000/api/dashboard/ --clients 100 500
+    python scripts/loadtest.py --background http://127.0.0.1:8000/api/export-powerpoint/
+
+Para reproduzir o tráfego do dashboard (vários endpoints, mistura de
+usuários e rampa), veja scripts/loadtest_dashboard.py.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Optional, Tuple
+from urllib.parse import urlsplit
+
+DEFAULT_URL = "http://127.0.0.1:8000/api/dashboard/?countries=brasil,portugal,italia,usa&country=brasil"
+
+
+class Stats:
+    """Latências e erros acumulados de uma rodada"""
+
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+
+    def percentile(self, fraction: float) -> float:
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] * 1000
+
+
+async def read_response(reader: asyncio.StreamReader) -> Tuple[int, bool, bytes]:
+    """
+    Lê uma resposta HTTP/1.1 (Content-Length ou chunked) e retorna o status, se
+    o servidor manteve a conexão aberta (workers síncronos do gunicorn fecham)
+    e o corpo
+    """
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("conexão encerrada pelo servidor")
+    status = int(status_line.split()[1])
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        body = bytearray()
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            body += (await reader.readexactly(size + 2))[:-2]
+            if size == 0:
+                break
+        body = bytes(body)
+    elif "content-length" in headers:
+        body = await reader.readexactly(int(headers["content-length"]))
+    elif status in (204, 304):
+        body = b""
+    else:
+        # Sem tamanho (ex.: arquivos do runserver): o corpo vai até o fim da conexão
+        body = await reader.read()
+        headers["connection"] = "close"
+
+    return status, headers.get("connection", "").lower() != "close", body
+
+
+async def client(url: str, deadline: float, stats: Stats) -> None:
+    """Um cliente: reaproveita a conexão até o fim do teste, reconectando se preciso"""
+    parts = urlsplit(url)
+    target = parts.path + (f"?{parts.query}" if parts.query else "")
+    request = (
+        f"GET {target} HTTP/1.1\r\nHost: {parts.netloc}\r\nAccept: application/json\r\n\r\n"
+    ).encode()
+    reader = writer = None
+
+    while time.perf_counter() < deadline:
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(parts.hostname, parts.port or 80)
+            start = time.perf_counter()
+            writer.write(request)
+            status, keep_alive, _ = await read_response(reader)
+            stats.latencies.append(time.perf_counter() - start)
+            if status >= 400:
+                stats.errors += 1
+            if not keep_alive:
+                writer.close()
+                writer = None
+        except (OSError, ValueError, IndexError, asyncio.IncompleteReadError):
+            stats.errors += 1
+            writer = None
+            await asyncio.sleep(0.05)
+
+    if writer is not None:
+        writer.close()
+
+
+async def run(url: str, clients: int, duration: float,
+              background: Optional[str] = None, background_clients: int = 0) -> Stats:
+    stats = Stats()
+    deadline = time.perf_counter() + duration
+    tasks = [client(url, deadline, stats) for _ in range(clients)]
+    if background:
+        tasks += [client(background, deadline, Stats()) for _ in range(background_clients)]
+    await asyncio.gather(*tasks)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga do dashboard")
+    parser.add_argument("--url", default=DEFAULT_URL)
+    parser.add_argument("--clients", type=int, nargs="+", default=[100, 500])
+    parser.add_argument("--duration", type=float, default=15.0, help="segundos por rodada")
+    parser.add_argument("--background", help="URL lenta requisitada em paralelo (fora das estatísticas)")
+    parser.add_argument("--background-clients", type=int, default=8)
+    args = parser.parse_args()
+
+    print(f"URL: {args.url}")
+    if args.background:
+        print(f"Carga de fundo: {args.background_clients} clientes em {args.background}")
+    print("clientes   req/s     p50 (ms)   p95 (ms)   p99 (ms)   erros")
+    for clients in args.clients:
+        stats = asyncio.run(run(
+            args.url, clients, args.duration, args.background, args.background_clients
+        ))
+        if not stats.latencies:
+            print(f"{clients:<9}  nenhuma resposta ({stats.errors} erros)")
+            continue
+        print(
+            f"{clients:<9}  {len(stats.latencies) / args.duration:>7.1f}   "
+            f"{statistics.median(stats.latencies) * 1000:>8.1f}   "
+            f"{stats.percentile(0.95):>8.1f}   {stats.percentile(0.99):>8.1f}   {stats.errors:>5}"
+        )
+
+
+if __name__ == "__main__":
+    main()
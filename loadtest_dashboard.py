@@ -0,0 +1,390 @@
+"""
+Teste de carga que reproduz o tráfego do dashboard
+
+Simula usuários (asyncio puro, sem dependências, funciona offline contra
+`manage.py runserver`, uvicorn ou gunicorn). Cada usuário abre a página e
+repete trocas de filtro separadas por um tempo de leitura (--think, média
+de uma distribuição exponencial). Uma troca de filtro faz, em paralelo e em
+conexões keep-alive como o navegador:
+
+- separate (padrão): countries-data + chart-data + state-data
+- bundle: uma chamada a /api/dashboard/, como o dashboard atual
+
+Perfis de usuário (--mix, pesos):
+- viewer: apenas trocas de filtro
+- exporter: a cada 1 a 3 trocas, uma exportação (export-xlsx, export-csv ou
+  relatório PowerPoint via /api/reports/ com polling e download)
+- uploader: a cada 1 a 3 trocas, um upload-csv de --upload-rows linhas para
+  o país --upload-country (grava no banco: use uma cópia dos dados)
+
+Os usuários entram aos poucos ao longo de --ramp segundos e o teste dura
+--duration segundos (rampa incluída). Ao final mostra, por endpoint, vazão,
+percentis de latência, taxa de erro (status >= 400 ou falha de conexão) e os
+status recebidos; a linha [troca de filtro] é o tempo até a última resposta
+da troca.
+Com --json o mesmo relatório, mais a linha do tempo por segundo, é gravado
+em arquivo.
+
+Uso:
+    python scripts/loadtest_dashboard.py --users 50 --ramp 30 --duration 120
+    python scripts/loadtest_dashboard.py --mix viewer=80,exporter=15,uploader=5 --json resultado.json
+    python scripts/loadtest_dashboard.py --pattern bundle --base http://127.0.0.1:8000
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+import uuid
+from collections import Counter, defaultdict
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+
+from loadtest import Stats, read_response
+
+COUNTRIES = ["brasil", "portugal", "italia", "usa"]
+METRICS = ["raw", "daily", "avg7", "avg14"]
+STATE_ORDERINGS = ["vaccinated", "vaccination_rate", "death_rate"]
+PROFILES = ("viewer", "exporter", "uploader")
+DEFAULT_MIX = "viewer=90,exporter=7,uploader=3"
+FILTER_CHANGE = "[troca de filtro]"
+REPORT_POLL_INTERVAL = 1.0  # segundos, como o dashboard
+REPORT_MAX_WAIT = 120  # segundos
+
+
+class EndpointStats(Stats):
+    """Latências, erros e status de um endpoint"""
+
+    def __init__(self):
+        super().__init__()
+        self.statuses = Counter()
+
+    def summary(self, elapsed: float) -> Dict:
+        count = len(self.latencies)
+        summary = {
+            "requests": count,
+            "throughput": round(count / elapsed, 2),
+            "errors": self.errors,
+            "error_rate": round(self.errors / count, 4) if count else None,
+            "statuses": {str(status): n for status, n in sorted(self.statuses.items(), key=str)},
+        }
+        if count:
+            summary.update({
+                "p50_ms": round(statistics.median(self.latencies) * 1000, 1),
+                "p90_ms": round(self.percentile(0.90), 1),
+                "p95_ms": round(self.percentile(0.95), 1),
+                "p99_ms": round(self.percentile(0.99), 1),
+                "max_ms": round(max(self.latencies) * 1000, 1),
+            })
+        return summary
+
+
+class Recorder:
+    """Resultados da rodada: estatísticas por endpoint e linha do tempo por segundo"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.endpoints: Dict[str, EndpointStats] = defaultdict(EndpointStats)
+        self.timeline: Dict[int, Counter] = defaultdict(Counter)
+        self.active_users = 0
+
+    def record(self, name: str, latency: float, status: Optional[int]) -> None:
+        """Registra uma resposta; status None é falha de conexão ou tempo esgotado"""
+        stats = self.endpoints[name]
+        stats.latencies.append(latency)
+        stats.statuses[status if status is not None else "falha"] += 1
+        second = self.timeline[int(time.perf_counter() - self.started)]
+        if name != FILTER_CHANGE:
+            second["requests"] += 1
+        if status is None or status >= 400:
+            stats.errors += 1
+            if name != FILTER_CHANGE:
+                second["errors"] += 1
+
+
+class Session:
+    """Conexões keep-alive de um usuário; requisições simultâneas usam conexões distintas"""
+
+    def __init__(self, base: str, recorder: Recorder, timeout: float):
+        parts = urlsplit(base)
+        self.host, self.port, self.netloc = parts.hostname, parts.port or 80, parts.netloc
+        self.recorder = recorder
+        self.timeout = timeout
+        self.idle: List[Tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+
+    async def request(self, name: str, method: str, target: str, body: bytes = b"",
+                      content_type: Optional[str] = None) -> Tuple[Optional[int], bytes]:
+        headers = f"{method} {target} HTTP/1.1\r\nHost: {self.netloc}\r\nAccept: application/json\r\n"
+        if method != "GET":
+            headers += f"Content-Length: {len(body)}\r\n"
+        if content_type:
+            headers += f"Content-Type: {content_type}\r\n"
+        start = time.perf_counter()
+        while True:
+            reused = bool(self.idle)
+            connection = None
+            try:
+                connection = self.idle.pop() if reused else await asyncio.wait_for(
+                    asyncio.open_connection(self.host, self.port), self.timeout)
+                reader, writer = connection
+                writer.write(headers.encode() + b"\r\n" + body)
+                status, keep_alive, data = await asyncio.wait_for(read_response(reader), self.timeout)
+                break
+            except (OSError, ValueError, IndexError, asyncio.IncompleteReadError) as e:
+                if connection is not None:
+                    connection[1].close()
+                # Conexão ociosa encerrada pelo servidor (keepalive): como o navegador, tenta em uma nova
+                if reused and isinstance(e, (ConnectionError, asyncio.IncompleteReadError)):
+                    continue
+                self.recorder.record(name, time.perf_counter() - start, None)
+                return None, b""
+            except asyncio.TimeoutError:
+                if connection is not None:
+                    connection[1].close()
+                self.recorder.record(name, time.perf_counter() - start, None)
+                return None, b""
+
+        self.recorder.record(name, time.perf_counter() - start, status)
+        if keep_alive:
+            self.idle.append(connection)
+        else:
+            writer.close()
+        return status, data
+
+    async def get(self, name: str, path: str, params: Optional[Dict] = None):
+        return await self.request(name, "GET", path + (f"?{urlencode(params)}" if params else ""))
+
+    async def post_json(self, name: str, path: str, payload: Dict):
+        return await self.request(name, "POST", path, json.dumps(payload).encode(), "application/json")
+
+    def close(self) -> None:
+        for _, writer in self.idle:
+            writer.close()
+        self.idle.clear()
+
+
+class User:
+    """Um usuário do dashboard com o perfil `profile`"""
+
+    def __init__(self, profile: str, session: Session, args, rng: random.Random):
+        self.profile = profile
+        self.session = session
+        self.args = args
+        self.rng = rng
+
+    async def think(self) -> None:
+        await asyncio.sleep(max(0.2, self.rng.expovariate(1 / self.args.think)) if self.args.think else 0)
+
+    async def filter_change(self) -> None:
+        country = self.rng.choice(COUNTRIES)
+        metric = self.rng.choice(METRICS)
+        countries = ",".join(COUNTRIES)
+        start = time.perf_counter()
+        if self.args.pattern == "bundle":
+            results = [await self.session.get("dashboard", "/api/dashboard/", {
+                "countries": countries, "country": country, "metric": metric,
+            })]
+        else:
+            results = await asyncio.gather(
+                self.session.get("countries-data", "/api/countries-data/", {"countries": countries}),
+                self.session.get("chart-data", "/api/chart-data/", {"country": country, "metric": metric}),
+                self.session.get("state-data", "/api/state-data/", {
+                    "country": country, "order_by": self.rng.choice(STATE_ORDERINGS),
+                }),
+            )
+        # Status da troca: o pior entre as respostas
+        statuses = [status for status, _ in results]
+        status = None if None in statuses else max(statuses)
+        self.session.recorder.record(FILTER_CHANGE, time.perf_counter() - start, status)
+
+    async def export(self) -> None:
+        kind = self.rng.choice(["xlsx", "csv", "report"])
+        if kind == "xlsx":
+            await self.session.get("export-xlsx", "/api/export-xlsx/", {"summary": 1})
+        elif kind == "csv":
+            await self.session.get("export-csv", "/api/export-csv/")
+        else:
+            await self.report()
+
+    async def report(self) -> None:
+        """Relatório como no dashboard: agenda, acompanha o job e baixa o arquivo"""
+        status, body = await self.session.post_json("reports", "/api/reports/", {"countries": COUNTRIES})
+        if status not in (200, 202):
+            return
+        job = json.loads(body)
+        deadline = time.perf_counter() + REPORT_MAX_WAIT
+        while job.get("status") not in ("done", "failed") and time.perf_counter() < deadline:
+            await asyncio.sleep(REPORT_POLL_INTERVAL)
+            status, body = await self.session.get("reports/<id>", f"/api/reports/{job['id']}/")
+            if status != 200:
+                return
+            job = json.loads(body)
+        if job.get("status") == "done":
+            await self.session.get("reports/<id>/download", f"/api/reports/{job['id']}/download/")
+
+    async def upload(self) -> None:
+        """upload-csv com valores aleatórios (cada importação muda os dados e a versão)"""
+        first = date.today() - timedelta(days=self.args.upload_rows)
+        lines = ["date,state_or_region,vaccinated,deaths,population"]
+        for day in range(self.args.upload_rows):
+            lines.append(f"{first + timedelta(days=day)},Nacional,"
+                         f"{self.rng.randint(1000, 10**6)},{self.rng.randint(0, 1000)},10000000")
+        boundary = uuid.uuid4().hex
+        body = (
+            f"--{boundary}\r\nContent-Disposition: form-data; name=\"country\"\r\n\r\n"
+            f"{self.args.upload_country}\r\n"
+            f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"loadtest.csv\"\r\n"
+            f"Content-Type: text/csv\r\n\r\n" + "\n".join(lines) + f"\r\n--{boundary}--\r\n"
+        ).encode()
+        await self.session.request("upload-csv", "POST", "/api/upload-csv/", body,
+                                   f"multipart/form-data; boundary={boundary}")
+
+    async def run(self, deadline: float) -> None:
+        await self.session.get("page", "/")
+        while time.perf_counter() < deadline:
+            for _ in range(1 if self.profile == "viewer" else self.rng.randint(1, 3)):
+                await self.filter_change()
+                await self.think()
+                if time.perf_counter() >= deadline:
+                    return
+            if self.profile == "exporter":
+                await self.export()
+                await self.think()
+            elif self.profile == "uploader":
+                await self.upload()
+                await self.think()
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    """viewer=90,exporter=7,uploader=3 -> pesos por perfil"""
+    mix = {}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in PROFILES:
+            raise argparse.ArgumentTypeError(f"Perfil inválido: {name} (use {', '.join(PROFILES)})")
+        mix[name] = float(weight or 1)
+    if not sum(mix.values()):
+        raise argparse.ArgumentTypeError("A soma dos pesos deve ser positiva")
+    return mix
+
+
+def assign_profiles(users: int, mix: Dict[str, float], rng: random.Random) -> List[str]:
+    """Distribui os perfis na proporção dos pesos (maiores restos) em ordem de entrada aleatória"""
+    total = sum(mix.values())
+    shares = {name: users * weight / total for name, weight in mix.items()}
+    counts = {name: int(share) for name, share in shares.items()}
+    for name in sorted(shares, key=lambda n: shares[n] - counts[n], reverse=True)[:users - sum(counts.values())]:
+        counts[name] += 1
+    profiles = [name for name, count in counts.items() for _ in range(count)]
+    rng.shuffle(profiles)
+    return profiles
+
+
+async def run(args) -> Tuple[Recorder, float, Counter]:
+    rng = random.Random(args.seed)
+    profiles = assign_profiles(args.users, args.mix, rng)
+    recorder = Recorder()
+    deadline = recorder.started + args.duration
+
+    async def start_user(index: int, profile: str) -> None:
+        await asyncio.sleep(args.ramp * index / max(1, args.users))
+        session = Session(args.base, recorder, args.timeout)
+        recorder.active_users += 1
+        try:
+            await User(profile, session, args, random.Random(rng.random())).run(deadline)
+        finally:
+            recorder.active_users -= 1
+            session.close()
+
+    async def sample_users() -> None:
+        while time.perf_counter() < deadline:
+            recorder.timeline[int(time.perf_counter() - recorder.started)]["users"] = recorder.active_users
+            await asyncio.sleep(1)
+
+    await asyncio.gather(sample_users(), *(start_user(i, p) for i, p in enumerate(profiles)))
+    return recorder, time.perf_counter() - recorder.started, Counter(profiles)
+
+
+def report(args, recorder: Recorder, elapsed: float, profiles: Counter) -> Dict:
+    endpoints = {name: stats.summary(elapsed) for name, stats in sorted(recorder.endpoints.items())}
+    requests = sum(s["requests"] for name, s in endpoints.items() if name != FILTER_CHANGE)
+    errors = sum(s["errors"] for name, s in endpoints.items() if name != FILTER_CHANGE)
+    return {
+        "config": {
+            "base": args.base, "users": args.users, "profiles": dict(profiles), "ramp": args.ramp,
+            "duration": args.duration, "think": args.think, "pattern": args.pattern, "seed": args.seed,
+        },
+        "elapsed": round(elapsed, 2),
+        "total": {
+            "requests": requests,
+            "throughput": round(requests / elapsed, 2),
+            "errors": errors,
+            "error_rate": round(errors / requests, 4) if requests else None,
+        },
+        "endpoints": endpoints,
+        "timeline": [
+            {"second": second, "users": counts["users"], "requests": counts["requests"], "errors": counts["errors"]}
+            for second, counts in sorted(recorder.timeline.items())
+        ],
+    }
+
+
+def print_summary(result: Dict) -> None:
+    config, total = result["config"], result["total"]
+    profiles = ", ".join(f"{name}={count}" for name, count in sorted(config["profiles"].items()))
+    print(f"{config['base']}: {config['users']} usuários ({profiles}), rampa {config['ramp']:.0f} s, "
+          f"{result['elapsed']:.0f} s, padrão {config['pattern']}\n")
+    print(f"{'endpoint':<24} {'req':>6} {'req/s':>7} {'p50':>8} {'p90':>8} {'p95':>8} {'p99':>8} "
+          f"{'max':>8} {'erros':>7}  status")
+    endpoints = result["endpoints"]
+    order = [FILTER_CHANGE] + [name for name in endpoints if name != FILTER_CHANGE]
+    for name in order:
+        stats = endpoints.get(name)
+        if stats is None:
+            continue
+        latencies = " ".join(f"{stats.get(key, 0):>8.1f}" for key in ("p50_ms", "p90_ms", "p95_ms", "p99_ms", "max_ms"))
+        statuses = " ".join(f"{status}:{count}" for status, count in stats["statuses"].items())
+        print(f"{name:<24} {stats['requests']:>6} {stats['throughput']:>7.1f} {latencies} "
+              f"{stats['error_rate'] or 0:>7.1%}  {statuses}")
+    print(f"\ntotal: {total['requests']} requisições, {total['throughput']:.1f} req/s, "
+          f"{total['error_rate'] or 0:.1%} de erros (latências em ms)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga com o tráfego do dashboard")
+    parser.add_argument("--base", default="http://127.0.0.1:8000", help="endereço do servidor")
+    parser.add_argument("--users", type=int, default=50, help="usuários simultâneos ao fim da rampa")
+    parser.add_argument("--ramp", type=float, default=30.0, help="segundos até todos os usuários entrarem")
+    parser.add_argument("--duration", type=float, default=120.0, help="duração total (s), rampa incluída")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f"pesos dos perfis (padrão {DEFAULT_MIX})")
+    parser.add_argument("--think", type=float, default=3.0, help="tempo médio entre ações (s); 0 = sem pausa")
+    parser.add_argument("--pattern", choices=("separate", "bundle"), default="separate",
+                        help="chamadas por troca de filtro")
+    parser.add_argument("--upload-rows", type=int, default=200, help="linhas por upload-csv")
+    parser.add_argument("--upload-country", default="loadtest", help="país dos uploads")
+    parser.add_argument("--timeout", type=float, default=60.0, help="tempo máximo por requisição (s)")
+    parser.add_argument("--seed", type=int, default=1, help="semente (mesma sequência de ações)")
+    parser.add_argument("--json", help="grava o relatório em JSON neste arquivo ('-' para a saída padrão)")
+    args = parser.parse_args()
+
+    recorder, elapsed, profiles = asyncio.run(run(args))
+    result = report(args, recorder, elapsed, profiles)
+
+    if args.json == "-":
+        json.dump(result, sys.stdout, indent=2)
+        print()
+        return
+    print_summary(result)
+    if args.json:
+        with open(args.json, "w") as output:
+            json.dump(result, output, indent=2)
+        print(f"Relatório: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
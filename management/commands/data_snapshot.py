@@ -0,0 +1,49 @@
+"""
+Snapshot dos dados para inicialização rápida (ver vaccine.seed)
+
+Uso:
+    python manage.py data_snapshot build              # gera o snapshot do banco atual
+    python manage.py data_snapshot restore            # restaura se o banco estiver vazio
+    python manage.py data_snapshot restore --force    # substitui os dados atuais
+    python manage.py data_snapshot status             # frescor dos dados do banco atual
+"""
+import json
+import time
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = "Gera ou restaura o snapshot dos dados usado na inicialização do container"
+
+    def add_arguments(self, parser):
+        parser.add_argument("action", choices=["build", "restore", "status"])
+        parser.add_argument("--path", help="Arquivo do snapshot (padrão: settings.DATA_SEED_PATH)")
+        parser.add_argument("--force", action="store_true",
+                            help="Restaura mesmo que o banco já tenha dados")
+
+    def handle(self, *args, **options):
+        from vaccine.seed import build_snapshot, data_freshness, restore_snapshot
+
+        start = time.perf_counter()
+        try:
+            if options["action"] == "build":
+                summary = build_snapshot(options["path"])
+                self.stdout.write(self.style.SUCCESS(
+                    f"Snapshot gerado em {time.perf_counter() - start:.2f} s: {summary['path']} "
+                    f"({summary['size'] / 1024 / 1024:.1f} MB, {summary['rows']} registros, "
+                    f"dataset v{summary['version']}, dados até {summary['last_date']})"
+                ))
+            elif options["action"] == "restore":
+                summary = restore_snapshot(options["path"], force=options["force"])
+                if summary is None:
+                    self.stdout.write("Banco já possui dados; snapshot não restaurado (use --force)")
+                else:
+                    self.stdout.write(self.style.SUCCESS(
+                        f"Snapshot restaurado em {time.perf_counter() - start:.2f} s: "
+                        f"{summary['rows']} registros, dataset v{summary['version']}, "
+                        f"dados até {summary['last_date']}"
+                    ))
+            else:
+                self.stdout.write(json.dumps(data_freshness(), indent=2))
+        except (ValueError, FileNotFoundError) as e:
+            raise CommandError(str(e))
@@ -0,0 +1,116 @@
+"""
+Geração em lote de relatórios PowerPoint
+
+Um relatório por país (--by country), por estado/região (--by state) ou por
+agrupamento customizado (--group nome=pais1,pais2), gerados em paralelo por um
+pool de processos. Os snapshots são lidos uma única vez e enviados a cada
+worker na inicialização; os workers só desenham os decks, sem acessar o banco.
+
+Uso:
+    python manage.py generate_reports --by state --countries brasil --output relatorios
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, Tuple
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils.text import slugify
+
+_snapshot = None
+
+
+def _init_worker(snapshot: Dict) -> None:
+    """Inicializa o worker com o snapshot compartilhado (Django é preparado se preciso)"""
+    global _snapshot
+    django.setup()
+    _snapshot = snapshot
+
+
+def _render(name: str, options: Dict, path: str) -> Tuple[str, str, float, int]:
+    """Gera um relatório a partir do snapshot do worker e grava em `path`"""
+    from vaccine.presentation import render_report
+    from vaccine.reports import report_data
+
+    start = time.perf_counter()
+    content = render_report(data=report_data(options, snapshot=_snapshot))
+    Path(path).write_bytes(content)
+    return name, path, time.perf_counter() - start, len(content)
+
+
+class Command(BaseCommand):
+    help = "Gera relatórios PowerPoint em lote (por país, estado ou agrupamento) em paralelo"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--by", choices=["country", "state"],
+                            help="Um relatório por país ou por estado/região (padrão: país)")
+        parser.add_argument("--group", action="append", default=[], metavar="NOME=PAIS1,PAIS2",
+                            help="Agrupamento customizado de países (pode repetir)")
+        parser.add_argument("--countries", help="Restringe aos países informados (separados por vírgula)")
+        parser.add_argument("--output", default="relatorios", help="Diretório de saída")
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+
+    def handle(self, *args, **options):
+        from vaccine.reports import load_report_snapshot
+
+        countries = [c.strip().lower() for c in options["countries"].split(",")] if options["countries"] else None
+        snapshot = load_report_snapshot(countries)
+        if not snapshot["rows"]:
+            raise CommandError("Nenhum snapshot encontrado. Execute a coleta de dados primeiro.")
+
+        reports = self.plan_reports(snapshot, options["by"], options["group"])
+        output = Path(options["output"])
+        output.mkdir(parents=True, exist_ok=True)
+        self.stdout.write(
+            f"{len(reports)} relatórios (dataset v{snapshot['version']}, "
+            f"{len(snapshot['rows'])} séries), {options['workers']} workers"
+        )
+
+        # Conexões abertas não devem ser herdadas pelos processos filhos
+        connections.close_all()
+
+        start = time.perf_counter()
+        total_size = 0
+        with ProcessPoolExecutor(max_workers=options["workers"], initializer=_init_worker,
+                                 initargs=(snapshot,)) as executor:
+            futures = [
+                executor.submit(_render, name, report_options, str(output / f"{slugify(name)}.pptx"))
+                for name, report_options in reports
+            ]
+            for future in as_completed(futures):
+                name, path, elapsed, size = future.result()
+                total_size += size
+                self.stdout.write(f"  {name:<40} {elapsed * 1000:8.0f} ms  {size / 1024:8.1f} KB  {path}")
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(reports)} relatórios em {elapsed:.2f} s "
+            f"({len(reports) / elapsed:.1f} relatórios/s, {total_size / 1024 / 1024:.1f} MB)"
+        ))
+
+    def plan_reports(self, snapshot: Dict, by: str, groups: List[str]) -> List[Tuple[str, Dict]]:
+        """Lista (nome, opções) dos relatórios pedidos"""
+        series = sorted({(row["country"], row["state_or_region"]) for row in snapshot["rows"]},
+                        key=lambda item: (item[0], item[1] or ""))
+        reports = []
+
+        for group in groups:
+            name, _, members = group.partition("=")
+            if not members:
+                raise CommandError(f"Agrupamento inválido: {group} (use NOME=PAIS1,PAIS2)")
+            reports.append((name, {"countries": members, "title": name}))
+
+        if by == "state":
+            reports += [
+                (f"{country} {state}", {"countries": [country], "states": [state]})
+                for country, state in series if state
+            ]
+        elif by == "country" or not groups:
+            reports += [
+                (country, {"countries": [country]})
+                for country in dict.fromkeys(country for country, _ in series)
+            ]
+
+        return reports
@@ -0,0 +1,98 @@
+"""
+Ingestão dos dados das fontes externas (ver vaccine.ingestion)
+
+Pode ser agendada (cron, systemd timer): uma trava de arquivo impede
+execuções sobrepostas e cada execução fica registrada em IngestionRun com as
+contagens de linhas e a duração de cada etapa.
+
+Uso:
+    python manage.py ingest
+    python manage.py ingest --source owid --since 2024-01-01 --countries brasil,usa --workers 4
+    python manage.py ingest --dry-run
+    python manage.py ingest --force   # interpreta mesmo o que não mudou na fonte
+    python manage.py ingest --source feeds   # feeds de CONNECTOR_FEEDS_FILE
+    python manage.py ingest --source owid --fallback sample   # inicialização do container
+"""
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+
+
+def _parse_date(value: str) -> date:
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f"Data inválida: {value} (use AAAA-MM-DD)") from None
+
+
+class Command(BaseCommand):
+    help = "Coleta os dados de uma fonte e grava apenas as linhas novas ou alteradas"
+
+    def add_arguments(self, parser):
+        from vaccine.ingestion import SOURCES
+
+        parser.add_argument("--source", choices=sorted(SOURCES), default="owid", help="Fonte dos dados")
+        parser.add_argument("--since", help="Considera apenas datas a partir de AAAA-MM-DD")
+        parser.add_argument("--countries", help="Países (separados por vírgula); padrão: todos da fonte")
+        parser.add_argument("--workers", type=int, default=4, help="Países processados em paralelo")
+        parser.add_argument("--dry-run", action="store_true", help="Compara com o banco sem gravar")
+        parser.add_argument("--force", action="store_true",
+                            help="Interpreta os arquivos da fonte mesmo sem alterações desde a última ingestão")
+        parser.add_argument("--fallback", choices=sorted(SOURCES),
+                            help="Fonte usada se a principal falhar e o banco estiver vazio")
+
+    def handle(self, *args, **options):
+        from vaccine.ingestion import IngestionError, IngestionLocked, run_ingestion
+        from vaccine.models import VaccineData
+
+        countries = [c.strip().lower() for c in options["countries"].split(",") if c.strip()] \
+            if options["countries"] else None
+        kwargs = {
+            "countries": countries,
+            "since": _parse_date(options["since"]) if options["since"] else None,
+            "workers": options["workers"],
+            "dry_run": options["dry_run"],
+            "force": options["force"],
+        }
+
+        try:
+            run = run_ingestion(options["source"], **kwargs)
+        except IngestionLocked as e:
+            raise CommandError(str(e))
+        except IngestionError as e:
+            if not options["fallback"]:
+                raise CommandError(str(e))
+            self.stderr.write(self.style.WARNING(str(e)))
+            if VaccineData.objects.exists():
+                # Ex.: snapshot restaurado na inicialização; não sobrescrever com a fonte reserva
+                self.stdout.write("Mantendo os dados existentes")
+                return
+            self.stdout.write(f"Usando a fonte {options['fallback']}...")
+            try:
+                run = run_ingestion(options["fallback"], **{**kwargs, "countries": None})
+            except (IngestionError, IngestionLocked) as e:
+                raise CommandError(str(e))
+
+        self._report(run)
+
+    def _report(self, run):
+        title = f"Ingestão #{run.id} ({run.source}{', simulação' if run.dry_run else ''})"
+        self.stdout.write(title)
+        self.stdout.write(f"  {'país':<12} {'lidas':>8} {'inseridas':>10} {'atualizadas':>12} {'inalteradas':>12}")
+        for country, counts in run.countries.items():
+            self.stdout.write(
+                f"  {country:<12} {counts['read']:>8} {counts['inserted']:>10} "
+                f"{counts['updated']:>12} {counts['unchanged']:>12}"
+                f"{'  (sem alterações na fonte)' if counts.get('skipped') else ''}"
+            )
+        stages = ", ".join(f"{stage} {seconds:.2f} s" for stage, seconds in run.stages.items())
+        self.stdout.write(f"  etapas: {stages}")
+        for warning in filter(None, run.error.splitlines()):
+            self.stderr.write(self.style.WARNING(f"  {warning}"))
+        total = (run.finished_at - run.started_at).total_seconds()
+        summary = (
+            f"{run.rows_read} linhas lidas, {run.rows_inserted} inseridas, {run.rows_updated} atualizadas, "
+            f"{run.rows_unchanged} inalteradas em {total:.2f} s"
+        )
+        if run.dataset_version is not None:
+            summary += f" (dataset v{run.dataset_version})"
+        self.stdout.write(self.style.SUCCESS(summary))
@@ -0,0 +1,33 @@
+"""
+Publica os agregados mapeados em memória lidos pelos workers (ver vaccine.aggregates)
+
+Normalmente publicados a cada ingestão; este comando gera a versão completa a
+partir do banco, por exemplo após restaurar um snapshot ou alterar dados
+diretamente.
+
+Uso:
+    python manage.py publish_aggregates
+    python manage.py publish_aggregates --countries brasil,usa
+"""
+import time
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "Publica os agregados do dashboard em arquivos NumPy mapeados em memória"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--countries", help="Relê apenas os países informados (separados por vírgula)")
+
+    def handle(self, *args, **options):
+        from vaccine.aggregates import current_snapshot, publish_aggregates
+
+        countries = [c.strip().lower() for c in options["countries"].split(",")] if options["countries"] else None
+        start = time.perf_counter()
+        path = publish_aggregates(countries)
+        snapshot = current_snapshot()
+        size = sum(file.stat().st_size for file in path.iterdir())
+        self.stdout.write(self.style.SUCCESS(
+            f"Agregados v{snapshot.version} publicados em {time.perf_counter() - start:.2f} s: "
+            f"{path} ({len(snapshot.countries)} países, {size / 1024:.1f} KB)"
+        ))
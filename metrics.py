@@ -0,0 +1,210 @@
+"""
+Métricas derivadas: variação diária e médias móveis por série
+
+Calculadas na ingestão, de forma vetorizada (diff/rolling por série com pandas),
+e gravadas em DailyMetric. Quando chegam novos dias, apenas a cauda afetada é
+recalculada: carregamos a janela anterior necessária para o diff e as médias
+móveis e regravamos somente as datas a partir de `since`.
+
+pandas é importado dentro das funções de cálculo: as rotas de leitura usam
+este módulo (resolve_metric, metric_series) sem carregar a biblioteca.
+"""
+from datetime import date, timedelta
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional
+from django.db import transaction
+from django.db.models import F, FloatField, Q, Sum
+from django.db.models.functions import Cast
+from .models import VaccineData, DailyMetric
+from . import aggregates
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+WINDOWS = (7, 14)
+
+# Dias anteriores a `since` necessários para recalcular a cauda
+LOOKBACK_DAYS = max(WINDOWS) + 1
+# Séries recalculadas por vez em refresh_daily_metrics
+SERIES_PER_BATCH = 50
+
+METRIC_RAW = "raw"
+METRIC_FIELDS = {
+    "daily": ("new_vaccinated", "new_deaths"),
+    "avg7": ("vaccinated_avg_7", "deaths_avg_7"),
+    "avg14": ("vaccinated_avg_14", "deaths_avg_14"),
+}
+METRICS = (METRIC_RAW,) + tuple(METRIC_FIELDS)
+
+VACCINATION_RATE_SCALE = 100  # % da população
+DEATH_RATE_SCALE = 100_000  # óbitos por 100 mil habitantes
+
+
+def resolve_metric(metric: Optional[str]) -> str:
+    """Valida a métrica pedida em get_chart_data"""
+    metric = metric or METRIC_RAW
+    if metric not in METRICS:
+        raise ValueError(f"Métrica inválida: {metric}")
+    return metric
+
+
+def per_capita(value: float, population: int, scale: int) -> Optional[float]:
+    """Taxa per capita (None quando a população é desconhecida)"""
+    if not population:
+        return None
+    return round(value * scale / population, 4)
+
+
+def refresh_rates(country: str, states: Optional[Iterable[str]] = None,
+                  since: Optional[date] = None) -> int:
+    """
+    Grava vaccination_rate e death_rate das linhas de um país em um único
+    UPDATE (o cálculo roda no banco, sem carregar as linhas no Python).
+    """
+    rows = VaccineData.objects.filter(country=country, population__gt=0)
+    if states is not None:
+        rows = rows.filter(state_or_region__in=list(states))
+    if since is not None:
+        rows = rows.filter(date__gte=since)
+
+    return rows.update(
+        vaccination_rate=Cast("vaccinated", FloatField()) * VACCINATION_RATE_SCALE / F("population"),
+        death_rate=Cast("deaths", FloatField()) * DEATH_RATE_SCALE / F("population"),
+    )
+
+
+def compute_daily_metrics(df: "pd.DataFrame", cumulative: bool = True) -> "pd.DataFrame":
+    """
+    Calcula variações diárias e médias móveis para um DataFrame com as colunas
+    state_or_region, date, vaccinated, deaths (uma ou várias séries).
+
+    Em séries acumuladas, valores ausentes chegam como 0 (a OWID não informa
+    todos os campos todos os dias): repetimos a última leitura da série em vez
+    de tratá-los como quedas e saltos. A primeira linha de cada série (ou da
+    janela lida) não tem variação conhecida: fica fora do resultado e das
+    médias. No dia em que um campo aparece pela primeira vez a variação é 0,
+    e não o valor acumulado.
+    """
+    import pandas as pd
+
+    df = df.assign(
+        date=pd.to_datetime(df["date"]),
+        _series=df["state_or_region"].fillna(""),
+    ).sort_values(["_series", "date"], kind="stable").reset_index(drop=True)
+
+    values = df[["vaccinated", "deaths"]]
+    if cumulative:
+        levels = values.where(values > 0).groupby(df["_series"]).ffill()
+        deltas = levels.groupby(df["_series"]).diff().fillna(0)
+        known = df["_series"].duplicated().to_numpy()
+        df, deltas = df[known].reset_index(drop=True), deltas[known].reset_index(drop=True)
+    else:
+        deltas = values
+
+    df["new_vaccinated"] = deltas["vaccinated"].astype("int64")
+    df["new_deaths"] = deltas["deaths"].astype("int64")
+
+    daily = df.set_index("date").groupby("_series", sort=True)[["new_vaccinated", "new_deaths"]]
+    for window in WINDOWS:
+        # Janela por calendário: dias ausentes não distorcem a média
+        rolled = daily.rolling(f"{window}D").mean()
+        df[f"vaccinated_avg_{window}"] = rolled["new_vaccinated"].to_numpy()
+        df[f"deaths_avg_{window}"] = rolled["new_deaths"].to_numpy()
+
+    df["date"] = df["date"].dt.date
+    return df.drop(columns="_series")
+
+
+def _series_filter(states: List[Optional[str]]) -> Q:
+    """Filtro pelas séries (estados/regiões) informadas, incluindo a série sem estado"""
+    condition = Q(state_or_region__in=[state for state in states if state is not None])
+    if None in states:
+        condition |= Q(state_or_region__isnull=True)
+    return condition
+
+
+def refresh_daily_metrics(country: str, cumulative: bool = True,
+                          states: Optional[Iterable[str]] = None,
+                          since: Optional[date] = None) -> int:
+    """
+    Recalcula DailyMetric de um país. Com `since`, apenas as datas a partir
+    dele são regravadas (a janela anterior é lida só para o cálculo).
+    As séries são processadas em lotes de SERIES_PER_BATCH: como cada série
+    tem no máximo uma linha por dia, a memória não depende do tamanho do país.
+    """
+    if states is None:
+        # Inclui as séries que só existem em DailyMetric, para removê-las
+        states = {
+            state for model in (VaccineData, DailyMetric)
+            for state in model.objects.filter(country=country).order_by().values_list(
+                "state_or_region", flat=True
+            ).distinct()
+        }
+    states = sorted(set(states), key=lambda state: (state is None, state or ""))
+
+    updated = 0
+    for start in range(0, len(states), SERIES_PER_BATCH):
+        updated += _refresh_daily_metrics_batch(
+            country, cumulative, states[start:start + SERIES_PER_BATCH], since
+        )
+    return updated
+
+
+def _refresh_daily_metrics_batch(country: str, cumulative: bool, states: List[Optional[str]],
+                                 since: Optional[date]) -> int:
+    rows = VaccineData.objects.filter(_series_filter(states), country=country)
+    if since is not None:
+        rows = rows.filter(date__gte=since - timedelta(days=LOOKBACK_DAYS))
+
+    records = list(rows.order_by().values_list("state_or_region", "date", "vaccinated", "deaths"))
+    if not records:
+        return 0
+
+    import pandas as pd
+
+    df = pd.DataFrame.from_records(
+        records, columns=["state_or_region", "date", "vaccinated", "deaths"]
+    )
+    df = compute_daily_metrics(df, cumulative=cumulative)
+    if since is not None:
+        df = df[df["date"] >= since]
+
+    metric_columns = ["new_vaccinated", "new_deaths"] + [
+        f"{name}_avg_{window}" for window in WINDOWS for name in ("vaccinated", "deaths")
+    ]
+    objects = [
+        DailyMetric(country=country, state_or_region=record["state_or_region"],
+                    date=record["date"], **{column: record[column] for column in metric_columns})
+        for record in df[["state_or_region", "date"] + metric_columns].to_dict("records")
+    ]
+
+    stale = DailyMetric.objects.filter(_series_filter(states), country=country)
+    if since is not None:
+        stale = stale.filter(date__gte=since)
+
+    with transaction.atomic():
+        stale.delete()
+        DailyMetric.objects.bulk_create(objects, batch_size=1000)
+
+    return len(objects)
+
+
+def metric_series(country: str, metric: str) -> List[Dict]:
+    """Série diária do país (somando estados/regiões) para uma métrica derivada"""
+    vaccinated_field, deaths_field = METRIC_FIELDS[metric]
+    published = aggregates.metric_series(country, vaccinated_field, deaths_field)
+    if published is not None:
+        return published
+
+    rows = DailyMetric.objects.filter(country=country).values("date").annotate(
+        vaccinated=Sum(vaccinated_field),
+        deaths=Sum(deaths_field),
+    ).order_by("date")
+
+    return [
+        {
+            "date": row["date"],
+            "vaccinated": round(row["vaccinated"] or 0, 2),
+            "deaths": round(row["deaths"] or 0, 2),
+        }
+        for row in rows
+    ]
@@ -1,12 +1,41 @@
 from django.db import models
+from .dimensions import DimensionField
+
+
+class Country(models.Model):
+    """Dimensão de países: VaccineData e DailyMetric guardam apenas o id (ver vaccine.dimensions)"""
+    id = models.SmallAutoField(primary_key=True)
+    name = models.CharField(max_length=100, unique=True)
+
+    class Meta:
+        ordering = ["name"]
+
+    def __str__(self):
+        return self.name
+
+
+class Region(models.Model):
+    """Dimensão de estados/regiões; o mesmo nome (ex.: "Nacional") é compartilhado entre países"""
+    id = models.SmallAutoField(primary_key=True)
+    name = models.CharField(max_length=100, unique=True)
+
+    class Meta:
+        ordering = ["name"]
+
+    def __str__(self):
+        return self.name
+
 
 class VaccineData(models.Model):
-    country = models.CharField(max_length=100)
-    state_or_region = models.CharField(max_length=100, null=True, blank=True)
+    country = DimensionField("vaccine.Country")
+    state_or_region = DimensionField("vaccine.Region", null=True, blank=True)
     date = models.DateField()
     vaccinated = models.IntegerField(default=0)
     deaths = models.IntegerField(default=0)
     population = models.IntegerField(default=0)
+    # Taxas per capita calculadas na ingestão (apenas séries acumuladas)
+    vaccination_rate = models.FloatField(null=True, blank=True, db_index=True)  # % da população
+    death_rate = models.FloatField(null=True, blank=True, db_index=True)  # por 100 mil hab.
     
     class Meta:
         unique_together = ["country", "state_or_region", "date"]
@@ -18,3 +47,193 @@ class VaccineData(models.Model):
     
     def __str__(self):
         return f"{self.country} - {self.state_or_region} - {self.date}"
+
+
+class SeriesSnapshot(models.Model):
+    """
+    Última leitura de cada série (país, estado/região), mantida na ingestão.
+    Permite calcular totais em O(grupos) em vez de somar todas as linhas.
+    """
+    CUMULATIVE = "cumulative"
+    INCREMENTAL = "incremental"
+    SEMANTICS_CHOICES = [
+        (CUMULATIVE, "Acumulado"),
+        (INCREMENTAL, "Incremental"),
+    ]
+
+    country = models.CharField(max_length=100)
+    state_or_region = models.CharField(max_length=100, null=True, blank=True)
+    source = models.CharField(max_length=50, default="owid")
+    semantics = models.CharField(max_length=20, choices=SEMANTICS_CHOICES, default=CUMULATIVE)
+    last_date = models.DateField()
+    vaccinated = models.BigIntegerField(default=0)
+    deaths = models.BigIntegerField(default=0)
+    population = models.BigIntegerField(default=0)
+    vaccination_rate = models.FloatField(null=True, blank=True)  # % da população
+    death_rate = models.FloatField(null=True, blank=True)  # por 100 mil hab.
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ["country", "state_or_region"]
+        ordering = ["country", "state_or_region"]
+        indexes = [
+            models.Index(fields=["country", "vaccination_rate"]),
+            models.Index(fields=["country", "death_rate"]),
+        ]
+
+    def __str__(self):
+        return f"{self.country} - {self.state_or_region} ({self.last_date})"
+
+
+class DailyMetric(models.Model):
+    """
+    Variação diária e médias móveis (7 e 14 dias) de cada série.
+    Calculadas na ingestão a partir de VaccineData (apenas a cauda afetada).
+    """
+    country = DimensionField("vaccine.Country")
+    state_or_region = DimensionField("vaccine.Region", null=True, blank=True)
+    date = models.DateField()
+    new_vaccinated = models.BigIntegerField(default=0)
+    new_deaths = models.BigIntegerField(default=0)
+    vaccinated_avg_7 = models.FloatField(default=0)
+    vaccinated_avg_14 = models.FloatField(default=0)
+    deaths_avg_7 = models.FloatField(default=0)
+    deaths_avg_14 = models.FloatField(default=0)
+
+    class Meta:
+        unique_together = ["country", "state_or_region", "date"]
+        ordering = ["date"]
+
+    def __str__(self):
+        return f"{self.country} - {self.state_or_region} - {self.date}"
+
+
+class DataChange(models.Model):
+    """
+    Registro de cada alteração do conjunto de dados.
+    O id funciona como versão do dataset e é anunciado via /api/events/.
+    """
+    countries = models.JSONField(default=list)
+    source = models.CharField(max_length=50, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["id"]
+
+    def __str__(self):
+        return f"v{self.id} - {', '.join(self.countries)}"
+
+
+class ArtifactJob(models.Model):
+    """
+    Arquivo gerado em segundo plano (relatórios PowerPoint e exportações).
+    A chave combina tipo, opções e versão do dataset: cada combinação é gerada
+    uma única vez e os downloads seguintes servem o arquivo já pronto.
+    """
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (PENDING, "Na fila"),
+        (RUNNING, "Gerando"),
+        (DONE, "Pronto"),
+        (FAILED, "Falhou"),
+    ]
+
+    kind = models.CharField(max_length=50)
+    key = models.CharField(max_length=64, unique=True)
+    options = models.JSONField(default=dict)
+    dataset_version = models.IntegerField(default=0)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=PENDING, db_index=True)
+    path = models.CharField(max_length=500, blank=True)
+    size = models.BigIntegerField(default=0)
+    error = models.TextField(blank=True)
+    expires_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.kind} v{self.dataset_version} - {self.status}"
+
+
+class UploadSession(models.Model):
+    """
+    Upload de CSV em partes numeradas (vaccine.uploads). As partes são
+    gravadas em disco na ordem e a importação começa a ler o arquivo enquanto
+    as partes seguintes ainda estão chegando.
+    """
+    RECEIVING = "receiving"
+    PROCESSING = "processing"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (RECEIVING, "Recebendo"),
+        (PROCESSING, "Importando"),
+        (DONE, "Concluído"),
+        (FAILED, "Falhou"),
+    ]
+
+    country = models.CharField(max_length=100)
+    semantics = models.CharField(max_length=20)
+    filename = models.CharField(max_length=255, blank=True)
+    size = models.BigIntegerField()  # tamanho total declarado no início
+    chunk_size = models.IntegerField()
+    received = models.BigIntegerField(default=0)  # bytes contíguos gravados
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=RECEIVING, db_index=True)
+    # Última atividade do leitor que importa o arquivo (None: nenhum leitor)
+    parser_heartbeat = models.DateTimeField(null=True, blank=True)
+    summary = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.country} ({self.filename}) - {self.status}"
+
+    @property
+    def next_chunk(self) -> int:
+        """Número da próxima parte esperada (usado para retomar o upload)"""
+        return -(-self.received // self.chunk_size)
+
+
+class IngestionRun(models.Model):
+    """
+    Execução de `manage.py ingest` (vaccine.ingestion): opções, linhas lidas,
+    inseridas, atualizadas e inalteradas, e a duração de cada etapa.
+    """
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (RUNNING, "Em execução"),
+        (DONE, "Concluída"),
+        (FAILED, "Falhou"),
+    ]
+
+    source = models.CharField(max_length=50)
+    options = models.JSONField(default=dict)  # since, countries, workers
+    dry_run = models.BooleanField(default=False)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=RUNNING, db_index=True)
+    rows_read = models.IntegerField(default=0)
+    rows_inserted = models.IntegerField(default=0)
+    rows_updated = models.IntegerField(default=0)
+    rows_unchanged = models.IntegerField(default=0)
+    stages = models.JSONField(default=dict)  # {etapa: segundos}
+    countries = models.JSONField(default=dict)  # {país: {read, inserted, updated, unchanged}}
+    dataset_version = models.IntegerField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-started_at"]
+
+    def __str__(self):
+        return f"{self.source} ({self.started_at:%Y-%m-%d %H:%M}) - {self.status}"
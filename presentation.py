@@ -0,0 +1,215 @@
+"""
+Desenho do deck PowerPoint a partir de vaccine.reports.report_data
+
+Único módulo que importa python-pptx (e, com ele, lxml e Pillow). É importado
+apenas na geração de um relatório, para que os workers que nunca geram
+relatórios não carreguem a biblioteca.
+"""
+import io
+from typing import Dict, List, Optional
+from pptx import Presentation
+from pptx.chart.data import CategoryChartData
+from pptx.enum.chart import XL_CHART_TYPE, XL_LEGEND_POSITION, XL_MARKER_STYLE
+from pptx.util import Inches, Pt
+from pptx.enum.text import PP_ALIGN
+from pptx.dml.color import RGBColor
+from .reports import (
+    CONCLUSIONS, METHODOLOGY, RECOMMENDATIONS, STATES_PER_SLIDE, country_name, report_data
+)
+
+# Cores da apresentação
+TEMA_AZUL = RGBColor(0, 102, 204)
+TEXTO_BRANCO = RGBColor(255, 255, 255)
+
+
+def _style(text_frame, size: int, space_before: int) -> None:
+    for paragraph in text_frame.paragraphs:
+        paragraph.font.size = Pt(size)
+        paragraph.space_before = Pt(space_before)
+
+
+def _content_slide(prs, title: str, text: str, size: int = 18, space_before: int = 12):
+    slide = prs.slides.add_slide(prs.slide_layouts[1])
+    slide.shapes.title.text = title
+    content = slide.placeholders[1].text_frame
+    content.text = text
+    _style(content, size, space_before)
+    return slide
+
+
+def _coverage_status(vaccination_rate: Optional[float]) -> str:
+    if vaccination_rate is None:
+        return "indefinida (população desconhecida)"
+    if vaccination_rate > 80:
+        return "favorável"
+    return "regular" if vaccination_rate > 60 else "crítica"
+
+
+def _country_text(country: str, totals: Dict) -> str:
+    if not totals["vaccinated"] and not totals["deaths"]:
+        return f"Dados indisponíveis para {country_name(country)}"
+
+    vaccination_rate = totals["vaccination_rate"]
+    death_rate = totals["death_rate"]
+    lines = [
+        f"Vacinados: {totals['vaccinated']:,.0f}",
+        f"Óbitos: {totals['deaths']:,.0f}",
+        f"Taxa de Vacinação: {vaccination_rate:.1f}%" if vaccination_rate is not None
+        else "Taxa de Vacinação: indisponível",
+        f"Taxa de Mortalidade: {death_rate:.2f} por 100k hab" if death_rate is not None
+        else "Taxa de Mortalidade: indisponível",
+        f"Análise: {country_name(country)} apresenta situação "
+        f"{_coverage_status(vaccination_rate)} de vacinação.",
+    ]
+    return "\n\n".join(lines)
+
+
+def _chart_slide(prs, title: str, chart_type, categories: List[str], series: Dict[str, List],
+                 number_format: str = "#,##0"):
+    """Slide com um gráfico nativo (linha ou barras) a partir de dados já agregados"""
+    slide = prs.slides.add_slide(prs.slide_layouts[5])  # Title Only
+    slide.shapes.title.text = title
+
+    chart_data = CategoryChartData(number_format=number_format)
+    chart_data.categories = categories
+    for name, values in series.items():
+        chart_data.add_series(name, values)
+
+    chart = slide.shapes.add_chart(
+        chart_type, Inches(0.5), Inches(1.6), Inches(9), Inches(5.5), chart_data
+    ).chart
+    chart.has_legend = len(series) > 1
+    if chart.has_legend:
+        chart.legend.position = XL_LEGEND_POSITION.BOTTOM
+        chart.legend.include_in_layout = False
+    chart.value_axis.tick_labels.font.size = Pt(11)
+    chart.category_axis.tick_labels.font.size = Pt(10)
+
+    if chart_type == XL_CHART_TYPE.LINE:
+        for plot_series in chart.plots[0].series:
+            plot_series.smooth = False
+            plot_series.marker.style = XL_MARKER_STYLE.NONE
+    return slide
+
+
+def _chart_slides(prs, data: Dict) -> None:
+    """Evolução da vacinação, óbitos diários (média 7 dias) e cobertura"""
+    countries = data["countries"]
+    series = data["series"]
+    if series["dates"]:
+        categories = [day.strftime("%d/%m/%Y") for day in series["dates"]]
+        for field, title in (("vaccinated", "Evolução: Vacinados"),
+                             ("deaths_avg_7", "Óbitos Diários (média móvel 7 dias)")):
+            values = {country_name(c): series[field][c] for c in countries if any(series[field][c])}
+            if values:
+                _chart_slide(prs, title, XL_CHART_TYPE.LINE, categories, values)
+
+    # Cobertura: por país, ou por estado/região quando o relatório é de um país só
+    if len(countries) == 1 and data["states"][countries[0]]:
+        ranked = sorted(data["states"][countries[0]], key=lambda s: s["vaccination_rate"] or 0, reverse=True)
+        bars = {state["state"]: state["vaccination_rate"] for state in ranked[:STATES_PER_SLIDE]}
+        title = f"Cobertura Vacinal por Estado/Região: {country_name(countries[0])} (%)"
+    else:
+        bars = {country_name(c): data["totals"][c]["vaccination_rate"] for c in countries}
+        title = "Cobertura Vacinal por País (%)"
+
+    if any(value is not None for value in bars.values()):
+        _chart_slide(prs, title, XL_CHART_TYPE.COLUMN_CLUSTERED, list(bars),
+                     {"Cobertura (%)": list(bars.values())}, number_format="0.0")
+
+
+def _states_text(states: List[Dict]) -> str:
+    lines = []
+    for state in states[:STATES_PER_SLIDE]:
+        rate = state["vaccination_rate"]
+        coverage = f" | {rate:.1f}% vacinados" if rate is not None else ""
+        lines.append(f"{state['state']}: {state['vaccinated']:,.0f} vacinados | {state['deaths']:,.0f} óbitos{coverage}")
+    if len(states) > STATES_PER_SLIDE:
+        lines.append(f"… e mais {len(states) - STATES_PER_SLIDE} estados/regiões")
+    return "\n".join(lines)
+
+
+def build_presentation(data: Dict) -> Presentation:
+    """Monta o deck a partir do resultado de report_data (sem consultas ao banco)"""
+    prs = Presentation()
+    prs.slide_width = Inches(10)
+    prs.slide_height = Inches(7.5)
+
+    countries = data["countries"]
+    names = ", ".join(country_name(country) for country in countries)
+    if data["options"]["states"]:
+        names += f" ({', '.join(data['options']['states'])})"
+    last_date = data["last_date"].strftime("%d/%m/%Y") if data["last_date"] else "sem dados"
+
+    # Slide 1: Capa
+    slide = prs.slides.add_slide(prs.slide_layouts[6])  # Blank layout
+    fill = slide.background.fill
+    fill.solid()
+    fill.fore_color.rgb = TEMA_AZUL
+
+    title_frame = slide.shapes.add_textbox(Inches(1), Inches(2.5), Inches(8), Inches(1)).text_frame
+    title_frame.word_wrap = True
+    title_frame.text = data["options"]["title"] or "ANÁLISE DE DADOS DE VACINAÇÃO"
+    title_frame.paragraphs[0].font.size = Pt(54)
+    title_frame.paragraphs[0].font.bold = True
+    title_frame.paragraphs[0].font.color.rgb = TEXTO_BRANCO
+    title_frame.paragraphs[0].alignment = PP_ALIGN.CENTER
+
+    subtitle_frame = slide.shapes.add_textbox(Inches(1), Inches(3.7), Inches(8), Inches(1)).text_frame
+    subtitle_frame.word_wrap = True
+    subtitle_frame.text = f"{names}\nDados até {last_date}"
+    for paragraph in subtitle_frame.paragraphs:
+        paragraph.font.size = Pt(24)
+        paragraph.font.color.rgb = TEXTO_BRANCO
+        paragraph.alignment = PP_ALIGN.CENTER
+
+    # Slide 2: Resumo Executivo
+    totals = data["totals"]
+    _content_slide(prs, "Resumo Executivo", f"""Países Analisados: {len(countries)}
+
+Total de Pessoas Vacinadas: {sum(t['vaccinated'] for t in totals.values()):,.0f}
+
+Total de Óbitos Registrados: {sum(t['deaths'] for t in totals.values()):,.0f}
+
+Dados até: {last_date}
+
+Versão do Dataset: {data['version']}""", size=20)
+
+    # Slide 3: Metodologia
+    _content_slide(prs, "Metodologia", METHODOLOGY, space_before=6)
+
+    # Gráficos nativos (séries amostradas e totais agregados)
+    _chart_slides(prs, data)
+
+    # Um slide por país, seguido do ranking de estados/regiões
+    for country in countries:
+        _content_slide(prs, f"Análise: {country_name(country)}", _country_text(country, totals[country]))
+        if data["states"][country]:
+            _content_slide(prs, f"{country_name(country)}: Estados/Regiões",
+                           _states_text(data["states"][country]), size=14, space_before=4)
+
+    # Recomendações por país (apenas os países com recomendação definida)
+    recommendations = [
+        f"{country_name(country)}: {RECOMMENDATIONS[country]}"
+        for country in countries if country in RECOMMENDATIONS
+    ]
+    if recommendations:
+        _content_slide(prs, "Análise e Recomendações", "\n".join(recommendations), size=16)
+
+    # Conclusões
+    _content_slide(prs, "Conclusões e Recomendações", CONCLUSIONS, size=16, space_before=8)
+
+    return prs
+
+
+def render_report(options: Optional[Dict] = None, data: Optional[Dict] = None) -> bytes:
+    """Gera o .pptx e retorna os bytes (reaproveita `data` se já carregado)"""
+    prs = build_presentation(data if data is not None else report_data(options))
+    output = io.BytesIO()
+    prs.save(output)
+    return output.getvalue()
+
+
+def write_report(options: Optional[Dict], output) -> None:
+    """Grava o .pptx em um arquivo aberto (interface dos jobs de vaccine.jobs)"""
+    output.write(render_report(options))
@@ -0,0 +1,183 @@
+"""
+Montagem das respostas JSON do dashboard
+
+Funções sem dependência de request, usadas pelos endpoints individuais
+(countries-data, chart-data, state-data) e pelo endpoint agregado
+/api/dashboard/, que monta as três partes com uma única leitura dos snapshots.
+
+As versões assíncronas (prefixo `a`) executam as leituras independentes
+(snapshots, série temporal, versão) ao mesmo tempo, cada uma em uma thread com
+sua própria conexão, sem bloquear o event loop do servidor ASGI. Consultas
+idênticas simultâneas (ex.: todos os dashboards recarregando após uma
+importação) são calculadas uma única vez (vaccine.singleflight).
+"""
+import asyncio
+from functools import partial
+from typing import Dict, Iterable, List
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from .models import VaccineData
+from . import singleflight
+from .aggregates import raw_series
+from .metrics import METRIC_RAW, metric_series
+from .events import adataset_version
+from .snapshots import (
+    MODE_LATEST, country_totals, load_snapshots, state_totals,
+    states_from_snapshots, totals_from_snapshots
+)
+
+DEFAULT_COUNTRIES = ["brasil", "portugal", "italia", "usa"]
+BUNDLE_PARTS = ("countries", "chart", "states")
+
+
+def parse_countries(params) -> List[str]:
+    """
+    Lê a lista de países de um QueryDict. Aceita ?countries=a&countries=b,
+    ?countries=a,b e o formato do axios (?countries[]=a).
+    """
+    values = params.getlist("countries") + params.getlist("countries[]")
+    countries = [c.strip() for value in values for c in value.split(",") if c.strip()]
+    return countries or list(DEFAULT_COUNTRIES)
+
+
+def countries_payload(totals: Dict[str, Dict]) -> List[Dict]:
+    """Resposta de countries-data a partir dos totais por país"""
+    return [
+        {
+            "country": country,
+            "vaccinated": data["vaccinated"],
+            "deaths": data["deaths"],
+            "vaccination_rate": data["vaccination_rate"],
+            "death_rate": data["death_rate"]
+        }
+        for country, data in totals.items()
+    ]
+
+
+def chart_payload(country: str, metric: str = METRIC_RAW) -> List[Dict]:
+    """Resposta de chart-data: série temporal do país para a métrica pedida"""
+    if metric != METRIC_RAW:
+        return metric_series(country, metric)
+
+    results = raw_series(country)
+    if results is None:
+        results = list(VaccineData.objects.filter(
+            country=country
+        ).values(
+            "date", "vaccinated", "deaths"
+        ).order_by("date").distinct())
+
+    # Se não houver dados por data, usar o total agregado do país
+    if not results:
+        totals = country_totals([country])[country]
+        results = [{
+            "date": "Dados Agregados",
+            "vaccinated": totals["vaccinated"],
+            "deaths": totals["deaths"]
+        }]
+
+    return results
+
+
+def parse_parts(params) -> List[str]:
+    """Partes pedidas ao /api/dashboard/ (?parts=countries,states); padrão: todas"""
+    value = params.get("parts")
+    if not value:
+        return list(BUNDLE_PARTS)
+    parts = [part.strip() for part in value.split(",") if part.strip()]
+    invalid = [part for part in parts if part not in BUNDLE_PARTS]
+    if invalid:
+        raise ValueError(f"Parte inválida: {', '.join(invalid)}")
+    return parts
+
+
+def dashboard_bundle(countries: List[str], country: str, metric: str = METRIC_RAW,
+                     mode: str = MODE_LATEST, parts: Iterable[str] = BUNDLE_PARTS) -> Dict:
+    """
+    As partes do dashboard em uma resposta. No modo latest, totais por país e
+    dados por estado saem da mesma leitura dos snapshots.
+    """
+    parts = set(parts)
+    bundle = {}
+
+    if mode == MODE_LATEST and parts & {"countries", "states"}:
+        snapshots = load_snapshots(set(countries) | {country})
+        if "countries" in parts:
+            bundle["countries"] = countries_payload(totals_from_snapshots(snapshots, countries))
+        if "states" in parts:
+            bundle["states"] = states_from_snapshots(snapshots, country)
+    elif mode != MODE_LATEST:
+        if "countries" in parts:
+            bundle["countries"] = countries_payload(country_totals(countries, mode))
+        if "states" in parts:
+            bundle["states"] = state_totals(country, mode)
+
+    if "chart" in parts:
+        bundle["chart"] = chart_payload(country, metric)
+
+    return bundle
+
+
+def _isolated(func, *args):
+    """Executa uma consulta fora da thread da requisição, liberando a conexão ao final"""
+    try:
+        return func(*args)
+    finally:
+        close_old_connections()
+
+
+async def concurrently(func, *args):
+    """
+    Executa uma função síncrona de consulta em uma thread do pool.
+    O ORM assíncrono serializa as consultas de uma requisição em uma única
+    thread; com thread_sensitive=False as leituras independentes de fato
+    rodam em paralelo.
+    """
+    return await sync_to_async(_isolated, thread_sensitive=False)(func, *args)
+
+
+async def acountries_totals(countries: List[str], mode: str = MODE_LATEST) -> List[Dict]:
+    """countries-data sem bloquear o event loop"""
+    return countries_payload(await concurrently(country_totals, countries, mode))
+
+
+async def astate_totals(country: str, mode: str = MODE_LATEST, **filters) -> List[Dict]:
+    """state-data sem bloquear o event loop"""
+    return await concurrently(partial(singleflight.run, "state-data", state_totals, country, mode, **filters))
+
+
+async def achart_payload(country: str, metric: str = METRIC_RAW) -> List[Dict]:
+    """chart-data sem bloquear o event loop"""
+    return await concurrently(singleflight.run, "chart-data", chart_payload, country, metric)
+
+
+async def adashboard_bundle(countries: List[str], country: str, metric: str = METRIC_RAW,
+                            mode: str = MODE_LATEST, parts: Iterable[str] = BUNDLE_PARTS) -> Dict:
+    """
+    Versão assíncrona de dashboard_bundle: snapshots (ou agregados do modo
+    sum), série temporal e versão do dataset são lidos em paralelo.
+    """
+    parts = set(parts)
+    tasks = {"version": adataset_version()}
+
+    if mode == MODE_LATEST and parts & {"countries", "states"}:
+        tasks["snapshots"] = concurrently(load_snapshots, set(countries) | {country})
+    elif mode != MODE_LATEST:
+        if "countries" in parts:
+            tasks["countries"] = acountries_totals(countries, mode)
+        if "states" in parts:
+            tasks["states"] = astate_totals(country, mode)
+
+    if "chart" in parts:
+        tasks["chart"] = achart_payload(country, metric)
+
+    results = dict(zip(tasks, await asyncio.gather(*tasks.values())))
+
+    snapshots = results.pop("snapshots", None)
+    if snapshots is not None:
+        if "countries" in parts:
+            results["countries"] = countries_payload(totals_from_snapshots(snapshots, countries))
+        if "states" in parts:
+            results["states"] = states_from_snapshots(snapshots, country)
+
+    return results
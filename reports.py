@@ -0,0 +1,181 @@
+"""
+Relatório PowerPoint de vacinação
+
+Serviço único usado por export_powerpoint, pelos jobs de /api/reports/ e por
+scripts/generate_powerpoint.py. O deck é montado apenas a partir de dados já
+agregados (SeriesSnapshot): report_data() faz as leituras e devolve um dict
+simples, e build_presentation() (vaccine.presentation) só desenha os slides
+a partir dele. Este módulo não importa python-pptx: as rotas e os jobs que só
+leem dados não pagam o custo de carregar a biblioteca.
+
+Os gráficos são nativos do PowerPoint (editáveis, sem imagens). As séries
+temporais são lidas apenas em MAX_CHART_POINTS datas igualmente espaçadas,
+então o tamanho do deck e o tempo de geração não crescem com o histórico.
+"""
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional
+from django.db.models import Min
+from .models import VaccineData, SeriesSnapshot, DailyMetric
+from .events import dataset_version
+from .snapshots import load_snapshots, states_from_snapshots, totals_from_snapshots
+
+PPTX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.presentationml.presentation"
+
+REPORT_COUNTRIES = ["brasil", "portugal", "italia", "usa"]
+COUNTRY_NAMES = {"brasil": "Brasil", "portugal": "Portugal", "italia": "Itália", "usa": "EUA"}
+
+# Estados/regiões listados no slide de cada país (e no gráfico de cobertura)
+STATES_PER_SLIDE = 10
+
+# Pontos por série nos gráficos de evolução
+MAX_CHART_POINTS = 60
+
+RECOMMENDATIONS = {
+    "brasil": "Manter esforços de vacinação em estados com baixa cobertura",
+    "portugal": "Continuar monitoramento de casos em regiões de maior incidência",
+    "italia": "Reforçar campanhas de vacinação em populações vulneráveis",
+    "usa": "Intensificar ações de prevenção em áreas de baixa vacinação",
+}
+
+METHODOLOGY = """Fonte de Dados: Our World in Data e importações CSV customizadas
+
+Métricas Utilizadas:
+• Taxa de Vacinação = (Vacinados / População) × 100
+• Taxa de Mortalidade = (Óbitos / População) × 100,000
+
+Tratamento de Dados:
+• Última leitura de cada série acumulada (sem somar datas)
+• Validação de tipos de dados
+• Atualização a cada ingestão
+
+Visualizações:
+• Gráficos de barras para comparação
+• Gráficos de linhas para tendências"""
+
+CONCLUSIONS = """Principais Achados:
+• Disparidades significativas entre países
+• Correlação entre vacinação e redução de óbitos
+• Necessidade de análise regional para otimização
+
+Recomendações:
+• Aumentar cobertura vacinal em regiões críticas
+• Fortalecer sistema de vigilância epidemiológica
+• Implementar campanhas direcionadas por região
+• Continuar monitoramento de tendências"""
+
+
+def country_name(country: str) -> str:
+    return COUNTRY_NAMES.get(country, country.title())
+
+
+def _split(values) -> List[str]:
+    if isinstance(values, str):
+        values = values.split(",")
+    return [value.strip() for value in values or [] if value.strip()]
+
+
+def normalize_options(options: Optional[Dict] = None) -> Dict:
+    """
+    Opções do relatório em forma canônica (usadas na chave do cache):
+    países, estados/regiões (opcional, restringe as séries) e título da capa
+    """
+    options = options or {}
+    countries = [country.lower() for country in _split(options.get("countries"))]
+    states = _split(options.get("states"))
+    return {
+        "countries": list(dict.fromkeys(countries)) or list(REPORT_COUNTRIES),
+        "states": list(dict.fromkeys(states)) or None,
+        "title": options.get("title") or None,
+    }
+
+
+def sample_dates(first: date, last: date, points: int = MAX_CHART_POINTS) -> List[date]:
+    """Até `points` datas igualmente espaçadas entre first e last (last sempre incluída)"""
+    step = max(1, -(-(last - first).days // max(points - 1, 1)))
+    dates = [last - timedelta(days=step * i) for i in range(points)]
+    return sorted(day for day in dates if day >= first)
+
+
+def load_series(countries: List[str], last_date: Optional[date]) -> Dict:
+    """
+    Séries amostradas de cada (país, estado): valor acumulado de vacinados
+    (VaccineData) e média móvel de 7 dias dos óbitos (DailyMetric) em
+    MAX_CHART_POINTS datas. As consultas filtram por data exata (índice
+    único país/estado/data), então o custo não depende do tamanho do histórico.
+    """
+    first_date = VaccineData.objects.filter(country__in=countries).aggregate(first=Min("date"))["first"]
+    if first_date is None or last_date is None:
+        return {"dates": [], "rows": {}}
+
+    dates = sample_dates(first_date, last_date)
+    rows = {}
+    for country, state, day, vaccinated in VaccineData.objects.filter(
+        country__in=countries, date__in=dates
+    ).order_by().values_list("country", "state_or_region", "date", "vaccinated"):
+        rows.setdefault((country, state or ""), {}).setdefault(day, {})["vaccinated"] = vaccinated
+
+    for country, state, day, deaths_avg in DailyMetric.objects.filter(
+        country__in=countries, date__in=dates
+    ).order_by().values_list("country", "state_or_region", "date", "deaths_avg_7"):
+        rows.setdefault((country, state or ""), {}).setdefault(day, {})["deaths_avg_7"] = deaths_avg
+
+    return {"dates": dates, "rows": rows}
+
+
+def load_report_snapshot(countries: Optional[Iterable[str]] = None) -> Dict:
+    """
+    Snapshots e séries amostradas de todas as séries dos países (todos, se
+    omitidos) e a versão do dataset. São as únicas leituras do banco; vários
+    relatórios podem partir do mesmo resultado.
+    """
+    if countries is None:
+        countries = SeriesSnapshot.objects.order_by().values_list("country", flat=True).distinct()
+    countries = list(countries)
+    rows = load_snapshots(countries)
+    last_date = max((row["last_date"] for row in rows if row["last_date"]), default=None)
+    return {"rows": rows, "series": load_series(countries, last_date), "version": dataset_version()}
+
+
+def _country_series(series: Dict, countries: List[str], states: Optional[set]) -> Dict:
+    """Soma as séries amostradas dos estados selecionados por país e data"""
+    result = {"dates": series["dates"], "vaccinated": {}, "deaths_avg_7": {}}
+    for country in countries:
+        for field in ("vaccinated", "deaths_avg_7"):
+            values = [None] * len(series["dates"])
+            for (row_country, state), points in series["rows"].items():
+                if row_country != country or (states is not None and state not in states):
+                    continue
+                for index, day in enumerate(series["dates"]):
+                    value = points.get(day, {}).get(field)
+                    if value is not None:
+                        values[index] = (values[index] or 0) + value
+            result[field][country] = values
+    return result
+
+
+def report_data(options: Optional[Dict] = None, snapshot: Optional[Dict] = None) -> Dict:
+    """
+    Agregados usados pelo relatório: totais e estados por país, séries
+    amostradas, data da leitura mais recente e versão do dataset. Com
+    `snapshot` (load_report_snapshot) não consulta o banco.
+    """
+    options = normalize_options(options)
+    countries = options["countries"]
+    if snapshot is None:
+        snapshot = load_report_snapshot(countries)
+
+    states = set(options["states"]) if options["states"] else None
+    rows = [
+        row for row in snapshot["rows"]
+        if row["country"] in countries and (states is None or row["state_or_region"] in states)
+    ]
+
+    return {
+        "options": options,
+        "countries": countries,
+        "totals": totals_from_snapshots(rows, countries),
+        "states": {country: states_from_snapshots(rows, country) for country in countries},
+        "series": _country_series(snapshot["series"], countries, states),
+        "last_date": max((row["last_date"] for row in rows if row["last_date"]), default=None),
+        "version": snapshot["version"],
+    }
@@ -10,7 +10,7 @@ python manage.py migrate
 
 # Coletar dados
 echo "📊 Coletando dados de vacinação..."
-python scripts/collect_data.py
+python manage.py ingest --source owid --fallback sample
 
 # Criar superuser (opcional)
 # python manage.py createsuperuser
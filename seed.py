@@ -0,0 +1,142 @@
+"""
+Snapshot do banco para inicialização rápida do container
+
+Em vez de coletar os dados (até 30 s de timeout de rede e milhares de
+gravações) antes de aceitar requisições, o container restaura um snapshot
+gerado no build da imagem ou sob demanda (`manage.py data_snapshot build`):
+uma cópia compacta do banco SQLite, feita com a API de backup do SQLite, já
+com as tabelas derivadas (snapshots, métricas diárias) calculadas. A
+restauração é uma cópia de páginas e leva segundos; a coleta roda depois, em
+segundo plano, com o servidor já no ar.
+
+/api/ready/ informa se há dados e quão recentes eles são.
+"""
+import os
+import sqlite3
+import tempfile
+from pathlib import Path
+from typing import Dict, Optional
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+from .models import DataChange, VaccineData
+from . import dimensions
+
+SEED_PATH = Path(getattr(settings, "DATA_SEED_PATH", settings.BASE_DIR / "seed" / "data.sqlite3"))
+# Dados mais antigos que isso são reportados como desatualizados em /api/ready/
+MAX_DATA_AGE = getattr(settings, "DATA_MAX_AGE", 24 * 3600)  # segundos
+# Tabelas de trabalho que não fazem sentido em outro container
+TRANSIENT_TABLES = ["vaccine_artifactjob", "vaccine_uploadsession"]
+BACKUP_PAGES = 4096  # páginas copiadas por passo da API de backup
+
+
+def _database_path(alias: str = "default") -> str:
+    database = connections[alias].settings_dict
+    if database["ENGINE"] != "django.db.backends.sqlite3":
+        raise ValueError("Snapshots de dados requerem o banco SQLite")
+    return str(database["NAME"])
+
+
+def build_snapshot(path: Optional[Path] = None) -> Dict:
+    """
+    Copia o banco atual para `path` (SEED_PATH por padrão): sem as tabelas de
+    trabalho, compactado (VACUUM) e em um único arquivo (journal_mode=DELETE).
+    O arquivo é substituído atomicamente.
+    """
+    path = Path(path or SEED_PATH)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, partial = tempfile.mkstemp(prefix=".seed-", suffix=".sqlite3", dir=path.parent)
+    os.close(fd)
+    try:
+        source = sqlite3.connect(_database_path())
+        target = sqlite3.connect(partial)
+        try:
+            source.backup(target, pages=BACKUP_PAGES)
+        finally:
+            source.close()
+        try:
+            target.execute("PRAGMA journal_mode=DELETE")
+            for table in TRANSIENT_TABLES:
+                target.execute(f'DELETE FROM "{table}"')
+            target.commit()
+            target.execute("VACUUM")
+            summary = _summary(target)
+        finally:
+            target.close()
+        os.chmod(partial, 0o644)  # mkstemp cria o arquivo apenas para o dono
+        os.replace(partial, path)
+    except BaseException:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+    return {**summary, "path": str(path), "size": path.stat().st_size}
+
+
+def _summary(connection: sqlite3.Connection) -> Dict:
+    rows, last_date = connection.execute(
+        "SELECT COUNT(*), MAX(date) FROM vaccine_vaccinedata"
+    ).fetchone()
+    version, updated_at = connection.execute(
+        "SELECT MAX(id), MAX(created_at) FROM vaccine_datachange"
+    ).fetchone()
+    return {"rows": rows, "last_date": last_date, "version": version or 0, "updated_at": updated_at}
+
+
+def restore_snapshot(path: Optional[Path] = None, force: bool = False) -> Optional[Dict]:
+    """
+    Restaura o snapshot no banco atual se ele ainda não tem dados (ou sempre,
+    com force). Retorna o resumo do snapshot restaurado, ou None se nada foi
+    feito. Deve rodar antes do migrate: migrações mais novas que o snapshot
+    são aplicadas em seguida.
+    """
+    path = Path(path or SEED_PATH)
+    if not path.exists():
+        raise FileNotFoundError(f"Snapshot não encontrado: {path}")
+    if not force and has_data():
+        return None
+
+    connections.close_all()
+    source = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    target = sqlite3.connect(_database_path())
+    try:
+        source.backup(target, pages=BACKUP_PAGES)
+        # O snapshot é gravado sem WAL; o banco em uso volta ao WAL (migração 0009)
+        target.execute("PRAGMA journal_mode=WAL")
+        summary = _summary(target)
+    finally:
+        source.close()
+        target.close()
+    # Os ids de país e estado/região do snapshot podem ser outros; os demais
+    # processos percebem a troca pelo último DataChange (vaccine.dimensions)
+    dimensions.clear_cache()
+    return summary
+
+
+def has_data() -> bool:
+    """True se o banco já tem dados de vacinação (falso também sem tabelas)"""
+    database = _database_path()
+    if not os.path.exists(database):
+        return False
+    connection = sqlite3.connect(database)
+    try:
+        return connection.execute("SELECT 1 FROM vaccine_vaccinedata LIMIT 1").fetchone() is not None
+    except sqlite3.OperationalError:
+        return False
+    finally:
+        connection.close()
+
+
+def data_freshness() -> Dict:
+    """Estado dos dados para /api/ready/"""
+    last_change = DataChange.objects.order_by("-id").values("id", "created_at", "source").first()
+    last_date = VaccineData.objects.order_by("-date").values_list("date", flat=True).first()
+    age = (timezone.now() - last_change["created_at"]).total_seconds() if last_change else None
+    return {
+        "ready": last_date is not None,
+        "version": last_change["id"] if last_change else 0,
+        "last_date": last_date.isoformat() if last_date else None,
+        "updated_at": last_change["created_at"].isoformat() if last_change else None,
+        "source": last_change["source"] if last_change else None,
+        "age_seconds": round(age) if age is not None else None,
+        "stale": age is None or age > MAX_DATA_AGE,
+    }
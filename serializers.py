@@ -2,6 +2,10 @@ from rest_framework import serializers
 from .models import VaccineData
 
 class VaccineDataSerializer(serializers.ModelSerializer):
+    # Colunas com o id da dimensão; no modelo o valor já é o nome
+    country = serializers.CharField(read_only=True)
+    state_or_region = serializers.CharField(read_only=True, allow_null=True)
+
     class Meta:
         model = VaccineData
         fields = ["id", "country", "state_or_region", "date", "vaccinated", "deaths", "population"]
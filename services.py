@@ -3,11 +3,11 @@ Camada de Serviços - Demonstra POO com classes de negócio
 """
 from abc import ABC, abstractmethod
 from typing import List, Dict, Any
-from django.db.models import Sum, QuerySet
+from django.db.models import QuerySet
 from .models import VaccineData
+from .snapshots import MODE_LATEST, country_totals, state_totals, resolve_mode, resolve_semantics
 import csv
 import io
-from datetime import datetime
 
 
 class DataExporter(ABC):
@@ -56,9 +56,10 @@ class VaccineAnalyzer:
     Demonstra ENCAPSULAMENTO: dados e métodos relacionados juntos
     """
     
-    def __init__(self, country: str = None):
+    def __init__(self, country: str = None, mode: str = MODE_LATEST):
         """Construtor da classe"""
         self._country = country  # Atributo privado (encapsulamento)
+        self._mode = resolve_mode(mode)  # "latest" (snapshot) ou "sum" (legado)
         self._data = None
     
     @property
@@ -81,19 +82,27 @@ class VaccineAnalyzer:
             self._data = VaccineData.objects.all()
         return self
     
+    def _get_totals(self) -> Dict:
+        """Totais do país (ou de todos os países) a partir dos snapshots"""
+        if self._country:
+            return country_totals([self._country], self._mode)[self._country]
+        
+        countries = list(
+            VaccineData.objects.values_list('country', flat=True).distinct().order_by()
+        )
+        totals = country_totals(countries, self._mode).values()
+        return {
+            'vaccinated': sum(t['vaccinated'] for t in totals),
+            'deaths': sum(t['deaths'] for t in totals)
+        }
+    
     def get_total_vaccinated(self) -> int:
         """Retorna total de vacinados"""
-        if not self._data:
-            self.load_data()
-        result = self._data.aggregate(total=Sum('vaccinated'))
-        return result['total'] or 0
+        return self._get_totals()['vaccinated']
     
     def get_total_deaths(self) -> int:
         """Retorna total de óbitos"""
-        if not self._data:
-            self.load_data()
-        result = self._data.aggregate(total=Sum('deaths'))
-        return result['total'] or 0
+        return self._get_totals()['deaths']
     
     def get_mortality_rate(self) -> float:
         """Calcula taxa de mortalidade"""
@@ -107,30 +116,10 @@ class VaccineAnalyzer:
     
     def get_states_ranking(self, top_n: int = 10) -> List[Dict]:
         """Retorna ranking de estados por vacinação"""
-        if not self._data:
-            self.load_data()
-        
-        states = self._data.values('state_or_region').distinct()
-        results = []
+        if not self._country:
+            return []
         
-        for state_obj in states:
-            state = state_obj['state_or_region']
-            if not state:
-                continue
-            
-            data = self._data.filter(state_or_region=state).aggregate(
-                vaccinated=Sum('vaccinated'),
-                deaths=Sum('deaths')
-            )
-            
-            results.append({
-                'state': state,
-                'vaccinated': data['vaccinated'] or 0,
-                'deaths': data['deaths'] or 0
-            })
-        
-        results.sort(key=lambda x: x['vaccinated'], reverse=True)
-        return results[:top_n]
+        return state_totals(self._country, self._mode)[:top_n]
     
     def get_summary(self) -> Dict:
         """Retorna resumo completo das análises"""
@@ -214,11 +203,13 @@ class CSVImporter:
     Demonstra princípio de RESPONSABILIDADE ÚNICA
     """
     
-    def __init__(self, country: str):
+    def __init__(self, country: str, semantics: str = None):
         """Inicializa importador para um país específico"""
         self.country = country.lower()
+        self.semantics = resolve_semantics("csv", semantics)  # acumulado ou incremental
         self.imported_count = 0
-        self.errors = []
+        self.errors_count = 0
+        self.errors = []  # {line, column, value, error}
     
     def validate_row(self, row: Dict) -> bool:
         """Valida uma linha do CSV"""
@@ -232,36 +223,28 @@ class CSVImporter:
         return True
     
     def import_from_file(self, file_content: str) -> int:
-        """Importa dados do arquivo CSV"""
-        reader = csv.DictReader(io.StringIO(file_content))
-        
-        for row in reader:
-            if not self.validate_row(row):
-                continue
-            
-            try:
-                vaccine_data = VaccineData(
-                    country=self.country,
-                    state_or_region=row.get('state_or_region', 'Nacional'),
-                    date=row['date'],
-                    vaccinated=int(row.get('vaccinated', 0)),
-                    deaths=int(row.get('deaths', 0)),
-                    population=int(row.get('population', 0))
-                )
-                vaccine_data.save()
-                self.imported_count += 1
-            except Exception as e:
-                self.errors.append(f"Erro ao importar linha: {str(e)}")
-                continue
+        """Importa dados do arquivo CSV (validação vetorizada em blocos)"""
+        from .imports import import_csv  # pandas só é carregado ao importar
         
+        try:
+            summary = import_csv(io.StringIO(file_content), self.country, self.semantics)
+        except ValueError as e:
+            # Erro do arquivo inteiro (ex.: coluna obrigatória ausente no cabeçalho)
+            self.errors_count = 1
+            self.errors = [{'line': 1, 'column': None, 'value': None, 'error': str(e)}]
+            return self.imported_count
+        self.imported_count = summary['imported_count']
+        self.errors_count = summary['errors_count']
+        self.errors = summary['errors']
         return self.imported_count
     
     def get_import_summary(self) -> Dict:
         """Retorna resumo da importação"""
         return {
             'country': self.country,
+            'semantics': self.semantics,
             'imported_count': self.imported_count,
-            'errors_count': len(self.errors),
+            'errors_count': self.errors_count,
             'errors': self.errors[:10]  # Primeiros 10 erros
         }
 
@@ -1,3 +1,4 @@
+import json
 import os
 from pathlib import Path
 
@@ -46,7 +47,7 @@ WSGI_APPLICATION = "config.wsgi.application"
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+        "NAME": os.environ.get("SQLITE_PATH", BASE_DIR / "db.sqlite3"),
     }
 }
 
@@ -66,6 +67,38 @@ STATIC_URL = "/static/"
 STATIC_ROOT = BASE_DIR / "staticfiles"
 STATICFILES_DIRS = [BASE_DIR / "static"]
 
+# Snapshot dos dados restaurado na inicialização do container (vaccine.seed)
+DATA_SEED_PATH = Path(os.environ.get("DATA_SEED_PATH", BASE_DIR / "seed" / "data.sqlite3"))
+# Idade máxima (segundos) antes de /api/ready/ reportar os dados como desatualizados
+DATA_MAX_AGE = int(os.environ.get("DATA_MAX_AGE", 24 * 3600))
+
+# Agregados do dashboard mapeados em memória e compartilhados pelos workers (vaccine.aggregates)
+AGGREGATES_DIR = Path(os.environ.get("AGGREGATES_DIR", BASE_DIR / "aggregates"))
+
+# Controle de admissão dos endpoints caros (vaccine.admission); ex.:
+# ADMISSION_LIMITS = {"export_powerpoint": {"concurrency": 4, "queue": 8, "timeout": 5}}
+ADMISSION_DIR = Path(os.environ.get("ADMISSION_DIR", BASE_DIR / "run" / "admission"))
+
+# Trava que impede ingestões sobrepostas (vaccine.ingestion)
+INGEST_LOCK_PATH = Path(os.environ.get("INGEST_LOCK_PATH", BASE_DIR / "run" / "ingest.lock"))
+
+# Coalescência de consultas idênticas simultâneas entre workers (vaccine.singleflight)
+SINGLEFLIGHT_DIR = Path(os.environ.get("SINGLEFLIGHT_DIR", BASE_DIR / "run" / "singleflight"))
+SINGLEFLIGHT_TIMEOUT = float(os.environ.get("SINGLEFLIGHT_TIMEOUT", 10))
+
+# Conectores HTTP da ingestão (vaccine.connectors)
+CONNECTOR_MAX_PER_HOST = int(os.environ.get("CONNECTOR_MAX_PER_HOST", 4))
+CONNECTOR_RETRIES = int(os.environ.get("CONNECTOR_RETRIES", 3))
+# (conexão, leitura) em segundos
+CONNECTOR_TIMEOUT = (float(os.environ.get("CONNECTOR_CONNECT_TIMEOUT", 5)),
+                     float(os.environ.get("CONNECTOR_READ_TIMEOUT", 60)))
+# Endereço alternativo por fonte; ex.: {"owid": "http://127.0.0.1:8800"}
+CONNECTOR_BASE_URLS = json.loads(os.environ.get("CONNECTOR_BASE_URLS", "{}"))
+# Lista de feeds da fonte "feeds" (JSON)
+CONNECTOR_FEEDS_FILE = os.environ.get("CONNECTOR_FEEDS_FILE")
+# Arquivos baixados pelos conectores, comprimidos (vaccine.download_cache)
+DOWNLOAD_CACHE_DIR = Path(os.environ.get("DOWNLOAD_CACHE_DIR", BASE_DIR / "cache" / "downloads"))
+
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
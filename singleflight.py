@@ -0,0 +1,185 @@
+"""
+Coalescência de consultas idênticas simultâneas (single-flight)
+
+Quando os agregados mudam (importação, coleta) todos os dashboards abertos
+recarregam ao mesmo tempo e pedem chart-data e state-data com os mesmos
+parâmetros. Em vez de cada requisição recalcular o mesmo resultado:
+
+- no mesmo worker, a primeira chamada de uma chave calcula e as demais
+  threads aguardam e recebem o mesmo objeto
+- entre workers, quem calcula segura uma trava flock por chave em
+  SINGLEFLIGHT_DIR e grava o resultado em JSON ao terminar; os outros
+  processos aguardam a trava e leem o arquivo
+
+Só chamadas que se sobrepõem no tempo compartilham o resultado: um arquivo
+gravado antes do início da espera é ignorado, então isto não é um cache e
+não serve dados de uma versão anterior do dataset.
+
+Se quem calcula falhar ou a espera passar de SINGLEFLIGHT_TIMEOUT segundos,
+a chamada calcula por conta própria. Sem fcntl (Windows) a coalescência vale
+apenas dentro do processo.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Dict, Optional
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+SINGLEFLIGHT_DIR = Path(getattr(settings, "SINGLEFLIGHT_DIR", settings.BASE_DIR / "run" / "singleflight"))
+SINGLEFLIGHT_TIMEOUT = getattr(settings, "SINGLEFLIGHT_TIMEOUT", 10)  # segundos
+POLL_INTERVAL = 0.01  # segundos entre tentativas de obter a trava de outro processo
+RESULT_TTL = 60  # segundos até um arquivo de resultado ser removido
+
+# Contadores deste worker: computed (calculou), shared (recebeu de outra
+# thread), shared_remote (leu de outro processo), fallback (calculou após
+# falha ou tempo esgotado de quem calculava)
+stats = Counter()
+
+_lock = threading.Lock()
+_calls: Dict[str, "_Call"] = {}
+_missing = object()
+_last_cleanup = 0.0
+
+
+class _Call:
+    """Cálculo em andamento de uma chave neste processo"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = _missing
+
+
+def make_key(namespace: str, *args, **kwargs) -> str:
+    """Chave estável para os argumentos (mesmo valor em todos os workers)"""
+    payload = json.dumps([namespace, args, kwargs], sort_keys=True, cls=DjangoJSONEncoder)
+    return f"{namespace}-{hashlib.sha1(payload.encode()).hexdigest()}"
+
+
+def run(namespace: str, func: Callable, *args, timeout: Optional[float] = None, **kwargs):
+    """
+    Executa func(*args, **kwargs) uma única vez para chamadas simultâneas com
+    os mesmos argumentos; as demais recebem o mesmo resultado
+    """
+    timeout = SINGLEFLIGHT_TIMEOUT if timeout is None else timeout
+    key = make_key(namespace, *args, **kwargs)
+
+    with _lock:
+        call = _calls.get(key)
+        leader = call is None
+        if leader:
+            call = _calls[key] = _Call()
+
+    if not leader:
+        if call.done.wait(timeout) and call.result is not _missing:
+            stats["shared"] += 1
+            return call.result
+        stats["fallback"] += 1
+        return func(*args, **kwargs)
+
+    try:
+        call.result = _run_across_processes(key, func, args, kwargs, timeout)
+        return call.result
+    finally:
+        with _lock:
+            del _calls[key]
+        call.done.set()
+
+
+def _result_path(key: str) -> Path:
+    return SINGLEFLIGHT_DIR / f"{key}.json"
+
+
+def _run_across_processes(key: str, func: Callable, args, kwargs, timeout: float):
+    """Calcula segurando a trava da chave ou lê o resultado de quem a segura"""
+    if fcntl is None:
+        stats["computed"] += 1
+        return func(*args, **kwargs)
+
+    SINGLEFLIGHT_DIR.mkdir(parents=True, exist_ok=True)
+    started = time.time()
+    deadline = time.monotonic() + timeout
+    with open(SINGLEFLIGHT_DIR / f"{key}.lock", "a") as handle:
+        waited = False
+        while True:
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    stats["fallback"] += 1
+                    return func(*args, **kwargs)
+                waited = True
+                time.sleep(POLL_INTERVAL)
+
+        # A trava é liberada ao fechar o arquivo
+        if waited:
+            result = _read_result(key, started)
+            if result is not _missing:
+                stats["shared_remote"] += 1
+                return result
+
+        stats["computed" if not waited else "fallback"] += 1
+        result = func(*args, **kwargs)
+        _write_result(key, result)
+        return result
+
+
+def _read_result(key: str, since: float):
+    """Resultado gravado por outro processo depois de `since` (ou _missing)"""
+    try:
+        with open(_result_path(key)) as handle:
+            data = json.load(handle)
+    except (OSError, ValueError):
+        return _missing
+    return data["result"] if data.get("finished", 0) >= since else _missing
+
+
+def _write_result(key: str, result) -> None:
+    """Grava o resultado para os processos que aguardam a trava"""
+    try:
+        payload = json.dumps({"finished": time.time(), "result": result}, cls=DjangoJSONEncoder)
+    except TypeError:
+        return  # não serializável: os outros processos calculam por conta própria
+    fd, tmp = tempfile.mkstemp(dir=SINGLEFLIGHT_DIR, suffix=".tmp")
+    with os.fdopen(fd, "w") as handle:
+        handle.write(payload)
+    os.replace(tmp, _result_path(key))
+    _cleanup()
+
+
+def _cleanup() -> None:
+    """Remove resultados e travas de chaves que não voltaram a ser pedidas"""
+    global _last_cleanup
+    now = time.time()
+    if now - _last_cleanup < RESULT_TTL:
+        return
+    _last_cleanup = now
+    for path in SINGLEFLIGHT_DIR.iterdir():
+        try:
+            if path.stat().st_mtime >= now - RESULT_TTL:
+                continue
+            if path.suffix != ".lock":
+                path.unlink()
+                continue
+            # Trava só é removida se ninguém a segura no momento
+            with open(path, "a") as handle:
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                path.unlink()
+        except (FileNotFoundError, BlockingIOError):
+            continue
+
+
+def singleflight_metrics() -> Dict:
+    """Contadores deste worker (cada processo tem os seus)"""
+    return {"pid": os.getpid(), **{name: stats[name] for name in ("computed", "shared", "shared_remote", "fallback")}}
@@ -0,0 +1,260 @@
+"""
+Snapshot da última leitura por (país, estado/região)
+
+Os campos people_fully_vaccinated e total_deaths do OWID são acumulados, então
+somar todas as datas gera totais errados. A tabela SeriesSnapshot guarda uma
+linha por série: o valor mais recente (séries acumuladas) ou a soma dos
+incrementos (séries incrementais). Os totais do dashboard custam O(grupos).
+"""
+from typing import Dict, Iterable, List, Optional
+from django.db.models import F, Max, Sum
+from .models import VaccineData, SeriesSnapshot
+from . import aggregates
+from .metrics import DEATH_RATE_SCALE, VACCINATION_RATE_SCALE, per_capita
+
+CUMULATIVE = SeriesSnapshot.CUMULATIVE
+INCREMENTAL = SeriesSnapshot.INCREMENTAL
+
+# Semântica declarada por fonte de dados (o upload_csv pode sobrescrever por importação)
+SOURCE_SEMANTICS = {
+    "owid": CUMULATIVE,
+    "sample": CUMULATIVE,
+    "csv": CUMULATIVE,
+}
+
+MODE_LATEST = "latest"
+MODE_SUM = "sum"
+MODES = (MODE_LATEST, MODE_SUM)
+
+# Ordenações aceitas no ranking de estados (as taxas são indexadas por país)
+STATE_ORDERINGS = ("vaccinated", "vaccination_rate", "death_rate")
+
+EMPTY_TOTALS = {
+    "vaccinated": 0, "deaths": 0, "population": 0, "vaccination_rate": None, "death_rate": None
+}
+
+
+def resolve_semantics(source: str, semantics: Optional[str] = None) -> str:
+    """Retorna a semântica da importação, usando o padrão da fonte se omitida"""
+    semantics = semantics or SOURCE_SEMANTICS.get(source, CUMULATIVE)
+    if semantics not in (CUMULATIVE, INCREMENTAL):
+        raise ValueError(f"Semântica inválida: {semantics}")
+    return semantics
+
+
+def resolve_mode(mode: Optional[str]) -> str:
+    """Valida o modo de consulta (latest ou sum)"""
+    mode = mode or MODE_LATEST
+    if mode not in MODES:
+        raise ValueError(f"Modo inválido: {mode}")
+    return mode
+
+
+def refresh_snapshots(country: str, source: str, semantics: Optional[str] = None,
+                      states: Optional[Iterable[str]] = None) -> int:
+    """
+    Atualiza os snapshots das séries de um país após uma ingestão.
+    Se `states` for informado, apenas essas séries são recalculadas.
+    """
+    semantics = resolve_semantics(source, semantics)
+    rows = VaccineData.objects.filter(country=country)
+    if states is not None:
+        rows = rows.filter(state_or_region__in=list(states))
+
+    groups = rows.values("state_or_region").annotate(
+        last_date=Max("date"),
+        total_vaccinated=Sum("vaccinated"),
+        total_deaths=Sum("deaths"),
+    ).order_by()
+
+    updated = 0
+    for group in groups:
+        state = group["state_or_region"]
+        # Uma consulta pelo índice único (país, estado, data) por série
+        latest = rows.filter(
+            state_or_region=state, date=group["last_date"]
+        ).values("vaccinated", "deaths", "population").first()
+        if latest is None:
+            continue
+
+        if semantics == CUMULATIVE:
+            vaccinated, deaths = latest["vaccinated"], latest["deaths"]
+        else:
+            vaccinated, deaths = group["total_vaccinated"] or 0, group["total_deaths"] or 0
+
+        SeriesSnapshot.objects.update_or_create(
+            country=country,
+            state_or_region=state,
+            defaults={
+                "source": source,
+                "semantics": semantics,
+                "last_date": group["last_date"],
+                "vaccinated": vaccinated,
+                "deaths": deaths,
+                "population": latest["population"],
+                "vaccination_rate": per_capita(vaccinated, latest["population"], VACCINATION_RATE_SCALE),
+                "death_rate": per_capita(deaths, latest["population"], DEATH_RATE_SCALE),
+            }
+        )
+        updated += 1
+
+    return updated
+
+
+def load_snapshots(countries: Iterable[str]) -> List[Dict]:
+    """Lê em uma única consulta os snapshots de um conjunto de países"""
+    published = aggregates.snapshot_rows(countries)
+    if published is not None:
+        return published
+    return list(SeriesSnapshot.objects.filter(country__in=list(countries)).values(
+        "country", "state_or_region", "last_date", "vaccinated", "deaths", "population",
+        "vaccination_rate", "death_rate"
+    ))
+
+
+def _with_rates(totals: Dict[str, int]) -> Dict:
+    """Acrescenta as taxas per capita a um total de país"""
+    totals["vaccination_rate"] = per_capita(totals["vaccinated"], totals["population"], VACCINATION_RATE_SCALE)
+    totals["death_rate"] = per_capita(totals["deaths"], totals["population"], DEATH_RATE_SCALE)
+    return totals
+
+
+def totals_from_snapshots(snapshots: List[Dict], countries: List[str]) -> Dict[str, Dict]:
+    """Soma os snapshots já carregados por país (O(grupos), sem consultar o banco)"""
+    totals = {}
+    for row in snapshots:
+        country_data = totals.setdefault(row["country"], {"vaccinated": 0, "deaths": 0, "population": 0})
+        country_data["vaccinated"] += row["vaccinated"]
+        country_data["deaths"] += row["deaths"]
+        country_data["population"] += row["population"]
+
+    return {
+        country: _with_rates(totals[country]) if country in totals else dict(EMPTY_TOTALS)
+        for country in countries
+    }
+
+
+def states_from_snapshots(snapshots: List[Dict], country: str) -> List[Dict]:
+    """Estados/regiões de um país a partir dos snapshots já carregados"""
+    states = [
+        {
+            "state": row["state_or_region"],
+            "vaccinated": row["vaccinated"],
+            "deaths": row["deaths"],
+            "vaccination_rate": row["vaccination_rate"],
+            "death_rate": row["death_rate"],
+        }
+        for row in snapshots
+        if row["country"] == country and row["state_or_region"]
+    ]
+    states.sort(key=lambda state: state["vaccinated"], reverse=True)
+    return states
+
+
+def country_totals(countries: List[str], mode: str = MODE_LATEST) -> Dict[str, Dict[str, int]]:
+    """Retorna vacinados, óbitos, população e taxas por país em uma única consulta"""
+    if mode == MODE_LATEST:
+        return totals_from_snapshots(load_snapshots(countries), countries)
+
+    rows = VaccineData.objects.filter(country__in=countries).values("country").annotate(
+        vaccinated=Sum("vaccinated"),
+        deaths=Sum("deaths"),
+        population=Sum("population"),
+    ).order_by()
+
+    totals = {
+        row["country"]: _with_rates({
+            "vaccinated": row["vaccinated"] or 0,
+            "deaths": row["deaths"] or 0,
+            "population": row["population"] or 0,
+        })
+        for row in rows
+    }
+    return {country: totals.get(country, dict(EMPTY_TOTALS)) for country in countries}
+
+
+def state_totals(country: str, mode: str = MODE_LATEST, order_by: str = "vaccinated",
+                 min_vaccination_rate: Optional[float] = None,
+                 max_vaccination_rate: Optional[float] = None) -> List[Dict]:
+    """
+    Retorna totais por estado/região, em ordem decrescente de `order_by`.
+    No modo latest os filtros e ordenações por taxa são consultas indexadas.
+    """
+    if order_by not in STATE_ORDERINGS:
+        raise ValueError(f"Ordenação inválida: {order_by}")
+
+    if mode == MODE_SUM:
+        if order_by != "vaccinated" or min_vaccination_rate is not None or max_vaccination_rate is not None:
+            raise ValueError("Filtros e ordenação por taxa exigem mode=latest")
+
+        rows = VaccineData.objects.filter(country=country).exclude(
+            state_or_region__isnull=True
+        ).exclude(
+            state_or_region=""
+        ).values("state_or_region").annotate(
+            vaccinated=Sum("vaccinated"),
+            deaths=Sum("deaths"),
+        ).order_by("-vaccinated")
+
+        return [
+            {
+                "state": row["state_or_region"],
+                "vaccinated": row["vaccinated"] or 0,
+                "deaths": row["deaths"] or 0,
+            }
+            for row in rows
+        ]
+
+    published = aggregates.snapshot_rows([country])
+    if published is not None:
+        return _filter_states(published, order_by, min_vaccination_rate, max_vaccination_rate)
+
+    queryset = SeriesSnapshot.objects.filter(country=country).exclude(
+        state_or_region__isnull=True
+    ).exclude(
+        state_or_region=""
+    )
+    if min_vaccination_rate is not None:
+        queryset = queryset.filter(vaccination_rate__gte=min_vaccination_rate)
+    if max_vaccination_rate is not None:
+        queryset = queryset.filter(vaccination_rate__lt=max_vaccination_rate)
+
+    rows = queryset.order_by(F(order_by).desc(nulls_last=True)).values(
+        "state_or_region", "vaccinated", "deaths", "vaccination_rate", "death_rate"
+    )
+
+    return [
+        {
+            "state": row["state_or_region"],
+            "vaccinated": row["vaccinated"],
+            "deaths": row["deaths"],
+            "vaccination_rate": row["vaccination_rate"],
+            "death_rate": row["death_rate"],
+        }
+        for row in rows
+    ]
+
+
+def _filter_states(snapshots: List[Dict], order_by: str, min_vaccination_rate: Optional[float],
+                   max_vaccination_rate: Optional[float]) -> List[Dict]:
+    """Filtros e ordenação de state_totals aplicados aos agregados publicados"""
+    rows = [row for row in snapshots if row["state_or_region"]]
+    if min_vaccination_rate is not None:
+        rows = [row for row in rows if row["vaccination_rate"] is not None
+                and row["vaccination_rate"] >= min_vaccination_rate]
+    if max_vaccination_rate is not None:
+        rows = [row for row in rows if row["vaccination_rate"] is not None
+                and row["vaccination_rate"] < max_vaccination_rate]
+    # Decrescente, com as taxas indefinidas por último (como nulls_last no banco)
+    rows.sort(key=lambda row: (row[order_by] is not None, row[order_by] or 0), reverse=True)
+
+    return [
+        {
+            "state": row["state_or_region"],
+            "vaccinated": row["vaccinated"],
+            "deaths": row["deaths"],
+            "vaccination_rate": row["vaccination_rate"],
+            "death_rate": row["death_rate"],
+        }
+        for row in rows
+    ]
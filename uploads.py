@@ -0,0 +1,261 @@
+"""
+Upload de CSV em partes, com retomada e importação durante o envio
+
+Protocolo (ver export_views.create_upload e seguintes):
+
+1. POST /api/uploads/ com país, semântica, nome e tamanho do arquivo: cria a
+   sessão e devolve o tamanho das partes
+2. PUT /api/uploads/<id>/chunks/<n>/ com os bytes da parte n, em ordem. Cada
+   parte é gravada direto em disco (UPLOADS_DIR), sem passar inteira pela
+   memória. Partes repetidas são ignoradas; partes fora de ordem recebem 409
+   com next_chunk, de onde o cliente retoma após uma falha de rede
+3. POST /api/uploads/<id>/finalize/ quando todas as partes chegaram
+
+Um leitor em segundo plano (uma thread por upload ativo) lê o arquivo em
+disco à medida que as partes chegam e o entrega ao pipeline de
+vaccine.imports: decodificação, validação e gravação em blocos começam antes
+do fim do envio e a memória usada não depende do tamanho do arquivo.
+Se o processo do leitor morrer, o próximo pedido da sessão reinicia a leitura
+do começo (a gravação é um upsert, então reler é seguro).
+"""
+import io
+import os
+import threading
+import time
+from datetime import timedelta
+from pathlib import Path
+from typing import Dict, IO, Optional
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+from .models import UploadSession
+from .snapshots import resolve_semantics
+
+UPLOADS_DIR = Path(getattr(settings, "UPLOADS_DIR", settings.BASE_DIR / "uploads"))
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+MIN_CHUNK_SIZE = 64 * 1024
+MAX_CHUNK_SIZE = 64 * 1024 * 1024
+# Leitor sem sinal de vida há mais tempo que isso é considerado morto
+STALE_AFTER = timedelta(seconds=getattr(settings, "UPLOAD_PARSER_TIMEOUT", 600))
+# Upload sem nenhuma parte nova há mais tempo que isso é abandonado
+ABANDON_AFTER = timedelta(seconds=getattr(settings, "UPLOAD_TIMEOUT", 3600))
+POLL_INTERVAL = 0.5  # segundos entre consultas do leitor enquanto espera partes
+HEARTBEAT_INTERVAL = 10  # segundos entre sinais de vida do leitor
+READ_BUFFER = 1024 * 1024
+COPY_BUFFER = 64 * 1024
+
+
+class ChunkConflict(ValueError):
+    """Parte fora de ordem ou upload incompleto: o cliente deve retomar de next_chunk"""
+
+
+def spool_path(upload_id: int) -> Path:
+    return UPLOADS_DIR / f"{upload_id}.csv"
+
+
+def _remove_spool(upload_id: int) -> None:
+    path = spool_path(upload_id)
+    if path.exists():
+        os.remove(path)
+
+
+def cleanup_abandoned() -> int:
+    """Marca como falhos os uploads parados há mais de ABANDON_AFTER e apaga os arquivos"""
+    abandoned = UploadSession.objects.filter(
+        status=UploadSession.RECEIVING, updated_at__lte=timezone.now() - ABANDON_AFTER
+    )
+    count = 0
+    for upload in abandoned:
+        count += UploadSession.objects.filter(pk=upload.pk, updated_at=upload.updated_at).update(
+            status=UploadSession.FAILED, error="Upload abandonado", updated_at=timezone.now()
+        )
+        _remove_spool(upload.pk)
+    return count
+
+
+def create_upload(country: str, size, semantics: Optional[str] = None, filename: str = "",
+                  chunk_size=None) -> UploadSession:
+    """Abre uma sessão de upload e já inicia o leitor, que espera as partes"""
+    try:
+        size = int(size)
+        chunk_size = int(chunk_size or DEFAULT_CHUNK_SIZE)
+    except (TypeError, ValueError):
+        raise ValueError("size e chunk_size devem ser números inteiros")
+    if size <= 0:
+        raise ValueError("Arquivo vazio")
+    if not MIN_CHUNK_SIZE <= chunk_size <= MAX_CHUNK_SIZE:
+        raise ValueError(f"chunk_size deve estar entre {MIN_CHUNK_SIZE} e {MAX_CHUNK_SIZE} bytes")
+
+    cleanup_abandoned()
+    upload = UploadSession.objects.create(
+        country=(country or "custom_country").lower(), semantics=resolve_semantics("csv", semantics),
+        filename=filename[:255], size=size, chunk_size=chunk_size,
+    )
+    UPLOADS_DIR.mkdir(parents=True, exist_ok=True)
+    spool_path(upload.pk).touch()
+    ensure_parser(upload)
+    return upload
+
+
+def write_chunk(upload: UploadSession, index: int, stream: IO[bytes]) -> UploadSession:
+    """
+    Grava a parte `index` lendo `stream` em pedaços. Partes já recebidas são
+    ignoradas (reenvio após falha de rede); partes adiantadas geram ChunkConflict.
+    """
+    if upload.status != UploadSession.RECEIVING:
+        raise ValueError(upload.error or "O upload não está recebendo partes")
+    if index < upload.next_chunk:
+        return upload
+    if index > upload.next_chunk:
+        raise ChunkConflict(f"Parte fora de ordem: esperada {upload.next_chunk}, recebida {index}")
+
+    offset = index * upload.chunk_size
+    expected = min(upload.chunk_size, upload.size - offset)
+    length = 0
+    # Grava na posição da parte: um envio interrompido é sobrescrito pelo reenvio
+    with open(spool_path(upload.pk), "r+b") as spool:
+        spool.seek(offset)
+        while length <= expected:
+            piece = stream.read(COPY_BUFFER) if stream is not None else b""
+            if not piece:
+                break
+            spool.write(piece[:expected + 1 - length])
+            length += len(piece)
+    if length != expected:
+        raise ValueError(f"Parte {index} com {length} bytes, esperados {expected}")
+
+    UploadSession.objects.filter(pk=upload.pk, received=offset).update(
+        received=offset + length, updated_at=timezone.now()
+    )
+    upload.refresh_from_db()
+    ensure_parser(upload)
+    return upload
+
+
+def finalize(upload: UploadSession) -> UploadSession:
+    """Encerra o envio; o leitor conclui a importação do que falta"""
+    if upload.status == UploadSession.RECEIVING:
+        if upload.received < upload.size:
+            raise ChunkConflict(f"Upload incompleto: {upload.received} de {upload.size} bytes")
+        UploadSession.objects.filter(pk=upload.pk, status=UploadSession.RECEIVING).update(
+            status=UploadSession.PROCESSING, updated_at=timezone.now()
+        )
+        upload.refresh_from_db()
+    ensure_parser(upload)
+    return upload
+
+
+def ensure_parser(upload: UploadSession) -> bool:
+    """Inicia o leitor da sessão se não houver um vivo; retorna True se iniciou"""
+    if upload.status not in (UploadSession.RECEIVING, UploadSession.PROCESSING):
+        return False
+    heartbeat = upload.parser_heartbeat
+    if heartbeat is not None and heartbeat > timezone.now() - STALE_AFTER:
+        return False
+    # Reivindica o leitor: apenas quem atualizar a linha inicia a thread
+    claim = UploadSession.objects.filter(pk=upload.pk)
+    claim = claim.filter(parser_heartbeat=heartbeat) if heartbeat else claim.filter(parser_heartbeat__isnull=True)
+    claimed = claim.update(parser_heartbeat=timezone.now())
+    if not claimed:
+        return False
+    threading.Thread(target=_parse, args=(upload.pk,), name=f"upload-{upload.pk}", daemon=True).start()
+    return True
+
+
+class SpoolReader(io.RawIOBase):
+    """
+    Lê o arquivo da sessão até os bytes já confirmados (received), esperando
+    novas partes enquanto o upload está aberto. Fim de arquivo só depois do
+    finalize.
+    """
+
+    def __init__(self, upload_id: int):
+        self.upload_id = upload_id
+        self.position = 0
+        self.available = 0
+        self.file = None
+        self.last_heartbeat = time.monotonic()
+
+    def readable(self) -> bool:
+        return True
+
+    def heartbeat(self) -> None:
+        """Sinal de vida do leitor (no máximo um UPDATE a cada HEARTBEAT_INTERVAL)"""
+        if time.monotonic() - self.last_heartbeat >= HEARTBEAT_INTERVAL:
+            UploadSession.objects.filter(pk=self.upload_id).update(parser_heartbeat=timezone.now())
+            self.last_heartbeat = time.monotonic()
+
+    def _wait_for_data(self) -> bool:
+        last_change = time.monotonic()
+        while True:
+            received, status = UploadSession.objects.values_list("received", "status").get(pk=self.upload_id)
+            self.heartbeat()
+            if received > self.available:
+                self.available = received
+            if self.available > self.position:
+                return True
+            if status == UploadSession.FAILED:
+                raise ValueError("Upload cancelado")
+            if status != UploadSession.RECEIVING:
+                return False
+            if time.monotonic() - last_change > ABANDON_AFTER.total_seconds():
+                raise ValueError("Upload abandonado: nenhuma parte recebida")
+            time.sleep(POLL_INTERVAL)
+
+    def readinto(self, buffer) -> int:
+        if self.position >= self.available and not self._wait_for_data():
+            return 0
+        if self.file is None:
+            self.file = open(spool_path(self.upload_id), "rb")
+        self.file.seek(self.position)
+        count = self.file.readinto(memoryview(buffer)[:self.available - self.position])
+        self.position += count
+        return count
+
+    def close(self) -> None:
+        if self.file is not None:
+            self.file.close()
+        super().close()
+
+
+def _parse(upload_id: int) -> None:
+    """Importa o arquivo da sessão enquanto ele chega (executa em uma thread própria)"""
+    from .imports import ImportSession, read_chunks  # pandas só no primeiro upload
+
+    try:
+        upload = UploadSession.objects.get(pk=upload_id)
+        session = ImportSession(upload.country, upload.semantics)
+        reader = SpoolReader(upload_id)
+        with io.BufferedReader(reader, buffer_size=READ_BUFFER) as stream:
+            for chunk in read_chunks(stream):
+                session.add_chunk(chunk)
+                reader.heartbeat()
+        summary = session.finish()
+        UploadSession.objects.filter(pk=upload_id).update(
+            status=UploadSession.DONE, summary=summary, parser_heartbeat=None, updated_at=timezone.now()
+        )
+        _remove_spool(upload_id)
+    except Exception as e:
+        UploadSession.objects.filter(pk=upload_id).update(
+            status=UploadSession.FAILED, error=str(e), parser_heartbeat=None, updated_at=timezone.now()
+        )
+        _remove_spool(upload_id)
+    finally:
+        close_old_connections()
+
+
+def upload_payload(upload: UploadSession) -> Dict:
+    """Representação da sessão na API"""
+    return {
+        "id": upload.id,
+        "country": upload.country,
+        "semantics": upload.semantics,
+        "filename": upload.filename,
+        "size": upload.size,
+        "chunk_size": upload.chunk_size,
+        "received": upload.received,
+        "next_chunk": upload.next_chunk,
+        "status": upload.status,
+        "summary": upload.summary,
+        "error": upload.error or None,
+    }
@@ -1,8 +1,24 @@
 from django.contrib import admin
 from django.urls import path, include
 from django.views.generic import TemplateView
+from vaccine import views, export_views
 
 urlpatterns = [
+    path("api/dashboard/", views.get_dashboard_bundle, name="dashboard-bundle"),
+    path("api/events/", views.stream_events, name="events"),
+    path("api/ready/", views.get_readiness, name="ready"),
+    path("api/metrics/", views.get_metrics, name="metrics"),
+    path("api/export-xlsx/", export_views.export_xlsx, name="export-xlsx"),
+    path("api/reports/", export_views.create_report, name="reports"),
+    path("api/reports/<int:job_id>/", export_views.get_report, name="report-detail"),
+    path("api/reports/<int:job_id>/download/", export_views.download_report, name="report-download"),
+    path("api/exports/", export_views.create_export, name="exports"),
+    path("api/exports/<int:job_id>/", export_views.get_export, name="export-detail"),
+    path("api/exports/<int:job_id>/download/", export_views.download_export, name="export-download"),
+    path("api/uploads/", export_views.create_upload, name="uploads"),
+    path("api/uploads/<int:upload_id>/", export_views.get_upload, name="upload-detail"),
+    path("api/uploads/<int:upload_id>/chunks/<int:index>/", export_views.upload_chunk, name="upload-chunk"),
+    path("api/uploads/<int:upload_id>/finalize/", export_views.finalize_upload, name="upload-finalize"),
     path("api/", include("vaccine.urls")),
     path("", TemplateView.as_view(template_name="dashboard.html"), name="dashboard"),
 ]
@@ -2,21 +2,34 @@ from rest_framework.viewsets import ReadOnlyModelViewSet
 from rest_framework.response import Response
 from rest_framework.decorators import api_view
 from rest_framework import status
-from django.db.models import Sum, Q
 from .models import VaccineData
 from .serializers import VaccineDataSerializer
-import json
-from django.db.models.functions import TruncDate
-from rest_framework.parsers import MultiPartParser, FormParser
-from django.http import FileResponse
-import csv
-import io
-from datetime import datetime
-from pptx import Presentation
-from pptx.util import Inches, Pt
-from pptx.enum.text import PP_ALIGN
-from pptx.dml.color import RGBColor
-import base64
+from .snapshots import country_totals, resolve_mode
+from .metrics import resolve_metric
+from .seed import data_freshness
+from .admission import admission_metrics
+from .singleflight import singleflight_metrics
+from .queries import (
+    achart_payload, acountries_totals, adashboard_bundle, astate_totals, parse_countries, parse_parts
+)
+from .events import (
+    HEARTBEAT_INTERVAL, RECONNECT_DELAY_MS, achanges_since, adataset_version, broadcaster,
+    format_event
+)
+from django.core.handlers.asgi import ASGIRequest
+from django.db import DatabaseError
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+import asyncio
+
+# Endpoints de arquivos (importação de CSV, relatórios e exportações) ficam em
+# export_views, que só carrega pandas, python-pptx e openpyxl quando usados;
+# reexportados aqui para as rotas existentes
+from .export_views import (
+    create_export, create_report, create_upload, download_export, download_report,
+    export_csv, export_powerpoint, export_xlsx, finalize_upload, get_export, get_report,
+    get_upload, upload_chunk, upload_csv
+)
 
 class VaccineDataViewSet(ReadOnlyModelViewSet):
     queryset = VaccineData.objects.all()
@@ -27,107 +40,138 @@ class VaccineDataViewSet(ReadOnlyModelViewSet):
 def get_comparison(request):
     """Retorna dados comparativos entre países"""
     countries = request.GET.getlist("countries", ["brasil", "portugal", "italia", "usa"])
+    try:
+        mode = resolve_mode(request.GET.get("mode"))
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
     
     data = {}
-    for country in countries:
-        country_data = VaccineData.objects.filter(country=country).aggregate(
-            total_vaccinated=Sum("vaccinated"),
-            total_deaths=Sum("deaths"),
-            total_population=Sum("population")
-        )
-        data[country] = country_data
+    for country, totals in country_totals(countries, mode).items():
+        data[country] = {
+            "total_vaccinated": totals["vaccinated"],
+            "total_deaths": totals["deaths"],
+            "total_population": totals["population"]
+        }
     
     return Response(data)
 
-@api_view(["GET"])
-def get_chart_data(request):
+@require_GET
+async def get_chart_data(request):
     """Retorna dados para gráficos de evolução temporal"""
     chart_type = request.GET.get("type", "line")
     country = request.GET.get("country", "brasil")
     
-    queryset = VaccineData.objects.filter(
-        country=country
-    ).values(
-        "date", "vaccinated", "deaths"
-    ).order_by("date").distinct()
-    
-    results = list(queryset)
-    
-    # Se não houver dados por data, agrupar por país
-    if not results:
-        results = [{
-            "date": "Dados Agregados",
-            "vaccinated": VaccineData.objects.filter(country=country).aggregate(Sum("vaccinated"))["vaccinated__sum"] or 0,
-            "deaths": VaccineData.objects.filter(country=country).aggregate(Sum("deaths"))["deaths__sum"] or 0
-        }]
+    # raw (valores gravados), daily (variação diária), avg7 / avg14 (médias móveis)
+    try:
+        metric = resolve_metric(request.GET.get("metric"))
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
     
-    return Response(results)
+    return JsonResponse(await achart_payload(country, metric), safe=False)
 
-@api_view(["GET"])
-def get_countries_data(request):
+@require_GET
+async def get_countries_data(request):
     """Retorna totais por país com tratamento de dados vazios"""
-    countries_list = request.GET.getlist("countries", ["brasil", "portugal", "italia", "usa"])
-    
-    results = []
-    for country in countries_list:
-        data = VaccineData.objects.filter(country=country).aggregate(
-            vaccinated=Sum("vaccinated"),
-            deaths=Sum("deaths")
-        )
-        results.append({
-            "country": country,
-            "vaccinated": data["vaccinated"] or 0,
-            "deaths": data["deaths"] or 0
-        })
+    countries_list = parse_countries(request.GET)
+    try:
+        mode = resolve_mode(request.GET.get("mode"))
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
     
-    return Response(results)
+    return JsonResponse(await acountries_totals(countries_list, mode), safe=False)
 
-@api_view(["GET"])
-def get_state_data(request):
+@require_GET
+async def get_state_data(request):
     """Retorna dados por estado/região com valores reais"""
     country = request.GET.get("country", "brasil")
     
-    states = VaccineData.objects.filter(
-        country=country
-    ).values("state_or_region").distinct().order_by("state_or_region")
-    
-    results = []
-    for state_obj in states:
-        state = state_obj["state_or_region"]
-        if not state:
-            continue
-            
-        data = VaccineData.objects.filter(
-            country=country,
-            state_or_region=state
-        ).aggregate(
-            vaccinated=Sum("vaccinated"),
-            deaths=Sum("deaths")
+    # Ex.: ?max_vaccination_rate=60 -> estados abaixo de 60% de cobertura
+    try:
+        mode = resolve_mode(request.GET.get("mode"))
+        min_rate = request.GET.get("min_vaccination_rate")
+        max_rate = request.GET.get("max_vaccination_rate")
+        results = await astate_totals(
+            country,
+            mode,
+            order_by=request.GET.get("order_by", "vaccinated"),
+            min_vaccination_rate=float(min_rate) if min_rate else None,
+            max_vaccination_rate=float(max_rate) if max_rate else None
         )
-        results.append({
-            "state": state,
-            "vaccinated": data["vaccinated"] or 0,
-            "deaths": data["deaths"] or 0
-        })
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
     
-    # Ordenar por vacinados decrescente
-    results.sort(key=lambda x: x["vaccinated"], reverse=True)
+    return JsonResponse(results, safe=False)
+
+@require_GET
+async def get_dashboard_bundle(request):
+    """Retorna countries-data, chart-data e state-data em uma única resposta"""
+    countries_list = parse_countries(request.GET)
+    country = request.GET.get("country", "brasil")
+    try:
+        mode = resolve_mode(request.GET.get("mode"))
+        metric = resolve_metric(request.GET.get("metric"))
+        parts = parse_parts(request.GET)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
     
-    return Response(results)
+    return JsonResponse(await adashboard_bundle(countries_list, country, metric, mode, parts))
+
+async def _initial_event(since):
+    """Primeiro evento da conexão: versão atual ou resumo das mudanças perdidas"""
+    version = await adataset_version()
+    if since is not None and since < version:
+        missed = await achanges_since(since)
+        countries = sorted({c for change in missed for c in change["countries"]})
+        return format_event("data-changed", {"version": version, "countries": countries}, version)
+    return format_event("version", {"version": version}, version)
+
+async def stream_events(request):
+    """
+    Stream SSE com as mudanças de versão do dataset e os países afetados.
+    Requer ASGI; sob WSGI responde apenas o evento inicial e o navegador
+    reconecta após o intervalo de retry (polling).
+    """
+    last_event_id = request.headers.get("Last-Event-ID") or request.GET.get("since")
+    since = int(last_event_id) if last_event_id and last_event_id.isdigit() else None
+    
+    if not isinstance(request, ASGIRequest):
+        body = f"retry: {RECONNECT_DELAY_MS * 6}\n\n" + await _initial_event(since)
+        return StreamingHttpResponse(iter([body]), content_type="text/event-stream")
+    
+    async def stream():
+        queue = broadcaster.subscribe()
+        try:
+            yield f"retry: {RECONNECT_DELAY_MS}\n\n"
+            yield await _initial_event(since)
+            
+            while True:
+                try:
+                    change = await asyncio.wait_for(queue.get(), timeout=HEARTBEAT_INTERVAL)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                yield format_event("data-changed", change, change["version"])
+        finally:
+            broadcaster.unsubscribe(queue)
+    
+    response = StreamingHttpResponse(stream(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
 
 @api_view(["GET"])
 def get_deaths_comparison(request):
     """Retorna comparação específica de óbitos entre países"""
     countries_list = request.GET.getlist("countries", ["brasil", "portugal", "italia", "usa"])
+    try:
+        mode = resolve_mode(request.GET.get("mode"))
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
     
     results = []
-    for country in countries_list:
-        data = VaccineData.objects.filter(country=country).aggregate(
-            total_deaths=Sum("deaths"),
-            total_vaccinated=Sum("vaccinated")
-        )
-        total_deaths = data["total_deaths"] or 0
-        total_vaccinated = data["total_vaccinated"] or 1  # Evitar divisão por zero
+    for country, totals in country_totals(countries_list, mode).items():
+        total_deaths = totals["deaths"]
+        total_vaccinated = totals["vaccinated"] or 1  # Evitar divisão por zero
         
         # Taxa de mortalidade
         mortality_rate = (total_deaths / total_vaccinated * 100) if total_vaccinated > 0 else 0
@@ -141,177 +185,26 @@ def get_deaths_comparison(request):
     
     return Response(results)
 
-@api_view(["POST"])
-def upload_csv(request):
-    """Upload de arquivo CSV para importar dados"""
-    if 'file' not in request.FILES:
-        return Response({"error": "Nenhum arquivo enviado"}, status=status.HTTP_400_BAD_REQUEST)
-    
-    csv_file = request.FILES['file']
-    country_name = request.POST.get('country', 'custom_country')
-    
+@require_GET
+def get_readiness(request):
+    """
+    Prontidão para tráfego: 200 quando há dados (mesmo que de um snapshot
+    antigo, enquanto a coleta em segundo plano não termina), 503 sem dados.
+    O corpo informa a versão do dataset e a idade dos dados.
+    """
     try:
-        # Decodificar arquivo CSV
-        decoded_file = csv_file.read().decode('utf-8')
-        reader = csv.DictReader(io.StringIO(decoded_file))
-        
-        imported_count = 0
-        for row in reader:
-            try:
-                # Esperado: date, state_or_region, vaccinated, deaths, population
-                vaccine_data = VaccineData(
-                    country=country_name.lower(),
-                    state_or_region=row.get('state_or_region', 'Nacional'),
-                    date=row['date'],
-                    vaccinated=int(row.get('vaccinated', 0)),
-                    deaths=int(row.get('deaths', 0)),
-                    population=int(row.get('population', 0))
-                )
-                vaccine_data.save()
-                imported_count += 1
-            except Exception as e:
-                continue
-        
-        return Response({
-            "success": True,
-            "message": f"{imported_count} registros importados com sucesso",
-            "imported_count": imported_count
-        })
+        freshness = data_freshness()
+    except DatabaseError as e:
+        return JsonResponse({"ready": False, "error": str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
     
-    except Exception as e:
-        return Response({
-            "error": f"Erro ao processar arquivo: {str(e)}"
-        }, status=status.HTTP_400_BAD_REQUEST)
+    return JsonResponse(freshness, status=status.HTTP_200_OK if freshness["ready"]
+                        else status.HTTP_503_SERVICE_UNAVAILABLE)
 
-@api_view(["GET"])
-def export_powerpoint(request):
-    """Gera apresentação PowerPoint com gráficos e análises"""
-    try:
-        # Criar apresentação
-        prs = Presentation()
-        prs.slide_width = Inches(10)
-        prs.slide_height = Inches(7.5)
-        
-        # Slide 1: Título
-        slide_layout = prs.slide_layouts[6]  # Blank layout
-        slide = prs.slides.add_slide(slide_layout)
-        
-        left = Inches(1)
-        top = Inches(2.5)
-        width = Inches(8)
-        height = Inches(2)
-        
-        title_box = slide.shapes.add_textbox(left, top, width, height)
-        title_frame = title_box.text_frame
-        title_frame.text = "Análise de Vacinação"
-        title_frame.paragraphs[0].font.size = Pt(60)
-        title_frame.paragraphs[0].font.bold = True
-        title_frame.paragraphs[0].font.color.rgb = RGBColor(102, 126, 234)
-        title_frame.paragraphs[0].alignment = PP_ALIGN.CENTER
-        
-        subtitle_box = slide.shapes.add_textbox(Inches(1), Inches(4.5), Inches(8), Inches(1))
-        subtitle_frame = subtitle_box.text_frame
-        subtitle_frame.text = "Comparativo Brasil, Portugal, Itália e EUA"
-        subtitle_frame.paragraphs[0].font.size = Pt(24)
-        subtitle_frame.paragraphs[0].alignment = PP_ALIGN.CENTER
-        
-        # Slide 2: Estatísticas Gerais
-        slide = prs.slides.add_slide(prs.slide_layouts[6])
-        
-        title_box = slide.shapes.add_textbox(Inches(0.5), Inches(0.5), Inches(9), Inches(0.8))
-        title_frame = title_box.text_frame
-        title_frame.text = "Estatísticas Gerais"
-        title_frame.paragraphs[0].font.size = Pt(40)
-        title_frame.paragraphs[0].font.bold = True
-        title_frame.paragraphs[0].font.color.rgb = RGBColor(102, 126, 234)
-        
-        # Carregar dados
-        countries_data = VaccineData.objects.values('country').distinct()
-        countries = [c['country'] for c in countries_data]
-        
-        y_pos = 1.8
-        for country in ['brasil', 'portugal', 'italia', 'usa']:
-            country_stats = VaccineData.objects.filter(country=country).aggregate(
-                vaccinated=Sum('vaccinated'),
-                deaths=Sum('deaths')
-            )
-            
-            text_box = slide.shapes.add_textbox(Inches(0.5), Inches(y_pos), Inches(9), Inches(0.9))
-            text_frame = text_box.text_frame
-            text = f"{country.upper()}: {country_stats['vaccinated'] or 0:,} vacinados | {country_stats['deaths'] or 0:,} óbitos"
-            text_frame.text = text
-            text_frame.paragraphs[0].font.size = Pt(16)
-            y_pos += 1
-        
-        # Slide 3: Recomendações
-        slide = prs.slides.add_slide(prs.slide_layouts[6])
-        
-        title_box = slide.shapes.add_textbox(Inches(0.5), Inches(0.5), Inches(9), Inches(0.8))
-        title_frame = title_box.text_frame
-        title_frame.text = "Análise e Recomendações"
-        title_frame.paragraphs[0].font.size = Pt(40)
-        title_frame.paragraphs[0].font.bold = True
-        title_frame.paragraphs[0].font.color.rgb = RGBColor(102, 126, 234)
-        
-        recommendations = [
-            "Brasil: Manter esforços de vacinação em estados com baixa cobertura",
-            "Portugal: Continuar monitoramento de casos em regiões de maior incidência",
-            "Itália: Reforçar campanhas de vacinação em populações vulneráveis",
-            "EUA: Intensificar ações de prevenção em áreas de baixa vacinação"
-        ]
-        
-        y_pos = 1.8
-        for rec in recommendations:
-            text_box = slide.shapes.add_textbox(Inches(0.7), Inches(y_pos), Inches(8.6), Inches(0.8))
-            text_frame = text_box.text_frame
-            text_frame.word_wrap = True
-            text_frame.text = "• " + rec
-            text_frame.paragraphs[0].font.size = Pt(14)
-            y_pos += 1.0
-        
-        # Salvar arquivo
-        pptx_io = io.BytesIO()
-        prs.save(pptx_io)
-        pptx_io.seek(0)
-        
-        return FileResponse(
-            pptx_io,
-            as_attachment=True,
-            filename=f"analise_vacinacao_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pptx",
-            content_type="application/vnd.openxmlformats-officedocument.presentationml.presentation"
-        )
-    
-    except Exception as e:
-        return Response({
-            "error": f"Erro ao gerar PowerPoint: {str(e)}"
-        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-@api_view(["GET"])
-def export_csv(request):
-    """Exporta todos os dados em CSV"""
-    try:
-        response = FileResponse(
-            content_type='text/csv',
-            as_attachment=True,
-            filename=f"dados_vacinacao_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-        )
-        
-        writer = csv.writer(response)
-        writer.writerow(['país', 'estado_região', 'data', 'vacinados', 'óbitos', 'população'])
-        
-        for data in VaccineData.objects.all():
-            writer.writerow([
-                data.country,
-                data.state_or_region or 'N/A',
-                data.date,
-                data.vaccinated,
-                data.deaths,
-                data.population
-            ])
-        
-        return response
-    
-    except Exception as e:
-        return Response({
-            "error": f"Erro ao exportar CSV: {str(e)}"
-        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+@require_GET
+def get_metrics(request):
+    """
+    Métricas do servidor. admission é compartilhado entre os workers (vagas
+    em uso, fila e recusas 429/503 dos endpoints caros); singleflight traz os
+    contadores de coalescência do worker que atendeu a requisição.
+    """
+    return JsonResponse({"admission": admission_metrics(), "singleflight": singleflight_metrics()})
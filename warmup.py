@@ -0,0 +1,43 @@
+"""
+Aquecimento do processo antes do fork dos workers
+
+Com preload_app (gunicorn.conf.py), o master carrega a aplicação e chama
+warm_up() antes de criar os workers: rotas, views, template do dashboard,
+numpy e a versão publicada dos agregados (vaccine.aggregates) já estão
+prontos na memória do master e são herdados por fork (copy-on-write). O
+primeiro request de cada worker, inclusive dos reciclados por max_requests,
+não paga importações nem carregamento de arquivos.
+
+pandas, python-pptx e openpyxl continuam sob demanda: são usados só por
+relatórios, exportações e importações.
+"""
+import logging
+import time
+from django.db import DatabaseError, connections
+from django.template.loader import get_template
+from django.urls import get_resolver
+
+logger = logging.getLogger(__name__)
+
+
+def warm_up() -> float:
+    """Carrega o estado compartilhado pelos workers; retorna o tempo gasto (s)"""
+    from .aggregates import current_snapshot
+    from .queries import DEFAULT_COUNTRIES, dashboard_bundle
+    from .seed import data_freshness
+
+    start = time.perf_counter()
+    get_resolver().url_patterns
+    get_template("dashboard.html")
+    try:
+        current_snapshot()
+        # Executa uma vez o caminho do dashboard (ORM, agregados, serialização)
+        dashboard_bundle(DEFAULT_COUNTRIES, DEFAULT_COUNTRIES[0])
+        data_freshness()
+    except DatabaseError as e:
+        # Banco ainda sem tabelas (ex.: antes do migrate): os workers sobem frios
+        logger.warning("Aquecimento sem consultas ao banco: %s", e)
+    finally:
+        # Conexões não podem ser herdadas pelos workers
+        connections.close_all()
+    return time.perf_counter() - start